@@ -1,15 +1,28 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from pydantic import BaseModel
-from typing import List, Dict, Any
+from pydantic import BaseModel, Field
+from typing import List, Dict, Any, Optional
+import os
+import json
+import hashlib
 import pandas as pd
 import numpy as np
 
 from app.db.session import get_db
 from app.db.models import Dataset
+from app.core.cache import ResultCache
+from app.core.config import settings
+from app.data.analysis.engine import AnalysisEngine
+from app.data.analysis.sketches import approx_distinct_counts
+from app.data.analysis.profile import DatasetProfiler
 
 router = APIRouter()
 
+# Datasets are immutable, so results are memoized per dataset file.
+_distinct_cache = ResultCache(max_entries=64)
+_relevance_cache = ResultCache(max_entries=256)
+_metric_cache = ResultCache(max_entries=256)
+
 class FeatureAnalysisRequest(BaseModel):
     dataset_id: int
     target_column: str
@@ -20,111 +33,226 @@ class FeatureRelevance(BaseModel):
     relevance: str  # "High", "Medium", "Low"
     reason: str 
 
-@router.post("/features", response_model=List[FeatureRelevance])
-def analyze_features(req: FeatureAnalysisRequest, db: Session = Depends(get_db)):
-    """
-    Calculates the relevance of each feature column to the target column.
-    Uses Pearson correlation for numerical targets/features.
-    """
-    # 1. Load Dataset
-    dataset = db.query(Dataset).filter(Dataset.id == req.dataset_id).first()
+class MetricRelevanceRequest(BaseModel):
+    dataset_id: int
+    target_column: str
+    metric: str = "mutual_info"          # "mutual_info", "anova_f", "chi2", "cramers_v"
+    sample_size: Optional[int] = None    # Score on a random row subsample
+    n_jobs: Optional[int] = None         # Defaults to settings.ANALYSIS_N_JOBS
+
+class MetricRelevance(BaseModel):
+    feature: str
+    metric: str
+    score: float
+    p_value: Optional[float] = None
+    relevance: str  # "High", "Medium", "Low", "Unknown"
+    reason: str
+
+class CorrelationMatrixRequest(BaseModel):
+    dataset_id: int
+    method: str = "pearson"              # "pearson" or "spearman"
+    columns: Optional[List[str]] = None  # Defaults to all numeric columns
+    sample_size: Optional[int] = None    # Approximate mode: correlate a random row subsample
+    top_k: int = Field(50, gt=0)
+    threshold: Optional[float] = Field(None, gt=0, le=1)  # If set, return every pair with |r| >= threshold instead of top_k
+
+class CorrelatedPair(BaseModel):
+    feature_a: str
+    feature_b: str
+    correlation: float
+
+class CorrelationMatrixResponse(BaseModel):
+    dataset_id: int
+    method: str
+    n_columns: int
+    approximate: bool
+    pairs: List[CorrelatedPair]
+
+class DriftRequest(BaseModel):
+    current_dataset_id: int
+    reference_dataset_id: Optional[int] = None  # Defaults to the current dataset's parent
+    columns: Optional[List[str]] = None
+
+class ColumnDrift(BaseModel):
+    column: str
+    kind: str
+    status: str                      # "compared", "type_changed", "missing_in_reference", "missing_in_current"
+    dtype_reference: Optional[str] = None
+    dtype_current: Optional[str] = None
+    drift: str                       # "none", "moderate", "significant", "unknown"
+    psi: Optional[float] = None
+    ks: Optional[float] = None
+    null_rate_reference: Optional[float] = None
+    null_rate_current: Optional[float] = None
+    null_rate_delta: Optional[float] = None
+    distinct_reference: Optional[int] = None
+    distinct_current: Optional[int] = None
+    mean_reference: Optional[float] = None
+    mean_current: Optional[float] = None
+    category_shifts: Optional[List[Dict[str, Any]]] = None
+
+class DriftResponse(BaseModel):
+    reference_dataset_id: int
+    current_dataset_id: int
+    reference_rows: int
+    current_rows: int
+    columns: List[ColumnDrift]
+
+def _get_dataset(dataset_id: int, db: Session) -> Dataset:
+    dataset = db.query(Dataset).filter(Dataset.id == dataset_id).first()
     if not dataset:
         raise HTTPException(status_code=404, detail="Dataset not found")
-    
-    print(f"[DEBUG] Analyzing Dataset ID: {req.dataset_id}")
-    print(f"[DEBUG] DB File Path: {dataset.file_path}")
-    
+
     # Handle potential Windows/Linux path mismatch
     # If path is relative like 'app/storage/...' ensure it works
-    import os
     if not os.path.exists(dataset.file_path):
-        print(f"[ERROR] File does not exist at: {dataset.file_path}")
-        # Try a fallback if standard relative path
         fallback = f"/app/{dataset.file_path}"
         if os.path.exists(fallback):
-             print(f"[DEBUG] Found at fallback: {fallback}")
-             dataset.file_path = fallback
-        else:
-             print(f"[ERROR] Fallback also failed: {fallback}")
+            dataset.file_path = fallback
+    return dataset
 
+def _load_frame(dataset: Dataset) -> pd.DataFrame:
     try:
-        df = pd.read_parquet(dataset.file_path)
+        return pd.read_parquet(dataset.file_path)
     except Exception as e:
-        print(f"[ERROR] Read Parquet Failed: {e}")
-        import traceback
-        traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Failed to load dataset: {str(e)}")
 
+def _distinct_counts(dataset: Dataset, df: pd.DataFrame) -> Dict[str, int]:
+    def compute():
+        profile = DatasetProfiler.load(dataset.file_path)
+        if profile is not None:
+            return {col: entry["distinct"] for col, entry in profile["columns"].items()}
+        return approx_distinct_counts(df)
+    return _distinct_cache.get_or_compute(dataset.file_path, compute)
+
+@router.post("/features", response_model=List[FeatureRelevance])
+def analyze_features(req: FeatureAnalysisRequest, db: Session = Depends(get_db)):
+    """
+    Calculates the relevance of each feature column to the target column.
+    Uses Pearson correlation for numerical targets/features (categories as codes),
+    computed for all columns at once in vectorized blocks.
+    """
+    dataset = _get_dataset(req.dataset_id, db)
+
+    cache_key = (dataset.file_path, req.target_column)
+    cached = _relevance_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    df = _load_frame(dataset)
     if req.target_column not in df.columns:
         raise HTTPException(status_code=400, detail=f"Target column '{req.target_column}' not found")
 
-    target = df[req.target_column]
-    results = []
-
-    # 2. Analyze Correlations
-    # Basic logic: 
-    # - If target is numerical, use correlation.
-    # - If target is categorical, this simple MVP might fail or need fallback.
-    # For MVP transparency, we'll try to convert target to codes if not numeric.
-    
-    is_target_numeric = pd.api.types.is_numeric_dtype(target)
-    
-    if not is_target_numeric:
-        # Convert to codes for a rough correlation check
-        target_encoded = target.astype('category').cat.codes
-    else:
-        target_encoded = target
+    results = AnalysisEngine.feature_relevance(df, req.target_column, _distinct_counts(dataset, df))
+    _relevance_cache.set(cache_key, results)
+    return results
 
-    for col in df.columns:
-        if col == req.target_column:
-            continue
-        
-        try:
-            # Skip if column is extremely high cardinality (like IDs)
-            if df[col].nunique() > len(df) * 0.95:
-                 results.append({
-                    "feature": col,
-                    "score": 0.0,
-                    "relevance": "Low",
-                    "reason": "High cardinality (likely ID)"
-                })
-                 continue
-
-            col_data = df[col]
-            if not pd.api.types.is_numeric_dtype(col_data):
-                col_data = col_data.astype('category').cat.codes
-
-            # Calculate Correlation
-            corr = np.abs(col_data.corr(target_encoded))
-            if pd.isna(corr):
-                corr = 0.0
-            
-            # Determine Verdict
-            if corr > 0.5:
-                relevance = "High"
-                reason = "Strong statistical relationship"
-            elif corr > 0.1:
-                relevance = "Medium"
-                reason = "Moderate correlation"
-            else:
-                relevance = "Low"
-                reason = "Weak or non-linear relationship"
-
-            results.append({
-                "feature": col,
-                "score": float(corr),
-                "relevance": relevance,
-                "reason": reason
-            })
-
-        except Exception:
-             results.append({
-                "feature": col,
-                "score": 0.0,
-                "relevance": "Unknown",
-                "reason": "Analysis failed (incompatible types)"
-            })
-    
-    # Sort by score descending
-    results.sort(key=lambda x: x['score'], reverse=True)
+@router.post("/relevance", response_model=List[MetricRelevance])
+def analyze_relevance(req: MetricRelevanceRequest, db: Session = Depends(get_db)):
+    """
+    Scores each feature column against the target with a dependence metric that
+    also captures non-linear and nominal relationships:
+    mutual information, ANOVA F, chi-squared or Cramer's V.
+    Column blocks are scored in parallel; results are cached per (dataset, target, metric).
+    """
+    if req.metric not in AnalysisEngine.RELEVANCE_METRICS:
+        raise HTTPException(status_code=400, detail=f"Unknown metric '{req.metric}'. Available: {AnalysisEngine.RELEVANCE_METRICS}")
+
+    dataset = _get_dataset(req.dataset_id, db)
+
+    cache_key = (dataset.file_path, req.target_column, req.metric, req.sample_size)
+    cached = _metric_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    df = _load_frame(dataset)
+    if req.target_column not in df.columns:
+        raise HTTPException(status_code=400, detail=f"Target column '{req.target_column}' not found")
+
+    try:
+        results = AnalysisEngine.metric_relevance(
+            df,
+            req.target_column,
+            req.metric,
+            distinct_counts=_distinct_counts(dataset, df),
+            n_jobs=req.n_jobs or settings.ANALYSIS_N_JOBS,
+            sample_size=req.sample_size,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Relevance analysis failed: {str(e)}")
+
+    _metric_cache.set(cache_key, results)
     return results
+
+def _correlation_artifact_path(dataset: Dataset, req: CorrelationMatrixRequest) -> str:
+    """One float32 .npy artifact per dataset version, method, sample size and column selection."""
+    version = os.path.splitext(os.path.basename(dataset.file_path))[0]
+    scope = "all"
+    if req.columns:
+        scope = hashlib.md5("\x1f".join(req.columns).encode()).hexdigest()[:12]
+    sample = req.sample_size or "full"
+    return os.path.join(settings.ARTIFACT_DIR, f"corr_{version}_{req.method}_{sample}_{scope}.npy")
+
+@router.post("/correlation-matrix", response_model=CorrelationMatrixResponse)
+def correlation_matrix(req: CorrelationMatrixRequest, db: Session = Depends(get_db)):
+    """
+    Feature-feature correlation matrix for multicollinearity pruning.
+    The matrix is computed once in column blocks, stored as a compact float32 artifact,
+    and only the strongest pairs (top-k or above a threshold) are returned.
+    """
+    if req.method not in ("pearson", "spearman"):
+        raise HTTPException(status_code=400, detail="Method must be 'pearson' or 'spearman'")
+
+    dataset = _get_dataset(req.dataset_id, db)
+    matrix_path = _correlation_artifact_path(dataset, req)
+    columns_path = matrix_path.replace(".npy", ".json")
+
+    if os.path.exists(matrix_path) and os.path.exists(columns_path):
+        # Memory-mapped: pair extraction reads the matrix block by block
+        matrix = np.load(matrix_path, mmap_mode="r")
+        with open(columns_path) as f:
+            cols = json.load(f)
+    else:
+        df = _load_frame(dataset)
+        try:
+            matrix, cols = AnalysisEngine.correlation_matrix(df, req.columns, req.method, req.sample_size)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Correlation analysis failed: {str(e)}")
+        np.save(matrix_path, matrix)
+        with open(columns_path, "w") as f:
+            json.dump(cols, f)
+
+    pairs = AnalysisEngine.top_correlated_pairs(matrix, cols, top_k=req.top_k, threshold=req.threshold)
+    return {
+        "dataset_id": dataset.id,
+        "method": req.method,
+        "n_columns": len(cols),
+        "approximate": bool(req.sample_size),
+        "pairs": pairs
+    }
+
+@router.post("/drift", response_model=DriftResponse)
+def compare_datasets(req: DriftRequest, db: Session = Depends(get_db)):
+    """
+    Per-column drift between two datasets (PSI, KS distance, null-rate delta,
+    category share shifts), computed from their persisted profiles instead of the data.
+    """
+    current = _get_dataset(req.current_dataset_id, db)
+    reference_id = req.reference_dataset_id or current.parent_id
+    if reference_id is None:
+        raise HTTPException(status_code=400, detail="No reference dataset given and current dataset has no parent")
+    reference = _get_dataset(reference_id, db)
+
+    try:
+        reference_profile = DatasetProfiler.load_or_build(reference.file_path)
+        current_profile = DatasetProfiler.load_or_build(current.file_path)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to profile dataset: {str(e)}")
+
+    return {
+        "reference_dataset_id": reference.id,
+        "current_dataset_id": current.id,
+        "reference_rows": reference_profile["row_count"],
+        "current_rows": current_profile["row_count"],
+        "columns": AnalysisEngine.compare_profiles(reference_profile, current_profile, req.columns)
+    }
@@ -10,6 +10,8 @@ import uuid
 from app.db.session import get_db
 from app.db.models import Dataset, SystemActivity
 from app.data.cleaning.engine import CleaningEngine
+from app.data.analysis.profile import DatasetProfiler
+from app.data.ingestion.storage import DatasetStore
 from app.core.config import settings
 
 router = APIRouter()
@@ -63,17 +65,28 @@ def apply_cleaning(request: CleaningRequest, db: Session = Depends(get_db)):
 
     # 2. Load Data
     try:
-        df = pd.read_parquet(source_ds.file_path)
+        df = DatasetStore.read(source_ds.file_path)
     except Exception as e:
         raise HTTPException(status_code=500, detail="Could not read source file")
 
     # 3. Apply Engine
-    cleaned_df = CleaningEngine.apply_operation(df, request.operation, request.params)
+    # Progress events, recorded on the activity and returned: ~10 per stage plus each stage's last
+    progress = []
+    def report_progress(event):
+        last = progress[-1] if progress else None
+        total = max(event["total"], 1)
+        if last is None or last["stage"] != event["stage"] or event["done"] * 10 // total > last["done"] * 10 // total:
+            progress.append(dict(event))
+        elif event["done"] >= event["total"]:
+            progress[-1] = dict(event)
+
+    cleaned_df = CleaningEngine.apply_operation(df, request.operation, request.params, progress=report_progress)
 
     # 4. Save New Artifact
     new_filename = f"{uuid.uuid4()}.parquet"
     new_path = os.path.join(settings.DATASET_DIR, new_filename)
-    cleaned_df.to_parquet(new_path, index=False)
+    DatasetStore.write(cleaned_df, new_path)
+    DatasetProfiler.try_save(cleaned_df, new_path)
 
     # 5. Create DB Entry
     new_ds_name = f"{source_ds.filename.split('.')[0]}_cleaned_{request.operation}"
@@ -102,6 +115,7 @@ def apply_cleaning(request: CleaningRequest, db: Session = Depends(get_db)):
             "params": request.params,
             "rows": len(cleaned_df),
             "cols": len(cleaned_df.columns),
+            "progress": progress or None,
             "output_dataset": new_ds_name
         }
     )
@@ -110,7 +124,7 @@ def apply_cleaning(request: CleaningRequest, db: Session = Depends(get_db)):
     db.commit()
     db.refresh(new_dataset)
 
-    return {"message": "Cleaning applied successfully", "new_dataset_id": new_dataset.id}
+    return {"message": "Cleaning applied successfully", "new_dataset_id": new_dataset.id, "progress": progress}
 
 @router.get("/recommend/{dataset_id}")
 def get_recommendations(dataset_id: int, db: Session = Depends(get_db)):
@@ -87,6 +87,8 @@ def delete_dataset(dataset_id: int, db: Session = Depends(get_db)):
     # Delete physical file
     if os.path.exists(dataset.file_path):
         os.remove(dataset.file_path)
+    if dataset.transform_artifact and os.path.exists(dataset.transform_artifact):
+        os.remove(dataset.transform_artifact)
     
     # Delete DB record
     db.delete(dataset)
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-from typing import Dict, Any
+from typing import Dict, Any, List
 import os
 import uuid
 import pandas as pd
@@ -9,6 +9,9 @@ import pandas as pd
 from app.db.session import get_db
 from app.db.models import Dataset, SystemActivity
 from app.data.feature_engineering.engine import FeatureEngine
+from app.data.feature_engineering.streaming import StreamingFeatureEngine
+from app.data.analysis.profile import DatasetProfiler
+from app.data.ingestion.storage import DatasetStore
 from app.core.config import settings
 
 router = APIRouter()
@@ -18,26 +21,70 @@ class FeatureRequest(BaseModel):
     operation: str
     params: Dict[str, Any]
 
-@router.post("/apply")
-def apply_feature_engineering(request: FeatureRequest, db: Session = Depends(get_db)):
-    # 1. Fetch Source
+class TransformRequest(BaseModel):
+    dataset_id: int          # Data to transform
+    fitted_dataset_id: int   # Derived dataset whose fitted feature-engineering steps are replayed
+
+@router.post("/estimate")
+def estimate_feature_engineering(request: FeatureRequest, db: Session = Depends(get_db)):
+    """Dry run: predicted output shape and memory of an operation, dense vs sparse."""
     source_ds = db.query(Dataset).filter(Dataset.id == request.dataset_id).first()
     if not source_ds:
         raise HTTPException(status_code=404, detail="Dataset not found")
 
-    # 2. Load Data
     try:
-        df = pd.read_parquet(source_ds.file_path)
+        df = DatasetStore.read(source_ds.file_path)
     except Exception as e:
         raise HTTPException(status_code=500, detail="Could not read source file")
 
-    # 3. Apply Engine
-    processed_df = FeatureEngine.apply_feature_engineering(df, request.operation, request.params)
+    estimate = FeatureEngine.estimate_output(df, request.operation, request.params)
+    if estimate["estimated"]:
+        estimate["max_output_columns"] = settings.FE_MAX_OUTPUT_COLUMNS
+        estimate["max_output_bytes"] = settings.FE_MAX_OUTPUT_BYTES
+    return estimate
+
+@router.post("/apply")
+def apply_feature_engineering(request: FeatureRequest, db: Session = Depends(get_db)):
+    # 1. Fetch Source
+    source_ds = db.query(Dataset).filter(Dataset.id == request.dataset_id).first()
+    if not source_ds:
+        raise HTTPException(status_code=404, detail="Dataset not found")
 
-    # 4. Save New Artifact
     new_filename = f"{uuid.uuid4()}.parquet"
     new_path = os.path.join(settings.DATASET_DIR, new_filename)
-    processed_df.to_parquet(new_path, index=False)
+
+    # Chunked (out-of-core) mode: requested explicitly, or automatic for large sources
+    chunked = request.params.get("chunked", False) or (
+        os.path.getsize(source_ds.file_path) > settings.FE_STREAMING_MIN_BYTES
+        and StreamingFeatureEngine.supports(request.operation, request.params)
+    )
+
+    if chunked:
+        # 2-4. Fit in one streaming pass, then transform batch by batch into the new artifact
+        try:
+            state, row_count, column_count = StreamingFeatureEngine.run(source_ds.file_path, request.operation, request.params, new_path)
+        except Exception:
+            if os.path.exists(new_path):
+                os.remove(new_path)
+            raise
+        DatasetProfiler.try_save(None, new_path)
+    else:
+        # 2. Load Data
+        try:
+            df = DatasetStore.read(source_ds.file_path)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail="Could not read source file")
+
+        # 3. Apply Engine
+        processed_df, state = FeatureEngine.fit_transform(df, request.operation, request.params)
+
+        # 4. Save New Artifact
+        DatasetStore.write(processed_df, new_path)
+        DatasetProfiler.try_save(processed_df, new_path)
+        row_count, column_count = len(processed_df), len(processed_df.columns)
+
+    # Fitted state so the step can be replayed on new data
+    state_path = FeatureEngine.save_state(state, new_path)
 
     # 5. Create DB Entry
     new_ds_name = f"{source_ds.filename.split('.')[0]}_FE_{request.operation}"
@@ -48,12 +95,14 @@ def apply_feature_engineering(request: FeatureRequest, db: Session = Depends(get
         source_type="feature_engineered",
         parent_id=source_ds.id,
         cleaning_operation=f"FE: {request.operation}", # Reusing this column for log
+        transform_artifact=state_path,
         size_bytes=os.path.getsize(new_path),
-        row_count=len(processed_df),
-        column_count=len(processed_df.columns)
+        row_count=row_count,
+        column_count=column_count
     )
     
     db.add(new_dataset)
+    db.flush()  # Assigns new_dataset.id for the activity row
     
     # 6. Log Activity
     activity = SystemActivity(
@@ -64,8 +113,9 @@ def apply_feature_engineering(request: FeatureRequest, db: Session = Depends(get
         metadata_json={
             "operation": request.operation,
             "params": request.params,
-            "rows": len(processed_df),
-            "cols": len(processed_df.columns),
+            "rows": row_count,
+            "cols": column_count,
+            "chunked": bool(chunked),
             "output_dataset": new_ds_name
         }
     )
@@ -76,6 +126,84 @@ def apply_feature_engineering(request: FeatureRequest, db: Session = Depends(get
 
     return {"message": "Feature Engineering applied", "new_dataset_id": new_dataset.id}
 
+def _fitted_chain(db: Session, dataset: Dataset) -> List[Dataset]:
+    """Consecutive fitted FE steps ending at `dataset`, oldest first."""
+    chain = []
+    current = dataset
+    while current is not None and current.transform_artifact:
+        chain.append(current)
+        if current.parent_id is None:
+            break
+        current = db.query(Dataset).filter(Dataset.id == current.parent_id).first()
+    return list(reversed(chain))
+
+@router.post("/transform")
+def transform_with_fitted(request: TransformRequest, db: Session = Depends(get_db)):
+    """
+    Transform-only mode: replays the fitted state of every consecutive FE step that
+    produced `fitted_dataset_id` onto another dataset, without refitting anything.
+    """
+    target_ds = db.query(Dataset).filter(Dataset.id == request.dataset_id).first()
+    fitted_ds = db.query(Dataset).filter(Dataset.id == request.fitted_dataset_id).first()
+    if not target_ds or not fitted_ds:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+
+    chain = _fitted_chain(db, fitted_ds)
+    if not chain:
+        raise HTTPException(status_code=400, detail="Dataset has no fitted feature engineering state to replay")
+
+    try:
+        df = DatasetStore.read(target_ds.file_path)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Could not read source file")
+
+    operations = []
+    for step in chain:
+        if not os.path.exists(step.transform_artifact):
+            raise HTTPException(status_code=500, detail=f"Fitted state missing for dataset {step.id}")
+        state = FeatureEngine.load_state(step.transform_artifact)
+        df = FeatureEngine.transform(df, state)
+        operations.append(state["operation"])
+
+    new_filename = f"{uuid.uuid4()}.parquet"
+    new_path = os.path.join(settings.DATASET_DIR, new_filename)
+    DatasetStore.write(df, new_path)
+    DatasetProfiler.try_save(df, new_path)
+
+    new_ds_name = f"{target_ds.filename.split('.')[0]}_FE_replay"
+    new_dataset = Dataset(
+        filename=new_ds_name,
+        file_path=new_path,
+        source_type="feature_engineered",
+        parent_id=target_ds.id,
+        cleaning_operation=f"FE replay: {' -> '.join(operations)}",
+        size_bytes=os.path.getsize(new_path),
+        row_count=len(df),
+        column_count=len(df.columns)
+    )
+    db.add(new_dataset)
+    db.flush()  # Assigns new_dataset.id for the activity row
+
+    activity = SystemActivity(
+        dataset_id=new_dataset.id,
+        operation="feature_eng",
+        status="success",
+        message=f"Replayed {len(operations)} fitted step(s) from {fitted_ds.filename} on {target_ds.filename}",
+        metadata_json={
+            "operations": operations,
+            "fitted_dataset_id": fitted_ds.id,
+            "rows": len(df),
+            "cols": len(df.columns),
+            "output_dataset": new_ds_name
+        }
+    )
+    db.add(activity)
+
+    db.commit()
+    db.refresh(new_dataset)
+
+    return {"message": "Fitted transformations applied", "new_dataset_id": new_dataset.id, "operations": operations}
+
 @router.get("/recommend/{dataset_id}")
 def get_recommendations(dataset_id: int, db: Session = Depends(get_db)):
     """
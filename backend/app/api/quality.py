@@ -0,0 +1,137 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from pydantic import BaseModel
+from typing import Dict, Any, List, Optional
+from datetime import datetime
+
+from app.db.session import get_db
+from app.db.models import Dataset, DataQualityRule, SystemActivity
+from app.data.quality.engine import QualityEngine
+
+router = APIRouter()
+
+# --- Schemas ---
+class RuleCreate(BaseModel):
+    rule_type: str
+    column: Optional[str] = None
+    params: Dict[str, Any] = {}
+
+class RuleResponse(BaseModel):
+    id: int
+    dataset_id: int
+    rule_type: str
+    column: Optional[str]
+    params: Optional[Dict[str, Any]]
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class RuleResult(BaseModel):
+    rule_id: Optional[int]
+    rule_type: str
+    column: Optional[str]
+    params: Dict[str, Any]
+    violations: int
+    violation_rate: float
+    passed: bool
+    sample_rows: List[int]
+    source: str                 # "scan", "cache" or "parent"
+    error: Optional[str] = None
+
+class QualityReport(BaseModel):
+    dataset_id: int
+    passed: bool
+    results: List[RuleResult]
+
+# --- Helpers ---
+def _get_dataset(dataset_id: int, db: Session) -> Dataset:
+    dataset = db.query(Dataset).filter(Dataset.id == dataset_id).first()
+    if not dataset:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+    return dataset
+
+def _effective_rules(dataset: Dataset, db: Session) -> List[DataQualityRule]:
+    """Rules attached to the dataset and to every ancestor it was derived from."""
+    rules, seen, node = [], set(), dataset
+    while node is not None and node.id not in seen:
+        seen.add(node.id)
+        rules.extend(node.quality_rules)
+        node = db.query(Dataset).filter(Dataset.id == node.parent_id).first() if node.parent_id else None
+    return rules
+
+# --- Endpoints ---
+
+@router.get("/rules/{dataset_id}", response_model=List[RuleResponse])
+def list_rules(dataset_id: int, db: Session = Depends(get_db)):
+    """List rules that apply to a dataset (including those inherited from its ancestors)"""
+    return _effective_rules(_get_dataset(dataset_id, db), db)
+
+@router.post("/rules/{dataset_id}", response_model=RuleResponse)
+def add_rule(dataset_id: int, rule: RuleCreate, db: Session = Depends(get_db)):
+    dataset = _get_dataset(dataset_id, db)
+    try:
+        QualityEngine.validate_rule(rule.rule_type, rule.column, rule.params)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid rule: {str(e)}")
+
+    db_rule = DataQualityRule(
+        dataset_id=dataset.id,
+        rule_type=rule.rule_type,
+        column=rule.column,
+        params=rule.params
+    )
+    db.add(db_rule)
+    db.commit()
+    db.refresh(db_rule)
+    return db_rule
+
+@router.delete("/rules/{dataset_id}/{rule_id}")
+def delete_rule(dataset_id: int, rule_id: int, db: Session = Depends(get_db)):
+    rule = db.query(DataQualityRule).filter(
+        DataQualityRule.id == rule_id, DataQualityRule.dataset_id == dataset_id
+    ).first()
+    if not rule:
+        raise HTTPException(status_code=404, detail="Rule not found")
+    db.delete(rule)
+    db.commit()
+    return {"message": "Rule deleted successfully"}
+
+@router.post("/check/{dataset_id}", response_model=QualityReport)
+def check_dataset(dataset_id: int, db: Session = Depends(get_db)):
+    """
+    Evaluate all applicable rules in one fused scan.
+    Results are cached per dataset version; derived datasets reuse their parent's
+    results for rules whose columns did not change.
+    """
+    dataset = _get_dataset(dataset_id, db)
+    rules = [
+        {"id": r.id, "rule_type": r.rule_type, "column": r.column, "params": r.params or {}}
+        for r in _effective_rules(dataset, db)
+    ]
+
+    try:
+        parent = db.query(Dataset).filter(Dataset.id == dataset.parent_id).first() if dataset.parent_id else None
+        parent_path = parent.file_path if parent else None
+        results = QualityEngine.check(rules, dataset.file_path, parent_path)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Quality check failed: {str(e)}")
+
+    passed = all(r["passed"] for r in results)
+    scanned = sum(1 for r in results if r["source"] == "scan")
+    if scanned:
+        activity = SystemActivity(
+            dataset_id=dataset.id,
+            operation="quality_check",
+            status="success" if passed else "error",
+            message=f"Checked {len(results)} quality rules on {dataset.filename}",
+            metadata_json={
+                "rules": len(results),
+                "failed": sum(1 for r in results if not r["passed"]),
+                "scanned": scanned
+            }
+        )
+        db.add(activity)
+        db.commit()
+
+    return {"dataset_id": dataset.id, "passed": passed, "results": results}
@@ -5,10 +5,19 @@ from sqlalchemy.orm import Session
 from app.db.session import get_db, engine
 from app.db.base import Base
 from app.core.config import settings
+from app.core.resources import ResourceGovernor
 from sqlalchemy import text
 
 router = APIRouter()
 
+@router.get("/resources")
+def get_resources():
+    """
+    Current CPU allocation: the serving reserve, the training pool, the share each
+    running training job holds, and the native thread pools of the API process.
+    """
+    return ResourceGovernor.snapshot()
+
 @router.delete("/purge")
 def purge_system(db: Session = Depends(get_db)):
     """
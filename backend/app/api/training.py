@@ -1,14 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, Header, Request
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import Dict, Any, List, Optional
 from datetime import datetime
+import asyncio
+import json
 import os
+import time
 
-from app.db.session import get_db
-from app.db.models import TrainingRun, Dataset
-from app.training.trainer import TrainingEngine
+from app.core.config import settings
+from app.db.session import get_db, SessionLocal
+from app.db.models import TrainingRun, TrainingLog, Dataset
+from app.training.executor import TrainingExecutor
 
 router = APIRouter()
 
@@ -17,20 +22,47 @@ class TrainingConfig(BaseModel):
     dataset_id: int
     target_column: str
     feature_columns: Optional[List[str]] = None
+    feature_selection: Optional[Dict[str, Any]] = None  # {"methods": [...], "max_features": 50, "time_budget": 30}
     model_key: str
     parameters: Dict[str, Any] = {}
+    tuning: Optional[Dict[str, Any]] = None  # {"strategy": "random" | "grid" | "halving", "n_trials": 20, "time_budget": 300}
+    evaluation: Optional[Dict[str, Any]] = None  # {"strategy": "kfold" | "stratified" | "group" | "timeseries", "n_splits": 5, "refit": true}
+    budget: Optional[Dict[str, Any]] = None  # {"time_limit": seconds, "early_stopping": true, "patience": 10, "validation_fraction": 0.1}
+    streaming: Optional[Dict[str, Any]] = None  # {"epochs": 5, "batch_rows": 10000, "shuffle_buffer_rows": 100000, "external_memory": null}; omitted = by file size
+    priority: int = 0                       # Higher-priority runs leave the queue first
+    timeout_seconds: Optional[int] = None   # Defaults to settings.TRAINING_DEFAULT_TIMEOUT
+
+class TrainingLogEntry(BaseModel):
+    id: int
+    created_at: datetime
+    stage: Optional[str]
+    progress: Optional[int]
+    message: str
+
+    class Config:
+        from_attributes = True
 
 class TrainingRunResponse(BaseModel):
     id: int
     model_name: str
     target_column: Optional[str]
     feature_columns: Optional[List[str]]
+    feature_selection: Optional[Dict[str, Any]] = None
+    selected_features: Optional[List[str]] = None
+    tuning: Optional[Dict[str, Any]] = None
+    evaluation: Optional[Dict[str, Any]] = None
+    budget: Optional[Dict[str, Any]] = None
+    streaming: Optional[Dict[str, Any]] = None
     status: str
+    priority: Optional[int] = 0
+    attempts: Optional[int] = 0
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
     progress: int
     stage: Optional[str]
     metrics: Optional[Dict[str, Any]]
     detailed_report: Optional[Dict[str, Any]]
-    logs: List[str] = []
+    logs: List[str] = []  # Only filled by GET /runs/{id}; use /logs or /stream to follow a run
     created_at: datetime
     error_message: Optional[str]
 
@@ -42,7 +74,6 @@ class TrainingRunResponse(BaseModel):
 @router.post("/start", response_model=TrainingRunResponse)
 def start_training(
     config: TrainingConfig, 
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
 ):
     # 1. Validate Dataset
@@ -56,7 +87,14 @@ def start_training(
         model_name=config.model_key,
         target_column=config.target_column,
         feature_columns=config.feature_columns,
+        feature_selection=config.feature_selection,
         parameters=config.parameters,
+        tuning=config.tuning,
+        evaluation=config.evaluation,
+        budget=config.budget,
+        streaming=config.streaming,
+        priority=config.priority,
+        timeout_seconds=config.timeout_seconds,
         status="pending",
         progress=0,
         stage="queued"
@@ -65,8 +103,8 @@ def start_training(
     db.commit()
     db.refresh(new_run)
 
-    # 3. Launch Background Task
-    background_tasks.add_task(TrainingEngine.run_training_job, new_run.id, db)
+    # 3. Queue: the executor runs it in a worker process with its own session
+    TrainingExecutor.notify()
 
     return new_run
 
@@ -79,6 +117,102 @@ def get_run(run_id: int, db: Session = Depends(get_db)):
     run = db.query(TrainingRun).filter(TrainingRun.id == run_id).first()
     if not run:
         raise HTTPException(status_code=404, detail="Run not found")
+    response = TrainingRunResponse.model_validate(run)
+    lines = db.query(TrainingLog.message).filter(TrainingLog.run_id == run_id).order_by(TrainingLog.id).all()
+    # Runs from before the log table kept their lines in the row itself
+    response.logs = list(run.logs or []) + [line for (line,) in lines]
+    return response
+
+@router.get("/runs/{run_id}/logs", response_model=List[TrainingLogEntry])
+def get_run_logs(run_id: int, after: int = 0, limit: int = 1000, db: Session = Depends(get_db)):
+    """Log lines with id > `after`, oldest first. Pass the last id seen to page forward."""
+    if not db.query(TrainingRun.id).filter(TrainingRun.id == run_id).first():
+        raise HTTPException(status_code=404, detail="Run not found")
+    return db.query(TrainingLog).filter(TrainingLog.run_id == run_id, TrainingLog.id > after).order_by(
+        TrainingLog.id
+    ).limit(min(limit, 10000)).all()
+
+def _sse(event: str, data: Dict[str, Any], event_id: Optional[int] = None) -> str:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+def _run_exists(run_id: int) -> bool:
+    with SessionLocal() as db:
+        return db.query(TrainingRun.id).filter(TrainingRun.id == run_id).first() is not None
+
+def _poll_run(run_id: int, cursor: int) -> tuple:
+    """(status state or None if the run is gone, [(log id, message)] after `cursor`)."""
+    with SessionLocal() as db:
+        run = db.query(TrainingRun).filter(TrainingRun.id == run_id).first()
+        if run is None:
+            return None, []
+        state = {"status": run.status, "stage": run.stage, "progress": run.progress, "error_message": run.error_message}
+        lines = db.query(TrainingLog).filter(TrainingLog.run_id == run_id, TrainingLog.id > cursor).order_by(
+            TrainingLog.id
+        ).limit(500).all()
+        return state, [(line.id, line.message) for line in lines]
+
+@router.get("/runs/{run_id}/stream")
+async def stream_run(run_id: int, request: Request, after: int = 0, last_event_id: Optional[str] = Header(None)):
+    """
+    Server-sent events for one run: `log` (one per line, id = log id), `status`
+    (status/stage/progress changes) and a final `end` once the run is finished.
+    Workers write from other processes, so the stream tails training_logs by id;
+    a reconnecting EventSource resumes from its Last-Event-ID.
+    """
+    if not await run_in_threadpool(_run_exists, run_id):
+        raise HTTPException(status_code=404, detail="Run not found")
+    cursor = int(last_event_id) if last_event_id and last_event_id.isdigit() else after
+
+    async def events():
+        nonlocal cursor
+        last_state = None
+        last_sent = time.monotonic()
+        while not await request.is_disconnected():
+            # SQLite reads are blocking: run them off the event loop
+            state, batch = await run_in_threadpool(_poll_run, run_id, cursor)
+            if state is None:
+                yield _sse("end", {"status": "deleted"})
+                return
+
+            for line_id, message in batch:
+                yield _sse("log", {"message": message}, line_id)
+                cursor = line_id
+            if state != last_state:
+                yield _sse("status", state)
+                last_state = state
+                last_sent = time.monotonic()
+            elif batch:
+                last_sent = time.monotonic()
+            elif time.monotonic() - last_sent > 15:
+                yield ": keep-alive\n\n"  # Comment line: keeps proxies from closing an idle stream
+                last_sent = time.monotonic()
+            if state["status"] not in ("pending", "running") and len(batch) < 500:
+                yield _sse("end", state)
+                return
+            await asyncio.sleep(settings.TRAINING_STREAM_POLL_SECONDS)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    })
+
+@router.post("/runs/{run_id}/cancel", response_model=TrainingRunResponse)
+def cancel_run(run_id: int, db: Session = Depends(get_db)):
+    run = db.query(TrainingRun).filter(TrainingRun.id == run_id).first()
+    if not run:
+        raise HTTPException(status_code=404, detail="Run not found")
+    if run.status not in ("pending", "running"):
+        raise HTTPException(status_code=400, detail=f"Run is already {run.status}")
+
+    run.cancel_requested_at = datetime.utcnow()
+    # Still queued: cancel outright (the claim only succeeds on `pending` rows)
+    db.query(TrainingRun).filter(TrainingRun.id == run_id, TrainingRun.status == "pending").update(
+        {"status": "cancelled", "stage": "cancelled", "finished_at": datetime.utcnow()}, synchronize_session=False
+    )
+    db.commit()
+    db.refresh(run)
+    TrainingExecutor.notify()
     return run
 
 @router.delete("/runs/{run_id}")
@@ -91,7 +225,8 @@ def delete_run(run_id: int, db: Session = Depends(get_db)):
     if run.artifact_path and os.path.exists(run.artifact_path):
         os.remove(run.artifact_path)
     
-    # 2. Delete DB record
+    # 2. Delete DB records
+    db.query(TrainingLog).filter(TrainingLog.run_id == run_id).delete(synchronize_session=False)
     db.delete(run)
     db.commit()
     return {"message": "Run and artifact purged successfully"}
@@ -13,7 +13,55 @@ class Settings(BaseSettings):
     DATASET_DIR: str = os.path.join(STORAGE_DIR, "datasets")
     MODEL_DIR: str = os.path.join(STORAGE_DIR, "models")
     ARTIFACT_DIR: str = os.path.join(STORAGE_DIR, "artifacts")
+    CACHE_DIR: str = os.path.join(STORAGE_DIR, "cache")
     
+    # Analysis
+    ANALYSIS_N_JOBS: int = 4  # Worker pool size for column-block scoring
+
+    # Cleaning
+    CLEANING_CHUNK_ROWS: int = 50000                  # Rows per batch when applying fitted imputers
+    IMPUTE_INDEX_ROWS: int = 50000                    # Complete rows kept as KNN imputation donors
+    IMPUTE_FIT_ROWS: int = 50000                      # Rows iterative imputation is fit on
+
+    # Feature Engineering guards (refuse runaway expansions before executing)
+    FE_MAX_OUTPUT_COLUMNS: int = 50000
+    FE_MAX_OUTPUT_BYTES: int = 2 * 1024 ** 3
+    FE_CHUNK_ROWS: int = 100000                       # Rows per batch in chunked (out-of-core) mode
+    FE_STREAMING_MIN_BYTES: int = 512 * 1024 ** 2     # Source files above this size use chunked mode automatically
+    FE_PARTITION_BYTES: int = 128 * 1024 ** 2         # On-disk size per entity partition in chunked mode
+    FE_PCA_INCREMENTAL_BYTES: int = 1024 ** 3         # Dense PCA inputs above this switch to IncrementalPCA
+    FE_EMBED_LANDMARKS: int = 5000                    # Rows t-SNE / Isomap / UMAP are fit on
+
+    # Compute resources
+    CPU_CORES: int = 0                                # Cores the resource governor hands out (0 = all usable cores)
+    SERVING_CPU_CORES: int = 1                        # Reserved for prediction traffic; training shares the rest
+    CPU_PIN_AFFINITY: bool = False                    # Pin each training worker to its assigned cores (Linux)
+
+    # Training
+    TRAINING_N_JOBS: int = 4                          # Workers for parallel training-side stages (feature selection)
+    TRAINING_SELECTION_SAMPLE_ROWS: int = 20000       # Rows scored by feature selection
+    TRAINING_TUNING_TRIALS: int = 20                  # Default candidates per hyperparameter search
+    TRAINING_TUNING_TIME_BUDGET: int = 600            # Default wall-clock seconds per hyperparameter search
+    TRAINING_EARLY_STOPPING: bool = True              # Iterative models stop when a held-out slice stops improving
+    TRAINING_EARLY_STOPPING_PATIENCE: int = 10        # Rounds without improvement before stopping
+    TRAINING_VALIDATION_FRACTION: float = 0.1         # Training rows held out for early stopping
+    TRAINING_STREAMING_MIN_BYTES: int = 1024 ** 3     # Files above this size train out-of-core when the model supports it
+    TRAINING_STREAMING_EPOCHS: int = 5                # Passes over the file in streaming training
+    TRAINING_STREAMING_BATCH_ROWS: int = 10000        # Rows per partial_fit call
+    TRAINING_STREAMING_BUFFER_ROWS: int = 100000      # Shuffle buffer: rows mixed before they are fed
+    TRAINING_STREAMING_SAMPLE_ROWS: int = 100000      # Row sample the preprocessing is fitted on
+    TRAINING_STREAMING_MAX_HOLDOUT_ROWS: int = 200000 # Cap on held-out rows scored after streaming training
+    TRAINING_EXTERNAL_MEMORY_BYTES: int = 4 * 1024 ** 3  # Streamed XGBoost above this file size pages its quantized matrix to CACHE_DIR
+    TRAINING_MAX_CONCURRENCY: int = 2                 # Runs executing at once (each in its own worker process)
+    TRAINING_DEFAULT_TIMEOUT: int = 6 * 3600          # Seconds before a run is killed (0 = no limit)
+    TRAINING_CANCEL_GRACE_SECONDS: int = 30           # Wait for a cooperative stop before killing the worker
+    TRAINING_HEARTBEAT_SECONDS: int = 5
+    TRAINING_MAX_ATTEMPTS: int = 2                    # Re-queues after a worker crash before giving up
+    TRAINING_POLL_SECONDS: float = 1.0
+    TRAINING_LOG_FLUSH_LINES: int = 50                # Buffered log lines written per batch
+    TRAINING_LOG_FLUSH_SECONDS: float = 1.0           # Max age of a buffered line before it is written
+    TRAINING_STREAM_POLL_SECONDS: float = 0.5         # How often a log stream tails training_logs
+
     # Database
     DATABASE_URL: str = "sqlite:///./app/db/ds-forge.sqlite"
 
@@ -25,4 +73,5 @@ settings = Settings()
 # Ensure directories exist (Critical for Windows permissions)
 os.makedirs(settings.DATASET_DIR, exist_ok=True)
 os.makedirs(settings.MODEL_DIR, exist_ok=True)
-os.makedirs(settings.ARTIFACT_DIR, exist_ok=True)
\ No newline at end of file
+os.makedirs(settings.ARTIFACT_DIR, exist_ok=True)
+os.makedirs(settings.CACHE_DIR, exist_ok=True)
\ No newline at end of file
@@ -0,0 +1,139 @@
+import os
+import threading
+from typing import Dict, List, Optional
+
+from threadpoolctl import threadpool_info, threadpool_limits
+
+from app.core.config import settings
+
+
+def _usable_cores() -> List[int]:
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+class ResourceGovernor:
+    """
+    CPU budgets for training workers and prediction traffic.
+    The machine's cores (CPU_CORES of them, default all) are split into a serving
+    reserve (SERVING_CPU_CORES, used by predictions in the API process) and a
+    training pool shared by TRAINING_MAX_CONCURRENCY runs. Every run gets the same
+    fixed share, whatever else is running, so adding concurrent runs divides the
+    pool predictably instead of oversubscribing it. A worker applies its share to
+    the native thread pools (OpenMP / BLAS, via environment and threadpoolctl),
+    to estimator `n_jobs` and to its own parallel stages; with CPU_PIN_AFFINITY it
+    is also pinned to the cores it was assigned.
+    """
+
+    THREAD_ENV = (
+        "OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS",
+        "BLIS_NUM_THREADS", "VECLIB_MAXIMUM_THREADS", "NUMEXPR_NUM_THREADS",
+    )
+
+    _lock = threading.Lock()
+    _jobs: Dict[int, dict] = {}  # run_id -> allocation (dispatcher side)
+    _threads: Optional[int] = None  # Budget of this process once a worker applied its allocation
+    _cores = _usable_cores()  # Captured at import, before any pinning
+
+    @staticmethod
+    def cores() -> List[int]:
+        limit = settings.CPU_CORES or len(ResourceGovernor._cores)
+        return ResourceGovernor._cores[:max(1, limit)]
+
+    @staticmethod
+    def serving_cores() -> List[int]:
+        cores = ResourceGovernor.cores()
+        return cores[:max(1, min(settings.SERVING_CPU_CORES, len(cores)))]
+
+    @staticmethod
+    def training_pool() -> List[int]:
+        cores = ResourceGovernor.cores()
+        pool = cores[len(ResourceGovernor.serving_cores()):]
+        return pool or cores  # Too few cores for a reserve: training shares them with serving
+
+    @staticmethod
+    def threads_per_job() -> int:
+        return max(1, len(ResourceGovernor.training_pool()) // max(1, settings.TRAINING_MAX_CONCURRENCY))
+
+    @staticmethod
+    def allocate(run_id: int) -> dict:
+        """Assigns a run its share of the training pool: the least-used cores, lowest first."""
+        with ResourceGovernor._lock:
+            load = {core: 0 for core in ResourceGovernor.training_pool()}
+            for job in ResourceGovernor._jobs.values():
+                for core in job["cores"]:
+                    if core in load:
+                        load[core] += 1
+            threads = ResourceGovernor.threads_per_job()
+            cores = sorted(sorted(load, key=lambda core: (load[core], core))[:threads])
+            allocation = {"run_id": run_id, "threads": threads, "cores": cores, "pinned": settings.CPU_PIN_AFFINITY}
+            ResourceGovernor._jobs[run_id] = allocation
+            return allocation
+
+    @staticmethod
+    def release(run_id: int):
+        with ResourceGovernor._lock:
+            ResourceGovernor._jobs.pop(run_id, None)
+
+    @staticmethod
+    def apply(threads: int, cores: Optional[List[int]] = None):
+        """
+        Limits the calling process to `threads`. Environment variables cover libraries
+        loaded later (and child processes); threadpoolctl the ones already loaded.
+        """
+        ResourceGovernor._threads = max(1, int(threads))
+        for name in ResourceGovernor.THREAD_ENV:
+            os.environ[name] = str(ResourceGovernor._threads)
+        if cores and hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, cores)
+        threadpool_limits(limits=ResourceGovernor._threads)
+
+    @staticmethod
+    def threads() -> int:
+        """Thread budget of this process: the applied allocation, else every usable core."""
+        return ResourceGovernor._threads or len(_usable_cores())
+
+    @staticmethod
+    def thread_params(model_class, threads: int) -> dict:
+        """Estimator parameters that bound its own parallelism (`n_jobs`; XGBoost maps it to nthread)."""
+        try:
+            names = model_class().get_params()
+        except Exception:
+            return {}
+        return {"n_jobs": int(threads)} if "n_jobs" in names else {}
+
+    @staticmethod
+    def limit_estimator(estimator, threads: int):
+        """Caps a fitted estimator (or the last step of a pipeline) for prediction."""
+        estimator = estimator.steps[-1][1] if hasattr(estimator, "steps") else estimator
+        if "n_jobs" in getattr(estimator, "get_params", dict)():
+            estimator.set_params(n_jobs=int(threads))
+        return estimator
+
+    @staticmethod
+    def serving_limits():
+        """Context manager limiting native thread pools to the serving reserve during a prediction."""
+        return threadpool_limits(limits=len(ResourceGovernor.serving_cores()))
+
+    @staticmethod
+    def snapshot() -> dict:
+        with ResourceGovernor._lock:
+            jobs = [dict(job) for job in ResourceGovernor._jobs.values()]
+        busy = {core for job in jobs for core in job["cores"]}
+        return {
+            "cores": ResourceGovernor.cores(),
+            "pin_affinity": settings.CPU_PIN_AFFINITY,
+            "serving": {"cores": ResourceGovernor.serving_cores(), "threads": len(ResourceGovernor.serving_cores())},
+            "training": {
+                "pool": ResourceGovernor.training_pool(),
+                "max_concurrency": settings.TRAINING_MAX_CONCURRENCY,
+                "threads_per_job": ResourceGovernor.threads_per_job(),
+                "jobs": sorted(jobs, key=lambda job: job["run_id"]),
+                "idle_cores": [core for core in ResourceGovernor.training_pool() if core not in busy],
+            },
+            "api_thread_pools": [
+                {"library": pool.get("internal_api"), "prefix": pool.get("prefix"), "threads": pool.get("num_threads")}
+                for pool in threadpool_info()
+            ],
+        }
@@ -0,0 +1,665 @@
+import pandas as pd
+import numpy as np
+from typing import List, Dict, Tuple, Optional
+from joblib import Parallel, delayed
+from scipy import sparse, stats
+from sklearn.feature_selection import mutual_info_classif, mutual_info_regression
+
+from app.data.analysis.sketches import approx_distinct_counts
+
+
+class AnalysisEngine:
+    # Columns are encoded and correlated in blocks to keep peak memory at rows x BLOCK floats
+    BLOCK_COLUMNS = 256
+
+    RELEVANCE_METRICS = ["mutual_info", "anova_f", "chi2", "cramers_v"]
+
+    # Integer columns with at most this many distinct values are treated as discrete
+    DISCRETE_MAX_LEVELS = 20
+    # Continuous columns are quantile-binned into this many bins for contingency tables
+    CONTINGENCY_BINS = 10
+
+    @staticmethod
+    def encode_column(series: pd.Series) -> np.ndarray:
+        """
+        Encodes a single column as float64.
+        Numeric columns keep NaN for missing values; non-numeric columns become sorted
+        category codes with -1 for missing, matching astype('category').cat.codes.
+        """
+        if pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series):
+            return series.to_numpy(dtype=np.float64, na_value=np.nan)
+
+        try:
+            codes, _ = pd.factorize(series, sort=True)
+        except TypeError:
+            # Mixed, non-orderable types: order by their string form instead
+            codes, _ = pd.factorize(series.astype(str).where(series.notna()), sort=True)
+        return codes.astype(np.float64)
+
+    @staticmethod
+    def encode_block(df: pd.DataFrame, cols: List[str]) -> Tuple[np.ndarray, List[str]]:
+        """
+        Encodes a block of columns into one (rows x cols) float64 matrix.
+        Returns the matrix and the subset of columns that failed to encode.
+        """
+        matrix = np.full((len(df), len(cols)), np.nan, dtype=np.float64)
+        failed = []
+        for j, col in enumerate(cols):
+            try:
+                matrix[:, j] = AnalysisEngine.encode_column(df[col])
+            except Exception:
+                failed.append(col)
+        return matrix, failed
+
+    @staticmethod
+    def correlate_with_target(X: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """
+        Pearson correlation of every column of X with y in one matrix operation.
+        Uses pairwise-complete observations per column (same semantics as Series.corr).
+        """
+        valid = ~np.isnan(X) & ~np.isnan(y)[:, None]
+        count = valid.sum(axis=0).astype(np.float64)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            x0 = np.where(valid, X, 0.0)
+            y0 = np.where(valid, y[:, None], 0.0)
+            mean_x = x0.sum(axis=0) / count
+            mean_y = y0.sum(axis=0) / count
+
+            dx = np.where(valid, X - mean_x, 0.0)
+            dy = np.where(valid, y[:, None] - mean_y, 0.0)
+
+            cov = np.einsum("ij,ij->j", dx, dy)
+            var_x = np.einsum("ij,ij->j", dx, dx)
+            var_y = np.einsum("ij,ij->j", dy, dy)
+            corr = cov / np.sqrt(var_x * var_y)
+
+        corr[count < 2] = np.nan
+        return corr
+
+    @staticmethod
+    def feature_relevance(df: pd.DataFrame, target_column: str, distinct_counts: Dict[str, int] = None) -> List[dict]:
+        """
+        Scores every feature column by |Pearson correlation| with the target.
+        Cardinality checks use (approximate) distinct counts instead of per-column nunique().
+        """
+        if distinct_counts is None:
+            distinct_counts = approx_distinct_counts(df)
+
+        y = AnalysisEngine.encode_column(df[target_column])
+        n_rows = len(df)
+
+        results = []
+        candidates = []
+        for col in df.columns:
+            if col == target_column:
+                continue
+            # Skip if column is extremely high cardinality (like IDs)
+            if distinct_counts.get(col, 0) > n_rows * 0.95:
+                results.append({
+                    "feature": col,
+                    "score": 0.0,
+                    "relevance": "Low",
+                    "reason": "High cardinality (likely ID)"
+                })
+            else:
+                candidates.append(col)
+
+        block = AnalysisEngine.BLOCK_COLUMNS
+        for start in range(0, len(candidates), block):
+            cols = candidates[start:start + block]
+            X, failed = AnalysisEngine.encode_block(df, cols)
+            scores = np.nan_to_num(np.abs(AnalysisEngine.correlate_with_target(X, y)), nan=0.0)
+
+            for col, corr in zip(cols, scores):
+                if col in failed:
+                    results.append({
+                        "feature": col,
+                        "score": 0.0,
+                        "relevance": "Unknown",
+                        "reason": "Analysis failed (incompatible types)"
+                    })
+                    continue
+
+                # Determine Verdict
+                if corr > 0.5:
+                    relevance = "High"
+                    reason = "Strong statistical relationship"
+                elif corr > 0.1:
+                    relevance = "Medium"
+                    reason = "Moderate correlation"
+                else:
+                    relevance = "Low"
+                    reason = "Weak or non-linear relationship"
+
+                results.append({
+                    "feature": col,
+                    "score": float(corr),
+                    "relevance": relevance,
+                    "reason": reason
+                })
+
+        # Sort by score descending
+        results.sort(key=lambda x: x['score'], reverse=True)
+        return results
+
+    # ------------------------------------------------------------------
+    #   Multi-metric relevance (MI / ANOVA F / Chi-squared / Cramer's V)
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def is_discrete(series: pd.Series, distinct_count: int) -> bool:
+        if not pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+            return True
+        return pd.api.types.is_integer_dtype(series) and distinct_count <= AnalysisEngine.DISCRETE_MAX_LEVELS
+
+    @staticmethod
+    def _impute_median(X: np.ndarray) -> np.ndarray:
+        if not np.isnan(X).any():
+            return X
+        with np.errstate(all="ignore"):
+            medians = np.nan_to_num(np.nanmedian(X, axis=0), nan=0.0)
+        return np.where(np.isnan(X), medians, X)
+
+    @staticmethod
+    def _to_levels(values: np.ndarray, discrete: bool) -> Tuple[np.ndarray, int]:
+        """Maps a column to dense integer levels 0..k-1 (quantile bins for continuous data, NaN as its own level)."""
+        if not discrete:
+            finite = values[~np.isnan(values)]
+            if len(finite) == 0:
+                return np.zeros(len(values), dtype=np.int64), 1
+            edges = np.unique(np.quantile(finite, np.linspace(0, 1, AnalysisEngine.CONTINGENCY_BINS + 1)[1:-1]))
+            values = np.where(np.isnan(values), np.inf, np.searchsorted(edges, values, side="right"))
+        else:
+            values = np.where(np.isnan(values), np.inf, values)
+        _, levels = np.unique(values, return_inverse=True)
+        return levels.astype(np.int64), int(levels.max()) + 1 if len(levels) else 1
+
+    @staticmethod
+    def _chi2_block(X: np.ndarray, discrete_mask: np.ndarray, y_levels: np.ndarray, k_y: int, cramers: bool) -> List[Tuple[float, Optional[float]]]:
+        n = len(y_levels)
+        out = []
+        for j in range(X.shape[1]):
+            x_levels, k_x = AnalysisEngine._to_levels(X[:, j], bool(discrete_mask[j]))
+            table = np.bincount(x_levels * k_y + y_levels, minlength=k_x * k_y).reshape(k_x, k_y).astype(np.float64)
+            table = table[table.sum(axis=1) > 0][:, table.sum(axis=0) > 0]
+            r, c = table.shape
+            if r < 2 or c < 2:
+                out.append((0.0, 1.0))
+                continue
+
+            expected = np.outer(table.sum(axis=1), table.sum(axis=0)) / n
+            chi2 = float(((table - expected) ** 2 / expected).sum())
+            p_value = float(stats.chi2.sf(chi2, (r - 1) * (c - 1)))
+            if cramers:
+                # Bias-corrected Cramer's V (Bergsma, 2013); the raw statistic is inflated on small samples
+                phi2 = max(0.0, chi2 / n - (r - 1) * (c - 1) / (n - 1))
+                r_corr = r - (r - 1) ** 2 / (n - 1)
+                c_corr = c - (c - 1) ** 2 / (n - 1)
+                denom = min(r_corr - 1, c_corr - 1)
+                out.append((float(np.sqrt(phi2 / denom)) if denom > 0 else 0.0, p_value))
+            else:
+                out.append((chi2, p_value))
+        return out
+
+    @staticmethod
+    def _anova_block(X: np.ndarray, discrete_mask: np.ndarray, y: np.ndarray, y_discrete: bool) -> List[Tuple[float, Optional[float]]]:
+        n = len(y)
+        X = AnalysisEngine._impute_median(X)
+
+        def one_way(groups: np.ndarray, values: np.ndarray) -> Tuple[np.ndarray, int]:
+            """Vectorized one-way ANOVA F of every column of `values` grouped by `groups`."""
+            _, groups = np.unique(groups, return_inverse=True)
+            k = int(groups.max()) + 1
+            membership = sparse.csr_matrix((np.ones(n), (groups, np.arange(n))), shape=(k, n))
+            counts = np.asarray(membership.sum(axis=1)).ravel()[:, None]
+            sums = membership @ values
+            total = values.sum(axis=0)
+            ss_between = (sums ** 2 / counts).sum(axis=0) - total ** 2 / n
+            ss_within = (values ** 2).sum(axis=0) - (sums ** 2 / counts).sum(axis=0)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                f = (ss_between / max(k - 1, 1)) / (ss_within / max(n - k, 1))
+            f = np.where(k < 2, 0.0, f)
+            return f, k
+
+        scores = np.zeros(X.shape[1])
+        p_values = np.ones(X.shape[1])
+
+        if y_discrete:
+            # Classes as groups, all feature columns at once
+            f, k = one_way(y, X)
+            scores[:] = f
+            p_values[:] = stats.f.sf(f, max(k - 1, 1), max(n - k, 1))
+        else:
+            # Continuous target: F-test of the linear fit for numeric features...
+            numeric = ~discrete_mask
+            if numeric.any():
+                r = AnalysisEngine.correlate_with_target(X[:, numeric], y)
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    f = r ** 2 / (1 - r ** 2) * (n - 2)
+                scores[numeric] = f
+                p_values[numeric] = stats.f.sf(f, 1, n - 2)
+            # ...and a one-way ANOVA of the target across each categorical feature's levels
+            for j in np.flatnonzero(discrete_mask):
+                f, k = one_way(X[:, j], y[:, None])
+                scores[j] = f[0]
+                p_values[j] = stats.f.sf(f[0], max(k - 1, 1), max(n - k, 1))
+
+        scores = np.nan_to_num(scores, nan=0.0, posinf=np.finfo(np.float64).max)
+        p_values = np.nan_to_num(p_values, nan=1.0)
+        return [(float(s), float(p)) for s, p in zip(scores, p_values)]
+
+    @staticmethod
+    def _mutual_info_block(X: np.ndarray, discrete_mask: np.ndarray, y: np.ndarray, y_discrete: bool, random_state: int) -> List[Tuple[float, Optional[float]]]:
+        X = AnalysisEngine._impute_median(X)
+        if y_discrete:
+            mi = mutual_info_classif(X, y, discrete_features=discrete_mask, random_state=random_state)
+        else:
+            mi = mutual_info_regression(X, y, discrete_features=discrete_mask, random_state=random_state)
+        return [(float(v), None) for v in mi]
+
+    @staticmethod
+    def score_block(metric: str, X: np.ndarray, discrete_mask: np.ndarray, y: np.ndarray, y_discrete: bool, random_state: int = 42):
+        """Scores one block of encoded columns against the target. Runs inside a worker."""
+        if metric == "mutual_info":
+            return AnalysisEngine._mutual_info_block(X, discrete_mask, y, y_discrete, random_state)
+        if metric == "anova_f":
+            return AnalysisEngine._anova_block(X, discrete_mask, y, y_discrete)
+        if metric in ("chi2", "cramers_v"):
+            y_levels, k_y = AnalysisEngine._to_levels(y, y_discrete)
+            return AnalysisEngine._chi2_block(X, discrete_mask, y_levels, k_y, cramers=(metric == "cramers_v"))
+        raise ValueError(f"Unknown metric: {metric}")
+
+    @staticmethod
+    def _verdict(metric: str, score: float, p_value: Optional[float], max_score: float) -> Tuple[str, str]:
+        if metric == "cramers_v":
+            if score > 0.3:
+                return "High", "Strong association"
+            if score > 0.1:
+                return "Medium", "Moderate association"
+            return "Low", "Weak association"
+        if metric == "mutual_info":
+            # Relative to the strongest feature, with an absolute floor (nats) against noise
+            share = score / max_score if max_score > 0 else 0.0
+            if score > 0.01 and share > 0.5:
+                return "High", "High shared information with target"
+            if score > 0.01 and share > 0.1:
+                return "Medium", "Some shared information with target"
+            return "Low", "Little or no shared information"
+        # anova_f / chi2: judge by significance
+        if p_value is not None and p_value < 0.001:
+            return "High", "Highly significant dependence"
+        if p_value is not None and p_value < 0.05:
+            return "Medium", "Significant dependence"
+        return "Low", "No significant dependence"
+
+    @staticmethod
+    def metric_relevance(
+        df: pd.DataFrame,
+        target_column: str,
+        metric: str,
+        distinct_counts: Dict[str, int] = None,
+        n_jobs: int = 1,
+        sample_size: Optional[int] = None,
+        random_state: int = 42,
+    ) -> List[dict]:
+        """
+        Scores every feature column against the target with the given metric.
+        Columns are encoded once in blocks and the blocks are scored in parallel.
+        """
+        if metric not in AnalysisEngine.RELEVANCE_METRICS:
+            raise ValueError(f"Unknown metric: {metric}. Available: {AnalysisEngine.RELEVANCE_METRICS}")
+        if distinct_counts is None:
+            distinct_counts = approx_distinct_counts(df)
+
+        df = df[df[target_column].notna()]
+        if sample_size and len(df) > sample_size:
+            df = df.sample(n=sample_size, random_state=random_state)
+
+        target = df[target_column]
+        y_discrete = AnalysisEngine.is_discrete(target, distinct_counts.get(target_column, 0))
+        y = AnalysisEngine.encode_column(target)
+
+        results = []
+        candidates = []
+        for col in df.columns:
+            if col == target_column:
+                continue
+            # IDs carry no transferable signal (and inflate MI / chi-squared)
+            if distinct_counts.get(col, 0) > len(df) * 0.95 and not pd.api.types.is_float_dtype(df[col]):
+                results.append({
+                    "feature": col,
+                    "metric": metric,
+                    "score": 0.0,
+                    "p_value": None,
+                    "relevance": "Low",
+                    "reason": "High cardinality (likely ID)"
+                })
+            else:
+                candidates.append(col)
+
+        block = AnalysisEngine.BLOCK_COLUMNS
+        n_blocks = -(-len(candidates) // block)
+        block_meta = []
+
+        def blocks():
+            # Lazily encoded so that only ~2 x n_jobs blocks are materialized at once
+            for start in range(0, len(candidates), block):
+                cols = candidates[start:start + block]
+                X, failed = AnalysisEngine.encode_block(df, cols)
+                mask = np.array([AnalysisEngine.is_discrete(df[c], distinct_counts.get(c, 0)) for c in cols], dtype=bool)
+                block_meta.append((cols, failed))
+                yield X, mask
+
+        n_workers = max(1, min(n_jobs, n_blocks))
+        scored = Parallel(n_jobs=n_workers)(
+            delayed(AnalysisEngine.score_block)(metric, X, mask, y, y_discrete, random_state)
+            for X, mask in blocks()
+        )
+
+        raw = []
+        for (cols, failed), block_scores in zip(block_meta, scored):
+            for col, (score, p_value) in zip(cols, block_scores):
+                raw.append((col, col in failed, score, p_value))
+        max_score = max([score for _, bad, score, _ in raw if not bad], default=0.0)
+
+        for col, bad, score, p_value in raw:
+            if bad:
+                results.append({
+                    "feature": col,
+                    "metric": metric,
+                    "score": 0.0,
+                    "p_value": None,
+                    "relevance": "Unknown",
+                    "reason": "Analysis failed (incompatible types)"
+                })
+                continue
+            relevance, reason = AnalysisEngine._verdict(metric, score, p_value, max_score)
+            results.append({
+                "feature": col,
+                "metric": metric,
+                "score": score,
+                "p_value": p_value,
+                "relevance": relevance,
+                "reason": reason
+            })
+
+        results.sort(key=lambda x: x['score'], reverse=True)
+        return results
+
+    # ------------------------------------------------------------------
+    #   Pairwise feature-feature correlation matrix
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _column_values(df: pd.DataFrame, col, method: str) -> np.ndarray:
+        if method == "spearman":
+            return df[col].rank(method="average").to_numpy(dtype=np.float64, na_value=np.nan)
+        return df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+
+    @staticmethod
+    def _column_stats(df: pd.DataFrame, cols: List[str], method: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Per-column (mean, norm of the centered column); a zero norm marks a constant column."""
+        means = np.zeros(len(cols))
+        norms = np.zeros(len(cols))
+        for j, col in enumerate(cols):
+            values = AnalysisEngine._column_values(df, col, method)
+            observed = ~np.isnan(values)
+            if observed.any():
+                means[j] = values[observed].mean()
+                centered = values[observed] - means[j]
+                norms[j] = np.sqrt(np.dot(centered, centered))
+        return means, norms
+
+    @staticmethod
+    def _standardized_block(df: pd.DataFrame, cols: List[str], method: str, means: np.ndarray, norms: np.ndarray) -> np.ndarray:
+        """
+        (rows x len(cols)) float32 block of unit-norm, centered columns. Missing values are
+        mean-imputed (contribute zero), which shrinks correlations toward zero in proportion
+        to the missing rate.
+        """
+        Z = np.zeros((len(df), len(cols)), dtype=np.float32)
+        for j, col in enumerate(cols):
+            if norms[j] > 0:
+                values = AnalysisEngine._column_values(df, col, method)
+                Z[:, j] = np.where(np.isnan(values), 0.0, (values - means[j]) / norms[j])
+        return Z
+
+    @staticmethod
+    def correlation_matrix(
+        df: pd.DataFrame,
+        columns: Optional[List[str]] = None,
+        method: str = "pearson",
+        sample_size: Optional[int] = None,
+        random_state: int = 42,
+    ) -> Tuple[np.ndarray, List[str]]:
+        """
+        Pearson / Spearman correlation matrix of numeric columns as float32.
+        Computed as blocked Z_i^T Z_j products so each step touches only two column blocks.
+        """
+        if method not in ("pearson", "spearman"):
+            raise ValueError(f"Unknown correlation method: {method}")
+
+        if columns:
+            cols = [c for c in columns if c in df.columns and pd.api.types.is_numeric_dtype(df[c])]
+        else:
+            cols = list(df.select_dtypes(include=[np.number, "bool"]).columns)
+
+        if sample_size and len(df) > sample_size:
+            df = df[cols].sample(n=sample_size, random_state=random_state)
+
+        # Only the per-column mean / norm vectors stay resident; blocks are standardized on demand
+        means, norms = AnalysisEngine._column_stats(df, cols, method)
+        p = len(cols)
+        matrix = np.empty((p, p), dtype=np.float32)
+        block = AnalysisEngine.BLOCK_COLUMNS
+
+        def standardized(start: int) -> np.ndarray:
+            stop = min(start + block, p)
+            return AnalysisEngine._standardized_block(df, cols[start:stop], method, means[start:stop], norms[start:stop])
+
+        for i in range(0, p, block):
+            Zi = standardized(i)
+            for j in range(i, p, block):
+                Zj = Zi if j == i else standardized(j)
+                prod = Zi.T @ Zj
+                matrix[i:i + block, j:j + block] = prod
+                matrix[j:j + block, i:i + block] = prod.T
+
+        np.clip(matrix, -1.0, 1.0, out=matrix)
+        # Constant columns have no defined correlation
+        constant = norms == 0
+        matrix[constant, :] = np.nan
+        matrix[:, constant] = np.nan
+        return matrix, cols
+
+    @staticmethod
+    def top_correlated_pairs(matrix: np.ndarray, cols: List[str], top_k: int = 50, threshold: Optional[float] = None) -> List[dict]:
+        """
+        Extracts the strongest |r| pairs from the upper triangle, one row block at a time.
+        With a threshold, returns every pair at or above it; otherwise the top_k pairs.
+        """
+        p = len(cols)
+        block = AnalysisEngine.BLOCK_COLUMNS
+        rows, cols_idx, values = [], [], []
+
+        for start in range(0, p, block):
+            stop = min(start + block, p)
+            chunk = np.abs(np.nan_to_num(np.asarray(matrix[start:stop], dtype=np.float32), nan=0.0))
+            # Keep only the strict upper triangle (j > i): no self-pairs, no mirrored duplicates
+            chunk[(np.arange(p)[None, :] - start) <= np.arange(stop - start)[:, None]] = -np.inf
+
+            if threshold is not None:
+                r, c = np.nonzero(chunk >= threshold)
+            else:
+                flat = chunk.ravel()
+                k = min(top_k, flat.size)
+                if k == 0:
+                    continue
+                best = np.argpartition(flat, -k)[-k:]
+                best = best[flat[best] > 0]
+                r, c = np.unravel_index(best, chunk.shape)
+
+            rows.append(r + start)
+            cols_idx.append(c)
+            values.append(chunk[r, c])
+
+        if not values:
+            return []
+        rows, cols_idx, values = np.concatenate(rows), np.concatenate(cols_idx), np.concatenate(values)
+
+        order = np.argsort(-values, kind="stable")
+        if threshold is None:
+            order = order[:top_k]
+
+        return [
+            {
+                "feature_a": cols[rows[k]],
+                "feature_b": cols[cols_idx[k]],
+                "correlation": float(matrix[rows[k], cols_idx[k]]),
+            }
+            for k in order
+        ]
+
+    # ------------------------------------------------------------------
+    #   Drift between two dataset profiles
+    # ------------------------------------------------------------------
+
+    PSI_EPSILON = 1e-4
+
+    @staticmethod
+    def _sketch_cdf(quantiles: np.ndarray, x: np.ndarray) -> np.ndarray:
+        """Right-continuous CDF reconstructed from evenly spaced quantiles (linear between knots)."""
+        probs = np.linspace(0.0, 1.0, len(quantiles))
+        idx = np.searchsorted(quantiles, x, side="right")
+        lo = np.clip(idx - 1, 0, len(quantiles) - 1)
+        hi = np.clip(idx, 0, len(quantiles) - 1)
+        span = quantiles[hi] - quantiles[lo]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            frac = np.where(span > 0, (x - quantiles[lo]) / span, 0.0)
+        cdf = probs[lo] + frac * (probs[hi] - probs[lo])
+        return np.where(idx == 0, 0.0, np.where(idx >= len(quantiles), 1.0, cdf))
+
+    @staticmethod
+    def _psi(expected: np.ndarray, actual: np.ndarray) -> float:
+        eps = AnalysisEngine.PSI_EPSILON
+        expected = np.clip(expected, eps, None)
+        actual = np.clip(actual, eps, None)
+        return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+    @staticmethod
+    def _drift_level(psi: float) -> str:
+        if psi < 0.1:
+            return "none"
+        if psi < 0.25:
+            return "moderate"
+        return "significant"
+
+    @staticmethod
+    def _numeric_drift(ref: dict, cur: dict, ref_rows: int, cur_rows: int) -> dict:
+        q_ref = np.asarray(ref.get("quantiles") or [], dtype=np.float64)
+        q_cur = np.asarray(cur.get("quantiles") or [], dtype=np.float64)
+        if len(q_ref) == 0 or len(q_cur) == 0:
+            return {"psi": None, "ks": None}
+
+        # PSI over the reference deciles, plus a bucket for missing values
+        edges = np.unique(np.interp(np.linspace(0.1, 0.9, 9), np.linspace(0.0, 1.0, len(q_ref)), q_ref))
+        ref_cdf = np.concatenate([[0.0], AnalysisEngine._sketch_cdf(q_ref, edges), [1.0]])
+        cur_cdf = np.concatenate([[0.0], AnalysisEngine._sketch_cdf(q_cur, edges), [1.0]])
+        ref_null = ref["null_count"] / ref_rows if ref_rows else 0.0
+        cur_null = cur["null_count"] / cur_rows if cur_rows else 0.0
+        expected = np.append(np.diff(ref_cdf) * (1 - ref_null), ref_null)
+        actual = np.append(np.diff(cur_cdf) * (1 - cur_null), cur_null)
+
+        # KS distance evaluated at every knot of both sketches
+        grid = np.union1d(q_ref, q_cur)
+        ks = np.max(np.abs(AnalysisEngine._sketch_cdf(q_ref, grid) - AnalysisEngine._sketch_cdf(q_cur, grid)))
+
+        return {
+            "psi": AnalysisEngine._psi(expected, actual),
+            "ks": float(ks),
+            "mean_reference": ref.get("mean"),
+            "mean_current": cur.get("mean"),
+        }
+
+    @staticmethod
+    def _categorical_drift(ref: dict, cur: dict, ref_rows: int, cur_rows: int, top_shifts: int = 5) -> dict:
+        ref_top, cur_top = ref.get("top", {}), cur.get("top", {})
+        categories = sorted(set(ref_top) | set(cur_top))
+
+        # Categories outside a profile's top list are only known in aggregate ("other")
+        def shares(top, other, null_count, rows):
+            known = np.array([top.get(c, 0) for c in categories], dtype=np.float64)
+            return np.append(known, [other, null_count]) / max(rows, 1)
+
+        expected = shares(ref_top, ref.get("other_count", 0), ref["null_count"], ref_rows)
+        actual = shares(cur_top, cur.get("other_count", 0), cur["null_count"], cur_rows)
+
+        delta = actual[:len(categories)] - expected[:len(categories)]
+        order = np.argsort(-np.abs(delta))[:top_shifts]
+        return {
+            "psi": AnalysisEngine._psi(expected, actual),
+            "ks": None,
+            "category_shifts": [
+                {
+                    "category": categories[i],
+                    "reference_share": float(expected[i]),
+                    "current_share": float(actual[i]),
+                    "delta": float(delta[i]),
+                }
+                for i in order if delta[i] != 0
+            ],
+        }
+
+    @staticmethod
+    def compare_profiles(reference: dict, current: dict, columns: Optional[List[str]] = None) -> List[dict]:
+        """
+        Per-column drift (PSI, KS distance, null-rate delta, category share shifts)
+        computed purely from two persisted profiles - no data is read.
+        """
+        ref_cols, cur_cols = reference["columns"], current["columns"]
+        ref_rows, cur_rows = reference["row_count"], current["row_count"]
+        names = columns or list(dict.fromkeys(list(ref_cols) + list(cur_cols)))
+
+        report = []
+        for col in names:
+            ref, cur = ref_cols.get(col), cur_cols.get(col)
+            if ref is None or cur is None:
+                report.append({
+                    "column": col,
+                    "kind": (ref or cur or {}).get("kind", "unknown"),
+                    "status": "missing_in_reference" if ref is None else "missing_in_current",
+                    "drift": "significant",
+                })
+                continue
+
+            ref_null = ref["null_count"] / ref_rows if ref_rows else 0.0
+            cur_null = cur["null_count"] / cur_rows if cur_rows else 0.0
+            entry = {
+                "column": col,
+                "kind": cur.get("kind", "unknown"),
+                "status": "compared",
+                "dtype_reference": ref.get("dtype"),
+                "dtype_current": cur.get("dtype"),
+                "null_rate_reference": ref_null,
+                "null_rate_current": cur_null,
+                "null_rate_delta": cur_null - ref_null,
+                "distinct_reference": ref.get("distinct"),
+                "distinct_current": cur.get("distinct"),
+            }
+
+            if ref.get("kind") != cur.get("kind"):
+                # e.g. numeric in the reference, text in the current data: no distribution to compare
+                entry.update({"status": "type_changed", "psi": None, "ks": None, "drift": "significant"})
+            elif cur["kind"] == "categorical":
+                entry.update(AnalysisEngine._categorical_drift(ref, cur, ref_rows, cur_rows))
+            else:
+                entry.update(AnalysisEngine._numeric_drift(ref, cur, ref_rows, cur_rows))
+
+            if "drift" not in entry:
+                entry["drift"] = AnalysisEngine._drift_level(entry["psi"]) if entry.get("psi") is not None else "unknown"
+            report.append(entry)
+
+        severity = {"significant": 0, "moderate": 1, "unknown": 2, "none": 3}
+        report.sort(key=lambda r: (severity.get(r["drift"], 2), -(r.get("psi") or 0.0)))
+        return report
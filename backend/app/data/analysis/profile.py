@@ -0,0 +1,211 @@
+import os
+import json
+import hashlib
+import logging
+import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from typing import Optional
+
+from app.core.config import settings
+from app.data.analysis.sketches import (
+    HyperLogLog, QuantileSketch, approx_distinct_counts, column_fingerprint, hash_series
+)
+
+logger = logging.getLogger(__name__)
+
+
+class DatasetProfiler:
+    """
+    Builds and persists a compact per-column profile of a dataset version:
+    null counts, approximate distinct counts, a content fingerprint, a quantile
+    sketch for numeric columns and top-category counts for categorical ones.
+    Profiles are written once when a dataset file is created, so later
+    comparisons (drift, cardinality checks) never need to rescan the data.
+    """
+
+    PROFILE_VERSION = 2
+    QUANTILE_POINTS = 101   # 0%, 1%, ..., 100%
+    TOP_CATEGORIES = 50
+
+    @staticmethod
+    def profile_path(file_path: str) -> str:
+        version = os.path.splitext(os.path.basename(file_path))[0]
+        return os.path.join(settings.ARTIFACT_DIR, f"profile_{version}.json")
+
+    @staticmethod
+    def _numeric_values(series: pd.Series) -> Optional[np.ndarray]:
+        if pd.api.types.is_bool_dtype(series):
+            return None
+        if pd.api.types.is_datetime64_any_dtype(series):
+            epoch = pd.Timestamp(0, tz=series.dt.tz)
+            return (series - epoch).dt.total_seconds().to_numpy(dtype=np.float64, na_value=np.nan)
+        if pd.api.types.is_numeric_dtype(series):
+            return series.to_numpy(dtype=np.float64, na_value=np.nan)
+        return None
+
+    @staticmethod
+    def build(df: pd.DataFrame) -> dict:
+        distinct = approx_distinct_counts(df)
+        probs = np.linspace(0.0, 1.0, DatasetProfiler.QUANTILE_POINTS)
+        columns = {}
+
+        for col in df.columns:
+            series = df[col]
+            null_count = int(series.isna().sum())
+            entry = {
+                "dtype": str(series.dtype),
+                "null_count": null_count,
+                "distinct": int(distinct.get(col, 0)),
+                "fingerprint": column_fingerprint(series),
+            }
+
+            values = DatasetProfiler._numeric_values(series)
+            if values is not None:
+                finite = values[np.isfinite(values)]
+                entry["kind"] = "datetime" if pd.api.types.is_datetime64_any_dtype(series) else "numeric"
+                if len(finite) > 0:
+                    entry["quantiles"] = np.quantile(finite, probs).tolist()
+                    entry["mean"] = float(finite.mean())
+                    entry["std"] = float(finite.std())
+                else:
+                    entry["quantiles"] = []
+            else:
+                entry["kind"] = "categorical"
+                try:
+                    counts = series.value_counts(dropna=True)
+                except TypeError:
+                    counts = series.astype(str).where(series.notna()).value_counts(dropna=True)
+                top = counts.head(DatasetProfiler.TOP_CATEGORIES)
+                entry["top"] = {str(k): int(v) for k, v in top.items()}
+                entry["other_count"] = int(counts.iloc[len(top):].sum())
+
+            columns[str(col)] = entry
+
+        return {
+            "profile_version": DatasetProfiler.PROFILE_VERSION,
+            "row_count": int(len(df)),
+            "columns": columns,
+        }
+
+    @staticmethod
+    def build_chunked(file_path: str, chunk_rows: Optional[int] = None) -> dict:
+        """
+        The same profile streamed from a parquet file batch by batch, for datasets too large
+        to load: distinct counts merge per-batch HyperLogLogs, quantiles come from a merged
+        QuantileSketch, and category counts keep the heaviest 10 x TOP_CATEGORIES values per
+        column between batches (the rest are folded into other_count).
+        """
+        keep = 10 * DatasetProfiler.TOP_CATEGORIES
+        probs = np.linspace(0.0, 1.0, DatasetProfiler.QUANTILE_POINTS)
+        stats, rows = {}, 0
+        for batch in pq.ParquetFile(file_path).iter_batches(batch_size=chunk_rows or settings.FE_CHUNK_ROWS):
+            chunk = batch.to_pandas()
+            rows += len(chunk)
+            for col in chunk.columns:
+                series = chunk[col]
+                if col not in stats:
+                    values = DatasetProfiler._numeric_values(series)
+                    stats[col] = {
+                        "dtype": str(series.dtype), "null_count": 0, "hll": HyperLogLog(), "digest": hashlib.blake2b(digest_size=16),
+                        "kind": "categorical" if values is None else "datetime" if pd.api.types.is_datetime64_any_dtype(series) else "numeric",
+                        "sketch": QuantileSketch(), "sum": 0.0, "sum_sq": 0.0, "counts": pd.Series(dtype=np.int64), "other": 0,
+                    }
+                entry = stats[col]
+                entry["null_count"] += int(series.isna().sum())
+                entry["hll"].update(hash_series(series))
+                try:
+                    hashes = pd.util.hash_pandas_object(series, index=False).to_numpy(dtype=np.uint64)
+                except TypeError:
+                    hashes = pd.util.hash_pandas_object(series.astype(str), index=False).to_numpy(dtype=np.uint64)
+                entry["digest"].update(hashes.tobytes())
+
+                if entry["kind"] == "categorical":
+                    try:
+                        counts = series.value_counts(dropna=True)
+                    except TypeError:
+                        counts = series.astype(str).where(series.notna()).value_counts(dropna=True)
+                    counts.index = counts.index.map(str)
+                    merged = entry["counts"].add(counts.groupby(level=0).sum(), fill_value=0).sort_values(ascending=False, kind="stable")
+                    entry["other"] += int(merged.iloc[keep:].sum())
+                    entry["counts"] = merged.iloc[:keep]
+                else:
+                    values = DatasetProfiler._numeric_values(series)
+                    finite = values[np.isfinite(values)]
+                    entry["sketch"].update(finite)
+                    entry["sum"] += float(finite.sum())
+                    entry["sum_sq"] += float(np.dot(finite, finite))
+
+        columns = {}
+        for col, entry in stats.items():
+            entry["digest"].update(entry["dtype"].encode())
+            profile = {
+                "dtype": entry["dtype"],
+                "null_count": entry["null_count"],
+                "distinct": int(round(entry["hll"].estimate())),
+                "fingerprint": entry["digest"].hexdigest(),
+                "kind": entry["kind"],
+            }
+            if entry["kind"] == "categorical":
+                top = entry["counts"].head(DatasetProfiler.TOP_CATEGORIES)
+                profile["top"] = {k: int(v) for k, v in top.items()}
+                profile["other_count"] = int(entry["counts"].iloc[len(top):].sum()) + entry["other"]
+            elif entry["sketch"].count > 0:
+                n = entry["sketch"].count
+                mean = entry["sum"] / n
+                profile["quantiles"] = entry["sketch"].quantiles(probs).tolist()
+                profile["mean"] = mean
+                profile["std"] = float(np.sqrt(max(entry["sum_sq"] / n - mean * mean, 0.0)))
+            else:
+                profile["quantiles"] = []
+            columns[str(col)] = profile
+
+        return {
+            "profile_version": DatasetProfiler.PROFILE_VERSION,
+            "row_count": rows,
+            "columns": columns,
+        }
+
+    @staticmethod
+    def save(df: pd.DataFrame, file_path: str) -> dict:
+        profile = DatasetProfiler.build(df)
+        with open(DatasetProfiler.profile_path(file_path), "w") as f:
+            json.dump(profile, f)
+        return profile
+
+    @staticmethod
+    def load(file_path: str) -> Optional[dict]:
+        path = DatasetProfiler.profile_path(file_path)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            profile = json.load(f)
+        if profile.get("profile_version") != DatasetProfiler.PROFILE_VERSION:
+            return None
+        return profile
+
+    @staticmethod
+    def load_or_build(file_path: str) -> dict:
+        """Returns the persisted profile, scanning the dataset once if it predates profiling."""
+        profile = DatasetProfiler.load(file_path)
+        if profile is None:
+            profile = DatasetProfiler.save(pd.read_parquet(file_path), file_path)
+        return profile
+
+    @staticmethod
+    def try_save(df: Optional[pd.DataFrame], file_path: str) -> None:
+        """
+        Best-effort profiling at dataset creation; a failure here must not fail the upload/mutation.
+        Without `df` (chunked outputs too large to load) the written file is profiled batch by batch.
+        """
+        try:
+            if df is None:
+                profile = DatasetProfiler.build_chunked(file_path)
+                with open(DatasetProfiler.profile_path(file_path), "w") as f:
+                    json.dump(profile, f)
+            else:
+                DatasetProfiler.save(df, file_path)
+        except (OSError, ValueError, TypeError, MemoryError, pa.ArrowException):
+            # Readers then fall back to a full scan / a fresh build; leave a trace of why
+            logger.warning(f"Profiling skipped for {file_path}", exc_info=True)
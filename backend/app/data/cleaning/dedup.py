@@ -0,0 +1,169 @@
+import re
+import numpy as np
+import pandas as pd
+from typing import Callable, List, Optional
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+from app.core.config import settings
+
+
+class NearDuplicateDetector:
+    """
+    Near-duplicate clustering with MinHash signatures and LSH banding.
+    Each record (the chosen text columns, normalized) becomes a set of
+    character shingles taken per token, so typos only touch a few shingles and
+    token order does not matter. Records whose signatures collide in any LSH
+    band are candidates; candidates whose estimated Jaccard similarity reaches
+    the threshold are linked, and connected components become clusters.
+    Work is linear in rows: no all-pairs comparison is ever made.
+    """
+
+    KEEP_POLICIES = ["first", "last", "most_complete", "longest"]
+    MIX = np.uint64(0x9E3779B97F4A7C15)  # Fibonacci hashing constant
+    BATCH_BYTES = 64 * 1024 * 1024
+    _NON_WORD = re.compile(r"[^\w]+")
+
+    @staticmethod
+    def _report(progress: Optional[Callable], stage: str, done: int, total: int):
+        if progress is not None:
+            progress({"stage": stage, "done": int(done), "total": int(total)})
+
+    @staticmethod
+    def record_text(df: pd.DataFrame, columns: List[str]) -> pd.Series:
+        text = df[columns[0]].fillna("").astype(str)
+        for col in columns[1:]:
+            text = text + " " + df[col].fillna("").astype(str)
+        return text.str.lower().str.replace(NearDuplicateDetector._NON_WORD, " ", regex=True).str.strip()
+
+    @staticmethod
+    def shingles(text: pd.Series, size: int) -> tuple:
+        """
+        Character shingles of every token, computed over the UTF-8 bytes of all records at once.
+        A shingle may start or end on a space but never spans one, so token order is irrelevant
+        (tokens shorter than size - 2 characters contribute nothing).
+        Returns (shingle values as packed uint64, row of each shingle).
+        """
+        if not 2 <= size <= 8:
+            raise ValueError("shingle_size must be between 2 and 8")
+        padded = (" " + text + " ").tolist()
+        lengths = np.fromiter((len(t.encode("utf-8")) for t in padded), dtype=np.int64, count=len(padded))
+        data = np.frombuffer("".join(padded).encode("utf-8"), dtype=np.uint8)
+        row_of = np.repeat(np.arange(len(padded)), lengths)
+
+        n_grams = max(len(data) - size + 1, 0)
+        valid = row_of[:n_grams] == row_of[size - 1:size - 1 + n_grams]
+        values = np.zeros(n_grams, dtype=np.uint64)
+        for j in range(size):
+            window = data[j:j + n_grams]
+            if 0 < j < size - 1:
+                valid &= window != ord(" ")
+            values = (values << np.uint64(8)) | window.astype(np.uint64)
+        return values[valid], row_of[:n_grams][valid]
+
+    @staticmethod
+    def bands_for(threshold: float, num_perm: int) -> tuple:
+        """(bands, rows) with bands * rows <= num_perm whose S-curve midpoint (1/b)^(1/r) is closest to threshold."""
+        best = None
+        for rows in range(1, num_perm + 1):
+            bands = num_perm // rows
+            error = abs((1.0 / bands) ** (1.0 / rows) - threshold)
+            if best is None or error < best[0]:
+                best = (error, bands, rows)
+        return best[1], best[2]
+
+    @staticmethod
+    def signatures(text: pd.Series, num_perm: int = 128, shingle_size: int = 3, seed: int = 1,
+                   progress: Optional[Callable] = None) -> tuple:
+        """Returns (signatures [n x num_perm] uint32, has_shingles mask)."""
+        n = len(text)
+        values, rows = NearDuplicateDetector.shingles(text, shingle_size)
+        present = np.bincount(rows, minlength=n) > 0
+
+        # Each distinct shingle is mixed down to 32 bits once
+        codes, uniques = pd.factorize(values)
+        mixed = (np.asarray(uniques, dtype=np.uint64) * NearDuplicateDetector.MIX) >> np.uint64(32)
+
+        # Multiply-shift permutations: h(x) = (a*x + b) >> 32, wrapping uint64 arithmetic, no modulus
+        rng = np.random.default_rng(seed)
+        a = rng.integers(1, 2 ** 63, num_perm, dtype=np.uint64) | np.uint64(1)
+        b = rng.integers(0, 2 ** 63, num_perm, dtype=np.uint64)
+
+        sig = np.full((n, num_perm), np.iinfo(np.uint32).max, dtype=np.uint32)
+        offsets = np.r_[0, np.cumsum(np.bincount(rows, minlength=n))]
+        rows_present = np.flatnonzero(present)
+        chunk_rows = settings.CLEANING_CHUNK_ROWS
+        for start in range(0, len(rows_present), chunk_rows):
+            chunk = rows_present[start:start + chunk_rows]
+            lo, hi = offsets[chunk[0]], offsets[chunk[-1] + 1]
+            entry_hash = mixed[codes[lo:hi]]
+            segment_starts = offsets[chunk] - lo
+            block = max(1, NearDuplicateDetector.BATCH_BYTES // (8 * max(hi - lo, 1)))
+            for p in range(0, num_perm, block):
+                permuted = (a[p:p + block, None] * entry_hash[None, :] + b[p:p + block, None]) >> np.uint64(32)
+                sig[chunk, p:p + block] = np.minimum.reduceat(permuted, segment_starts, axis=1).T
+            NearDuplicateDetector._report(progress, "signatures", min(start + chunk_rows, len(rows_present)), len(rows_present))
+        return sig, present
+
+    @staticmethod
+    def cluster(text: pd.Series, threshold: float = 0.8, num_perm: int = 128, shingle_size: int = 3, seed: int = 1,
+                progress: Optional[Callable] = None) -> np.ndarray:
+        """Cluster id per row (0..n_clusters-1, numbered by first occurrence)."""
+        n = len(text)
+        sig, present = NearDuplicateDetector.signatures(text, num_perm, shingle_size, seed, progress)
+        n_bands, band_rows = NearDuplicateDetector.bands_for(threshold, num_perm)
+        candidates = np.flatnonzero(present)
+
+        edges_a, edges_b = [], []
+        for band in range(n_bands):
+            block = sig[candidates, band * band_rows:(band + 1) * band_rows]
+            keys = pd.util.hash_pandas_object(pd.DataFrame(block), index=False).to_numpy()
+            order = np.argsort(keys, kind="stable")
+            sorted_keys = keys[order]
+            same = np.flatnonzero(sorted_keys[1:] == sorted_keys[:-1]) + 1
+            NearDuplicateDetector._report(progress, "banding", band + 1, n_bands)
+            if len(same) == 0:
+                continue
+            # Link each bucket member to its predecessor and to the bucket head (never all pairs)
+            bucket_start = np.maximum.accumulate(np.where(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]], np.arange(len(order)), 0))
+            members = candidates[order[same]]
+            edges_a += [members, members]
+            edges_b += [candidates[order[same - 1]], candidates[order[bucket_start[same]]]]
+
+        if not edges_a:
+            return np.arange(n)
+        a = np.concatenate(edges_a)
+        b = np.concatenate(edges_b)
+        pairs = np.unique(np.column_stack([np.minimum(a, b), np.maximum(a, b)]), axis=0)
+        pairs = pairs[pairs[:, 0] != pairs[:, 1]]
+
+        # Verify candidates with the signature estimate of Jaccard similarity
+        keep = np.zeros(len(pairs), dtype=bool)
+        batch = max(1, NearDuplicateDetector.BATCH_BYTES // (8 * num_perm))
+        for start in range(0, len(pairs), batch):
+            part = pairs[start:start + batch]
+            keep[start:start + batch] = (sig[part[:, 0]] == sig[part[:, 1]]).mean(axis=1) >= threshold
+        pairs = pairs[keep]
+
+        graph = sparse.coo_matrix((np.ones(len(pairs), dtype=np.int8), (pairs[:, 0], pairs[:, 1])), shape=(n, n))
+        _, labels = connected_components(graph, directed=False)
+        return labels
+
+    @staticmethod
+    def representatives(df: pd.DataFrame, labels: np.ndarray, keep: str, text: Optional[pd.Series] = None) -> np.ndarray:
+        """Positions of the row kept for each cluster."""
+        if keep not in NearDuplicateDetector.KEEP_POLICIES:
+            raise ValueError(f"Unknown keep policy: {keep}. Available: {NearDuplicateDetector.KEEP_POLICIES}")
+        positions = np.arange(len(df))
+        if keep == "first":
+            score = -positions
+        elif keep == "last":
+            score = positions
+        elif keep == "most_complete":
+            score = df.notna().sum(axis=1).to_numpy()
+        else:
+            score = text.str.len().to_numpy()
+        # Best score first within each cluster, earliest row breaking ties
+        order = np.lexsort((positions, -score, labels))
+        first = np.r_[True, labels[order][1:] != labels[order][:-1]]
+        return np.sort(order[first])
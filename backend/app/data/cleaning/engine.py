@@ -3,7 +3,13 @@ import numpy as np
 from fastapi import HTTPException
 import re
 
+from app.data.cleaning.imputation import ImputationEngine
+from app.data.cleaning.dedup import NearDuplicateDetector
+
 class CleaningEngine:
+    # Values sampled per object column when sniffing for numeric-as-text columns
+    TYPE_SAMPLE_SIZE = 1000
+
     @staticmethod
     def get_recommendations(df: pd.DataFrame) -> list:
         recommendations = []
@@ -18,6 +24,8 @@ class CleaningEngine:
             if df[num_cols].isnull().sum().sum() > 0:
                 recommendations.append("fill_missing_mean")
                 recommendations.append("fill_missing_median")
+                if len(num_cols) > 1:
+                    recommendations.append("fill_missing_knn")
                 
             # Categorical missing?
             cat_cols = df.select_dtypes(include=['object', 'category']).columns
@@ -34,31 +42,37 @@ class CleaningEngine:
         if len(obj_cols) > 0:
             recommendations.append("text_trim")
             
-        # 4. Outliers (Numeric)
-        num_cols = df.select_dtypes(include=[np.number]).columns
-        for col in num_cols:
-            if df[col].std() > 0:
-                z_scores = ((df[col] - df[col].mean()) / df[col].std()).abs()
-                if (z_scores > 3).any():
+        # 4. Outliers (Numeric) - all columns in one vectorized pass
+        num_df = df.select_dtypes(include=[np.number])
+        if len(num_df.columns) > 0:
+            std = num_df.std()
+            valid = std[std > 0].index
+            if len(valid) > 0:
+                z_scores = ((num_df[valid] - num_df[valid].mean()) / std[valid]).abs()
+                if (z_scores > 3).to_numpy().any():
                     recommendations.append("remove_outliers_zscore")
                     recommendations.append("cap_outliers_winsorize")
-                    break
         
-        # 5. Type Issues
+        # 5. Type Issues (judged on a sample of non-null values, not a full conversion)
         for col in obj_cols:
-             numeric_conversion = pd.to_numeric(df[col], errors='coerce')
+             non_null = df[col].dropna()
+             if len(df) == 0 or len(non_null) == 0:
+                 continue
+             sample = non_null.sample(n=min(len(non_null), CleaningEngine.TYPE_SAMPLE_SIZE), random_state=0)
+             numeric_share = pd.to_numeric(sample, errors='coerce').notna().mean()
              # If >80% can be numeric but it's object, suggest conversion
-             if len(df) > 0 and numeric_conversion.notna().sum() / len(df) > 0.8:
+             if numeric_share * len(non_null) / len(df) > 0.8:
                  recommendations.append("convert_to_float")
                  break
 
         return list(set(recommendations))
 
     @staticmethod
-    def apply_operation(df: pd.DataFrame, operation: str, params: dict) -> pd.DataFrame:
+    def apply_operation(df: pd.DataFrame, operation: str, params: dict, progress=None) -> pd.DataFrame:
         """
         Applies a specific cleaning operation to the DataFrame.
         Returns a NEW DataFrame (does not modify in place).
+        Long-running operations call `progress({"stage", "done", "total"})` as they go.
         """
         df = df.copy()
         
@@ -114,6 +128,32 @@ class CleaningEngine:
                 for col in cols:
                     df[col] = df[col].bfill()
 
+            elif operation == "fill_missing_knn":
+                # params: { "columns": [...], "features": [...], "n_neighbors": 5, "n_probe": 3 }
+                if not cols: cols = [c for c in df.select_dtypes(include=[np.number]).columns if df[c].isna().any()]
+                cols = [c for c in cols if pd.api.types.is_numeric_dtype(df[c])]
+                if cols:
+                    df = ImputationEngine.knn_impute(
+                        df, cols,
+                        features=params.get('features'),
+                        n_neighbors=int(params.get('n_neighbors', 5)),
+                        n_probe=int(params.get('n_probe', 3)),
+                        index_rows=params.get('index_rows'),
+                        progress=progress
+                    )
+
+            elif operation == "fill_missing_iterative":
+                # params: { "columns": [...], "max_iter": 10, "sample_rows": 50000 }
+                if not cols: cols = df.select_dtypes(include=[np.number]).columns
+                cols = [c for c in cols if pd.api.types.is_numeric_dtype(df[c])]
+                if cols:
+                    df = ImputationEngine.iterative_impute(
+                        df, cols,
+                        max_iter=int(params.get('max_iter', 10)),
+                        sample_rows=params.get('sample_rows'),
+                        progress=progress
+                    )
+
             # --- 2. COLUMN OPERATIONS ---
             elif operation == "drop_columns":
                 df.drop(columns=params.get('columns', []), inplace=True, errors='ignore')
@@ -124,6 +164,26 @@ class CleaningEngine:
             elif operation == "drop_duplicates":
                 df.drop_duplicates(subset=cols if cols else None, keep='first', inplace=True)
 
+            elif operation in ("find_near_duplicates", "drop_near_duplicates"):
+                # params: { "columns": [...], "threshold": 0.8, "num_perm": 128, "shingle_size": 3,
+                #           "keep": "first" | "last" | "most_complete" | "longest", "output_column": "near_dup_cluster" }
+                if not cols: cols = list(df.select_dtypes(include=['object', 'string']).columns)
+                if not cols:
+                    raise ValueError("Near-duplicate detection needs at least one text column")
+                text = NearDuplicateDetector.record_text(df, cols)
+                labels = NearDuplicateDetector.cluster(
+                    text,
+                    threshold=float(params.get('threshold', 0.8)),
+                    num_perm=int(params.get('num_perm', 128)),
+                    shingle_size=int(params.get('shingle_size', 3)),
+                    progress=progress
+                )
+                if operation == "find_near_duplicates":
+                    df[params.get('output_column', 'near_dup_cluster')] = labels
+                else:
+                    keep = NearDuplicateDetector.representatives(df, labels, params.get('keep', 'first'), text)
+                    df = df.iloc[keep]
+
             # --- 3. TYPE CONVERSION ---
             elif operation == "convert_to_int":
                 if not cols: cols = df.columns
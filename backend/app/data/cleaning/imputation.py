@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+from typing import Callable, List, Optional
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.experimental import enable_iterative_imputer  # noqa: F401
+from sklearn.impute import IterativeImputer
+
+from app.core.config import settings
+
+
+class ImputationEngine:
+    """
+    Model-based imputation that stays linear in rows.
+    KNN: donors are a bounded sample of complete rows, partitioned into
+    k-means lists (an IVF index). Each query row is matched only against the
+    donors in the few lists nearest to its own list, with distances computed
+    over the query's observed columns, in memory-capped batches.
+    Iterative: IterativeImputer fit on a row subsample, applied in chunks.
+    Both report progress as {"stage", "done", "total"} through `progress`.
+    """
+
+    BATCH_BYTES = 64 * 1024 * 1024  # Cap on each (queries x candidates) distance block
+
+    @staticmethod
+    def _report(progress: Optional[Callable], stage: str, done: int, total: int):
+        if progress is not None:
+            progress({"stage": stage, "done": int(done), "total": int(total)})
+
+    @staticmethod
+    def _masked_sq_distances(Q: np.ndarray, M: np.ndarray, D: np.ndarray) -> np.ndarray:
+        """Squared distances over each query's observed columns (Q zero-filled, M = observed mask)."""
+        d = (M * Q * Q).sum(axis=1)[:, None] - 2.0 * (M * Q) @ D.T + M @ (D * D).T
+        return np.maximum(d, 0.0)
+
+    @staticmethod
+    def knn_impute(df: pd.DataFrame, cols: List[str], features: Optional[List[str]] = None, n_neighbors: int = 5,
+                   n_probe: int = 3, index_rows: Optional[int] = None, random_state: int = 42,
+                   progress: Optional[Callable] = None) -> pd.DataFrame:
+        features = list(features or df.select_dtypes(include=[np.number]).columns)
+        features += [c for c in cols if c not in features]
+        X = df[features].to_numpy(dtype=np.float64, na_value=np.nan)
+        observed = ~np.isnan(X)
+
+        # Standardize so no column dominates the distance
+        mean = np.nanmean(X, axis=0)
+        std = np.nanstd(X, axis=0)
+        std[~(std > 0)] = 1.0
+        Z = np.where(observed, (X - mean) / std, 0.0)
+
+        complete = np.flatnonzero(observed.all(axis=1))
+        if len(complete) == 0:
+            raise ValueError("KNN imputation needs at least one row without missing values in the feature columns")
+        target_idx = [features.index(c) for c in cols]
+        queries = np.flatnonzero(~observed[:, target_idx].all(axis=1))
+        total = len(queries)
+        ImputationEngine._report(progress, "indexing", 0, total)
+
+        rng = np.random.default_rng(random_state)
+        index_rows = int(index_rows or settings.IMPUTE_INDEX_ROWS)
+        donors = complete if len(complete) <= index_rows else np.sort(rng.choice(complete, index_rows, replace=False))
+        D = Z[donors]
+        k = min(int(n_neighbors), len(donors))
+
+        # IVF: ~sqrt(n) lists; each list searches its n_probe nearest lists' donors
+        n_lists = max(1, min(int(np.sqrt(len(donors))), len(donors) // max(k, 1)))
+        kmeans = MiniBatchKMeans(n_clusters=n_lists, random_state=random_state, n_init=3).fit(D)
+        members = [np.flatnonzero(kmeans.labels_ == i) for i in range(n_lists)]
+        centroid_dist = ((kmeans.cluster_centers_[:, None, :] - kmeans.cluster_centers_[None, :, :]) ** 2).sum(axis=2)
+        probes = np.argsort(centroid_dist, axis=1)[:, :min(int(n_probe), n_lists)]
+
+        Q_all, M_all = Z[queries], observed[queries].astype(np.float64)
+        assigned = np.empty(total, dtype=np.int64)
+        batch = max(1, ImputationEngine.BATCH_BYTES // (8 * n_lists))
+        for start in range(0, total, batch):
+            stop = start + batch
+            assigned[start:stop] = ImputationEngine._masked_sq_distances(
+                Q_all[start:stop], M_all[start:stop], kmeans.cluster_centers_
+            ).argmin(axis=1)
+
+        values = X[donors]
+        filled = X[queries].copy()
+        done = 0
+        for lst in range(n_lists):
+            rows = np.flatnonzero(assigned == lst)
+            if len(rows) == 0:
+                continue
+            candidates = np.concatenate([members[p] for p in probes[lst]])
+            if len(candidates) < k:
+                candidates = np.arange(len(donors))
+            batch = max(1, ImputationEngine.BATCH_BYTES // (8 * len(candidates)))
+            for start in range(0, len(rows), batch):
+                part = rows[start:start + batch]
+                d = ImputationEngine._masked_sq_distances(Q_all[part], M_all[part], D[candidates])
+                nearest = candidates[np.argpartition(d, k - 1, axis=1)[:, :k]]
+                estimate = values[nearest].mean(axis=1)
+                # Rows with no observed features get the plain donor mean
+                estimate[M_all[part].sum(axis=1) == 0] = values.mean(axis=0)
+                block = filled[part]
+                missing = np.isnan(block)
+                block[missing] = estimate[missing]
+                filled[part] = block
+                done += len(part)
+                ImputationEngine._report(progress, "imputing", done, total)
+
+        for j, col in zip(target_idx, cols):
+            column = df[col].to_numpy(dtype=np.float64, na_value=np.nan, copy=True)
+            column[queries] = filled[:, j]
+            df[col] = column
+        return df
+
+    @staticmethod
+    def iterative_impute(df: pd.DataFrame, cols: List[str], max_iter: int = 10, sample_rows: Optional[int] = None,
+                         chunk_rows: Optional[int] = None, random_state: int = 42,
+                         progress: Optional[Callable] = None) -> pd.DataFrame:
+        X = df[cols].to_numpy(dtype=np.float64, na_value=np.nan, copy=True)
+        total = len(X)
+        sample_rows = int(sample_rows or settings.IMPUTE_FIT_ROWS)
+        chunk_rows = int(chunk_rows or settings.CLEANING_CHUNK_ROWS)
+
+        ImputationEngine._report(progress, "fitting", 0, total)
+        fit_rows = np.arange(total)
+        if total > sample_rows:
+            fit_rows = np.sort(np.random.default_rng(random_state).choice(total, sample_rows, replace=False))
+        imputer = IterativeImputer(max_iter=int(max_iter), random_state=random_state, keep_empty_features=True)
+        imputer.fit(X[fit_rows])
+
+        out = np.empty_like(X)
+        for start in range(0, total, chunk_rows):
+            out[start:start + chunk_rows] = imputer.transform(X[start:start + chunk_rows])
+            ImputationEngine._report(progress, "imputing", min(start + chunk_rows, total), total)
+        df[cols] = out
+        return df
@@ -0,0 +1,136 @@
+import numpy as np
+from sklearn.decomposition import PCA, IncrementalPCA, TruncatedSVD
+from sklearn.manifold import TSNE, Isomap
+from sklearn.neighbors import NearestNeighbors
+from sklearn.preprocessing import StandardScaler
+
+from app.core.config import settings
+
+
+class EmbeddingEngine:
+    """
+    Scalable dimensionality reduction.
+    PCA picks its solver from the data's shape. Manifold methods (t-SNE, Isomap,
+    UMAP) are O(n^2) when run on every row, so they are fit on a random landmark
+    subsample and the remaining rows are projected out-of-sample in batches:
+    Isomap/UMAP through their own transform, t-SNE (which has none) by
+    inverse-distance interpolation between the nearest landmarks.
+    """
+
+    METHODS = ["tsne", "isomap", "umap"]
+    PCA_SOLVERS = ["auto", "full", "covariance_eigh", "arpack", "randomized", "truncated", "incremental"]
+
+    PRE_REDUCE_DIMS = 50            # Landmark features are PCA-reduced to this width first
+    INTERPOLATION_NEIGHBORS = 10
+    TRANSFORM_BATCH_ROWS = 50000
+    BATCH_BYTES = 64 * 1024 * 1024  # Working-set cap for IncrementalPCA / geodesic projection batches
+
+    # ------------------------------------------------------------------
+    #   PCA
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def choose_pca_solver(n_rows: int, n_cols: int, n_components: int, is_sparse: bool = False) -> str:
+        if is_sparse:
+            # Centering would densify the matrix; truncated SVD works on it directly
+            return "truncated"
+        if n_rows * n_cols * 8 > settings.FE_PCA_INCREMENTAL_BYTES:
+            return "incremental"
+        if n_cols <= 1000 and n_rows >= 10 * n_cols:
+            # Tall and skinny: eigendecomposition of the small p x p covariance
+            return "covariance_eigh"
+        if n_components <= 0.1 * min(n_rows, n_cols):
+            return "randomized"
+        return "full"
+
+    @staticmethod
+    def make_pca(solver: str, n_components: int, shape: tuple):
+        if solver not in EmbeddingEngine.PCA_SOLVERS or solver == "auto":
+            raise ValueError(f"Unknown PCA solver: {solver}. Available: {EmbeddingEngine.PCA_SOLVERS[1:]}")
+        if solver == "truncated":
+            return TruncatedSVD(n_components=n_components, algorithm="randomized", random_state=42)
+        if solver == "incremental":
+            n_rows, n_cols = shape
+            batch_rows = max(n_components, EmbeddingEngine.BATCH_BYTES // (8 * max(n_cols, 1)))
+            return IncrementalPCA(n_components=n_components, batch_size=min(n_rows, batch_rows))
+        if solver == "randomized":
+            return PCA(n_components=n_components, svd_solver="randomized", random_state=42)
+        return PCA(n_components=n_components, svd_solver=solver)
+
+    # ------------------------------------------------------------------
+    #   Manifold embeddings (landmark fit + out-of-sample projection)
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _reduce(X: np.ndarray, state: dict) -> np.ndarray:
+        Z = state["scaler"].transform(X)
+        if state["reducer"] is not None:
+            Z = state["reducer"].transform(Z)
+        return Z
+
+    @staticmethod
+    def fit_transform(X: np.ndarray, method: str, params: dict):
+        """Fits `method` on landmarks and embeds every row. Returns (embedding, state)."""
+        if method not in EmbeddingEngine.METHODS:
+            raise ValueError(f"Unknown embedding method: {method}. Available: {EmbeddingEngine.METHODS}")
+
+        n_rows = len(X)
+        n_components = int(params.get("n_components", 2))
+        n_landmarks = min(n_rows, int(params.get("n_landmarks", settings.FE_EMBED_LANDMARKS)))
+        if n_landmarks <= n_components + 1:
+            raise ValueError(f"Need more than {n_components + 1} rows to embed")
+
+        rng = np.random.default_rng(int(params.get("random_state", 42)))
+        landmarks = np.sort(rng.choice(n_rows, n_landmarks, replace=False)) if n_landmarks < n_rows else np.arange(n_rows)
+
+        state = {"method": method, "n_components": n_components, "n_landmarks": n_landmarks, "reducer": None}
+        state["scaler"] = StandardScaler().fit(X[landmarks])
+        Z = state["scaler"].transform(X[landmarks])
+        if Z.shape[1] > EmbeddingEngine.PRE_REDUCE_DIMS:
+            state["reducer"] = PCA(n_components=EmbeddingEngine.PRE_REDUCE_DIMS, svd_solver="randomized", random_state=42).fit(Z)
+            Z = state["reducer"].transform(Z)
+
+        if method == "tsne":
+            perplexity = float(params.get("perplexity", min(30.0, max(1.0, (n_landmarks - 1) / 3))))
+            landmark_embedding = TSNE(n_components=n_components, perplexity=perplexity, init="pca", random_state=42).fit_transform(Z)
+            state["landmark_embedding"] = landmark_embedding
+            state["index"] = NearestNeighbors(n_neighbors=min(EmbeddingEngine.INTERPOLATION_NEIGHBORS, n_landmarks)).fit(Z)
+        elif method == "isomap":
+            model = Isomap(n_neighbors=min(int(params.get("n_neighbors", 10)), n_landmarks - 1), n_components=n_components).fit(Z)
+            state["model"] = model
+            landmark_embedding = model.embedding_
+        else:
+            try:
+                import umap
+            except ImportError:
+                raise ValueError("UMAP requires the optional 'umap-learn' package")
+            model = umap.UMAP(n_components=n_components, n_neighbors=min(int(params.get("n_neighbors", 15)), n_landmarks - 1), random_state=42).fit(Z)
+            state["model"] = model
+            landmark_embedding = model.embedding_
+
+        embedding = np.empty((n_rows, n_components), dtype=np.float64)
+        rest = np.setdiff1d(np.arange(n_rows), landmarks, assume_unique=True)
+        if len(rest) > 0:
+            embedding[rest] = EmbeddingEngine.transform(X[rest], state)
+        embedding[landmarks] = landmark_embedding
+        return embedding, state
+
+    @staticmethod
+    def transform(X: np.ndarray, state: dict) -> np.ndarray:
+        """Projects rows onto a fitted embedding in fixed-size batches."""
+        out = np.empty((len(X), state["n_components"]), dtype=np.float64)
+        batch_rows = EmbeddingEngine.TRANSFORM_BATCH_ROWS
+        if state["method"] == "isomap":
+            # Isomap projects through a (batch x landmarks) geodesic distance matrix
+            batch_rows = max(1000, EmbeddingEngine.BATCH_BYTES // (8 * state["n_landmarks"]))
+        for start in range(0, len(X), batch_rows):
+            stop = start + batch_rows
+            Z = EmbeddingEngine._reduce(X[start:stop], state)
+            if state["method"] == "tsne":
+                distances, neighbors = state["index"].kneighbors(Z)
+                weights = 1.0 / (distances + 1e-12)
+                weights /= weights.sum(axis=1, keepdims=True)
+                out[start:stop] = np.einsum("ij,ijk->ik", weights, state["landmark_embedding"][neighbors])
+            else:
+                out[start:stop] = state["model"].transform(Z)
+        return out
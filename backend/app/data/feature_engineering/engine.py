@@ -1,3 +1,5 @@
+import os
+import joblib
 import pandas as pd
 import numpy as np
 from sklearn.preprocessing import (
@@ -5,9 +7,15 @@ from sklearn.preprocessing import (
     LabelEncoder, OneHotEncoder, PowerTransformer, QuantileTransformer,
     Normalizer, Binarizer, PolynomialFeatures, KBinsDiscretizer, FunctionTransformer
 )
-from sklearn.decomposition import PCA
+from scipy import sparse
 from fastapi import HTTPException
 
+from app.core.config import settings
+from app.data.feature_engineering.hashing import HashingEncoder
+from app.data.feature_engineering.target_encoding import MeanTargetEncoder
+from app.data.feature_engineering.embedding import EmbeddingEngine
+from app.data.feature_engineering.timeseries import TimeSeriesEngine
+
 class FeatureEngine:
     @staticmethod
     def get_recommendations(df: pd.DataFrame) -> list:
@@ -53,157 +61,389 @@ class FeatureEngine:
             
         return list(set(recommendations))
 
+    # ------------------------------------------------------------------
+    #   Output size estimation & guard
+    # ------------------------------------------------------------------
+
+    # Rows sampled to estimate the non-zero density of polynomial inputs
+    DENSITY_SAMPLE_ROWS = 10000
+
+    @staticmethod
+    def estimate_output(df: pd.DataFrame, operation: str, params: dict) -> dict:
+        """
+        Estimates the shape and memory footprint of an expanding operation before running it.
+        Sparse bytes assume pandas SparseArray storage (value + int32 index per non-zero).
+        """
+        n_rows = len(df)
+        is_sparse = bool(params.get("sparse", False))
+        numeric_default = df.select_dtypes(include=[np.number]).columns
+
+        if operation == "one_hot_encoding":
+            cols = [c for c in params.get("columns", []) if c in df.columns]
+            new_columns = int(sum(df[c].nunique() for c in cols))
+            nnz_per_row = len(cols)
+            itemsize = 1
+
+        elif operation == "hash_encoding" and (is_sparse or params.get("output") == "vector"):
+            cols = [c for c in params.get("columns", []) if c in df.columns]
+            n_buckets = int(params.get("n_buckets", 1000))
+            new_columns = n_buckets if params.get("shared", False) else n_buckets * len(cols)
+            nnz_per_row = len(cols)
+            itemsize = 1
+
+        elif operation in ("polynomial_features", "interaction_only"):
+            cols = [c for c in params.get("columns", numeric_default) if c in df.columns]
+            p = len(cols)
+            pairs = p * (p - 1) // 2
+            squares = 0 if operation == "interaction_only" else p
+            new_columns = p + pairs + squares
+
+            sample = df[cols].head(FeatureEngine.DENSITY_SAMPLE_ROWS).fillna(0)
+            density = float((sample != 0).to_numpy().mean()) if p and len(sample) else 0.0
+            # Products are non-zero only where both factors are
+            nnz_per_row = p * density + (pairs + squares) * density ** 2
+            itemsize = 8
+
+        else:
+            return {"operation": operation, "estimated": False}
+
+        dense_bytes = n_rows * new_columns * itemsize
+        sparse_bytes = int(n_rows * nnz_per_row * (itemsize + 4))
+        output_columns = len(df.columns) - len(cols) + new_columns
+        return {
+            "operation": operation,
+            "estimated": True,
+            "sparse": is_sparse,
+            "rows": n_rows,
+            "new_columns": new_columns,
+            "output_columns": output_columns,
+            "dense_bytes": dense_bytes,
+            "sparse_bytes": sparse_bytes,
+            "estimated_bytes": sparse_bytes if is_sparse else dense_bytes,
+        }
+
+    @staticmethod
+    def check_output_budget(df: pd.DataFrame, operation: str, params: dict) -> None:
+        """Refuses expansions whose estimated output exceeds the configured column / memory limits."""
+        estimate = FeatureEngine.estimate_output(df, operation, params)
+        if not estimate["estimated"]:
+            return
+
+        if estimate["output_columns"] > settings.FE_MAX_OUTPUT_COLUMNS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"'{operation}' would produce {estimate['output_columns']} columns "
+                       f"(limit {settings.FE_MAX_OUTPUT_COLUMNS}). Select fewer columns or use hashing."
+            )
+        if estimate["estimated_bytes"] > settings.FE_MAX_OUTPUT_BYTES:
+            hint = "" if estimate["sparse"] else f" Sparse output would need ~{estimate['sparse_bytes'] // 2**20} MB; pass \"sparse\": true."
+            raise HTTPException(
+                status_code=400,
+                detail=f"'{operation}' would need ~{estimate['estimated_bytes'] // 2**20} MB "
+                       f"(limit {settings.FE_MAX_OUTPUT_BYTES // 2**20} MB).{hint}"
+            )
+
+    @staticmethod
+    def _sparse_frame(matrix, columns, index) -> pd.DataFrame:
+        """Wraps a SciPy sparse matrix as SparseDtype columns without densifying."""
+        return pd.DataFrame.sparse.from_spmatrix(sparse.csc_matrix(matrix), index=index, columns=list(columns))
+
+    @staticmethod
+    def _sparse_input(df: pd.DataFrame, cols) -> sparse.csr_matrix:
+        if all(isinstance(df[c].dtype, pd.SparseDtype) for c in cols):
+            return df[cols].sparse.to_coo().tocsr()
+        return sparse.csr_matrix(df[cols].fillna(0).to_numpy(dtype=np.float64))
+
+    # ------------------------------------------------------------------
+    #   Fitted state (persisted per derived dataset for replay)
+    # ------------------------------------------------------------------
+
+    # Resolution of the quantile grid used to replay percentile_rank on new data
+    RANK_GRID_POINTS = 1001
+
+    @staticmethod
+    def state_path(file_path: str) -> str:
+        version = os.path.splitext(os.path.basename(file_path))[0]
+        return os.path.join(settings.ARTIFACT_DIR, f"fe_{version}.joblib")
+
+    @staticmethod
+    def save_state(state: dict, file_path: str) -> str:
+        path = FeatureEngine.state_path(file_path)
+        joblib.dump(state, path, compress=3)
+        return path
+
+    @staticmethod
+    def load_state(path: str) -> dict:
+        return joblib.load(path)
+
+    @staticmethod
+    def _columns(df: pd.DataFrame, params: dict, state: dict, fit: bool, numeric_default: bool = True) -> list:
+        """Resolves the target columns once at fit time; replay always uses the recorded list."""
+        if fit:
+            default = df.select_dtypes(include=[np.number]).columns if numeric_default else []
+            state["columns"] = list(params.get("columns", default))
+        return state["columns"]
+
+    @staticmethod
+    def _estimator_step(df: pd.DataFrame, cols: list, state: dict, fit: bool, factory, prepare=None) -> pd.DataFrame:
+        """Fits (or reuses) a column-wise sklearn transformer and writes its output back in place."""
+        if len(cols) > 0:
+            X = df[cols].fillna(0)
+            if prepare is not None:
+                X = prepare(X)
+            if fit:
+                state["estimator"] = factory().fit(X)
+            df[cols] = state["estimator"].transform(X)
+        return df
+
     @staticmethod
     def apply_feature_engineering(df: pd.DataFrame, operation: str, params: dict) -> pd.DataFrame:
+        processed, _ = FeatureEngine.fit_transform(df, operation, params)
+        return processed
+
+    @staticmethod
+    def fit_transform(df: pd.DataFrame, operation: str, params: dict):
+        """Applies an operation and returns (result, fitted_state) so the step can be replayed later."""
+        FeatureEngine.check_output_budget(df, operation, params)
+        state = {"operation": operation, "params": dict(params)}
+        return FeatureEngine._execute(df, operation, params, state, fit=True), state
+
+    @staticmethod
+    def transform(df: pd.DataFrame, state: dict) -> pd.DataFrame:
+        """Replays a fitted step on new data: one vectorized pass, no refit."""
+        missing = [c for c in state.get("columns", []) if c not in df.columns]
+        if missing:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Columns required by fitted '{state['operation']}' not found: {missing}"
+            )
+        return FeatureEngine._execute(df, state["operation"], state["params"], state, fit=False)
+
+    @staticmethod
+    def _execute(df: pd.DataFrame, operation: str, params: dict, state: dict, fit: bool) -> pd.DataFrame:
         df = df.copy()
         try:
             # --- SCALING ---
             if operation == "standard_scaler":
-                cols = params.get("columns", df.select_dtypes(include=[np.number]).columns)
-                if len(cols) > 0: df[cols] = StandardScaler().fit_transform(df[cols].fillna(0))
+                cols = FeatureEngine._columns(df, params, state, fit)
+                df = FeatureEngine._estimator_step(df, cols, state, fit, StandardScaler)
             
             elif operation == "minmax_scaler":
-                cols = params.get("columns", df.select_dtypes(include=[np.number]).columns)
-                if len(cols) > 0: df[cols] = MinMaxScaler().fit_transform(df[cols].fillna(0))
+                cols = FeatureEngine._columns(df, params, state, fit)
+                df = FeatureEngine._estimator_step(df, cols, state, fit, MinMaxScaler)
                 
             elif operation == "robust_scaler":
-                cols = params.get("columns", df.select_dtypes(include=[np.number]).columns)
-                if len(cols) > 0: df[cols] = RobustScaler().fit_transform(df[cols].fillna(0))
+                cols = FeatureEngine._columns(df, params, state, fit)
+                df = FeatureEngine._estimator_step(df, cols, state, fit, RobustScaler)
                 
             elif operation == "maxabs_scaler":
-                cols = params.get("columns", df.select_dtypes(include=[np.number]).columns)
-                if len(cols) > 0: df[cols] = MaxAbsScaler().fit_transform(df[cols].fillna(0))
+                cols = FeatureEngine._columns(df, params, state, fit)
+                df = FeatureEngine._estimator_step(df, cols, state, fit, MaxAbsScaler)
 
             # --- TRANSFORMS (DISTRIBUTION) ---
             elif operation == "log_transform":
-                cols = params.get("columns", df.select_dtypes(include=[np.number]).columns)
+                cols = FeatureEngine._columns(df, params, state, fit)
                 for col in cols:
                     # np.log1p is safer for 0 values, but still needs non-negative or handling
                     # We take abs to avoid errors, or clip.
                     df[col] = np.log1p(np.abs(df[col]))
 
             elif operation == "sqrt_transform":
-                cols = params.get("columns", df.select_dtypes(include=[np.number]).columns)
+                cols = FeatureEngine._columns(df, params, state, fit)
                 df[cols] = np.sqrt(np.abs(df[cols]))
 
             elif operation == "yeo_johnson":
                 # Handles positive and negative values
-                cols = params.get("columns", df.select_dtypes(include=[np.number]).columns)
-                pt = PowerTransformer(method='yeo-johnson')
-                if len(cols) > 0: df[cols] = pt.fit_transform(df[cols].fillna(0))
+                cols = FeatureEngine._columns(df, params, state, fit)
+                df = FeatureEngine._estimator_step(df, cols, state, fit, lambda: PowerTransformer(method='yeo-johnson'))
                 
             elif operation == "box_cox":
                 # Requires strictly positive input
-                cols = params.get("columns", df.select_dtypes(include=[np.number]).columns)
-                pt = PowerTransformer(method='box-cox')
-                # Shift data to be positive if needed
+                cols = FeatureEngine._columns(df, params, state, fit)
+                # Shift data to be positive if needed (shift is learned at fit time)
+                if fit:
+                    state["shifts"] = {}
+                    for col in cols:
+                        min_val = df[col].min()
+                        state["shifts"][col] = float(-min_val + 1e-6) if min_val <= 0 else 0.0
                 for col in cols:
-                    min_val = df[col].min()
-                    if min_val <= 0:
-                        df[col] = df[col] - min_val + 1e-6
-                if len(cols) > 0: df[cols] = pt.fit_transform(df[cols].fillna(0))
+                    if state["shifts"][col]:
+                        df[col] = df[col] + state["shifts"][col]
+                df = FeatureEngine._estimator_step(
+                    df, cols, state, fit, lambda: PowerTransformer(method='box-cox'),
+                    prepare=lambda X: X.clip(lower=1e-6)
+                )
 
             elif operation == "quantile_normal":
-                cols = params.get("columns", df.select_dtypes(include=[np.number]).columns)
-                qt = QuantileTransformer(output_distribution='normal')
-                if len(cols) > 0: df[cols] = qt.fit_transform(df[cols].fillna(0))
+                cols = FeatureEngine._columns(df, params, state, fit)
+                df = FeatureEngine._estimator_step(df, cols, state, fit, lambda: QuantileTransformer(output_distribution='normal'))
                 
             elif operation == "quantile_uniform":
-                cols = params.get("columns", df.select_dtypes(include=[np.number]).columns)
-                qt = QuantileTransformer(output_distribution='uniform')
-                if len(cols) > 0: df[cols] = qt.fit_transform(df[cols].fillna(0))
+                cols = FeatureEngine._columns(df, params, state, fit)
+                df = FeatureEngine._estimator_step(df, cols, state, fit, lambda: QuantileTransformer(output_distribution='uniform'))
                 
             elif operation == "l2_normalization":
-                cols = params.get("columns", df.select_dtypes(include=[np.number]).columns)
-                norm = Normalizer(norm='l2')
-                if len(cols) > 0: df[cols] = norm.fit_transform(df[cols].fillna(0))
+                cols = FeatureEngine._columns(df, params, state, fit)
+                df = FeatureEngine._estimator_step(df, cols, state, fit, lambda: Normalizer(norm='l2'))
 
             # --- ENCODING ---
             elif operation == "label_encoding":
-                cols = params.get("columns", [])
+                cols = [c for c in FeatureEngine._columns(df, params, state, fit, numeric_default=False) if c in df.columns]
+                if fit:
+                    state["columns"] = cols
+                    state["classes"] = {}
                 for col in cols:
-                    if col in df.columns:
+                    if fit:
                         le = LabelEncoder()
                         df[col] = le.fit_transform(df[col].astype(str))
+                        state["classes"][col] = le.classes_
+                    else:
+                        # Unseen labels map to -1
+                        df[col] = pd.Index(state["classes"][col]).get_indexer(df[col].astype(str))
 
             elif operation == "one_hot_encoding":
-                cols = params.get("columns", [])
+                cols = FeatureEngine._columns(df, params, state, fit, numeric_default=False)
                 if cols:
-                    df = pd.get_dummies(df, columns=cols, dummy_na=False)
+                    if fit:
+                        state["categories"] = {col: pd.Categorical(df[col].dropna()).categories for col in cols}
+                    else:
+                        # Fixed category set -> identical dummy columns; unseen values get all zeros
+                        for col in cols:
+                            df[col] = pd.Categorical(df[col], categories=state["categories"][col])
+                    if params.get("sparse", False):
+                        df = pd.get_dummies(df, columns=cols, dummy_na=False, sparse=True, dtype=np.uint8)
+                    else:
+                        df = pd.get_dummies(df, columns=cols, dummy_na=False)
 
             elif operation == "frequency_encoding":
-                cols = params.get("columns", [])
+                cols = FeatureEngine._columns(df, params, state, fit, numeric_default=False)
+                if fit:
+                    state["frequencies"] = {}
                 for col in cols:
-                     freq_map = df[col].value_counts(normalize=True)
-                     df[col] = df[col].map(freq_map)
+                    if fit:
+                        state["frequencies"][col] = df[col].value_counts(normalize=True)
+                    freq = df[col].map(state["frequencies"][col])
+                    if not fit:
+                        # Values never seen at fit time had frequency 0
+                        freq = freq.where(df[col].isna(), freq.fillna(0.0))
+                    df[col] = freq
             
             elif operation == "hash_encoding":
-                # Simple native hash
-                cols = params.get("columns", [])
+                # MurmurHash3 (seeded, process-independent) computed once per distinct value
+                cols = FeatureEngine._columns(df, params, state, fit, numeric_default=False)
+                n_buckets = int(params.get("n_buckets", 1000))
+                seed = int(params.get("seed", 0))
+                if params.get("sparse", False) or params.get("output") == "vector":
+                    # Hashing trick: one (signed) column per bucket, per column or in one shared space
+                    matrix, names = HashingEncoder.transform(
+                        df, cols, n_buckets,
+                        signed=params.get("signed", True),
+                        shared=params.get("shared", False),
+                        seed=seed
+                    )
+                    if params.get("sparse", False):
+                        hashed = FeatureEngine._sparse_frame(matrix, names, df.index)
+                    else:
+                        hashed = pd.DataFrame(matrix.toarray(), columns=names, index=df.index)
+                    df = pd.concat([df.drop(columns=cols), hashed], axis=1)
+                else:
+                    # Replace each column with its bucket id (-1 for missing)
+                    for col in cols:
+                        df[col] = HashingEncoder.bucket_ids(df[col], n_buckets, seed)
+
+            elif operation == "target_encoding":
+                # params: { "columns": [...], "target": "y", "n_folds": 5, "smoothing": 10, "random_state": 42 }
+                # Fit rows get out-of-fold means (no target leakage); replay uses the full-data table
+                cols = [c for c in FeatureEngine._columns(df, params, state, fit, numeric_default=False) if c != params["target"]]
+                if fit:
+                    state["columns"] = cols
+                    state["encodings"] = {}
                 for col in cols:
-                    df[col] = df[col].apply(lambda x: hash(str(x)) % 1000) # Bucket size 1000
+                    if fit:
+                        encoded, state["encodings"][col] = MeanTargetEncoder.fit_transform(
+                            df[col], df[params["target"]],
+                            n_folds=int(params.get("n_folds", 5)),
+                            smoothing=float(params.get("smoothing", 10.0)),
+                            random_state=int(params.get("random_state", 42))
+                        )
+                    else:
+                        encoded = MeanTargetEncoder.transform(df[col], state["encodings"][col])
+                    names = MeanTargetEncoder.output_names(col, state["encodings"][col]["labels"])
+                    if names == [col]:
+                        df[col] = encoded[:, 0]
+                    else:
+                        # Multiclass target: one probability column per class
+                        df = pd.concat([df.drop(columns=[col]), pd.DataFrame(encoded, columns=names, index=df.index)], axis=1)
 
             # --- GENERATION / INTERACTION ---
-            elif operation == "polynomial_features":
-                cols = params.get("columns", df.select_dtypes(include=[np.number]).columns)
+            elif operation in ("polynomial_features", "interaction_only"):
+                cols = FeatureEngine._columns(df, params, state, fit)
                 if len(cols) > 0:
-                    poly = PolynomialFeatures(degree=2, include_bias=False)
-                    poly_feats = poly.fit_transform(df[cols].fillna(0))
-                    # Create DF for new features
-                    new_cols = poly.get_feature_names_out(cols)
-                    poly_df = pd.DataFrame(poly_feats, columns=new_cols, index=df.index)
-                    # Join? Usually we replace or Append. Let's Append and Drop original to match user intent of 'transform'
-                    # Or better: keep all. But 'columns' implies selection.
-                    # Let's replace original with poly features to avoid explosion if they selected specific cols
-                    df = df.drop(columns=cols)
-                    df = pd.concat([df, poly_df], axis=1)
-
-            elif operation == "interaction_only":
-                cols = params.get("columns", df.select_dtypes(include=[np.number]).columns)
-                if len(cols) > 0:
-                    poly = PolynomialFeatures(degree=2, interaction_only=True, include_bias=False)
-                    poly_feats = poly.fit_transform(df[cols].fillna(0))
-                    new_cols = poly.get_feature_names_out(cols)
-                    poly_df = pd.DataFrame(poly_feats, columns=new_cols, index=df.index)
+                    if fit:
+                        state["estimator"] = PolynomialFeatures(
+                            degree=2, interaction_only=(operation == "interaction_only"), include_bias=False
+                        )
+                    poly = state["estimator"]
+                    if params.get("sparse", False):
+                        # Sparse in, sparse out: products of zeros are never materialized
+                        X = FeatureEngine._sparse_input(df, cols)
+                        poly_feats = poly.fit_transform(X) if fit else poly.transform(X)
+                        poly_df = FeatureEngine._sparse_frame(poly_feats, poly.get_feature_names_out(cols), df.index)
+                    else:
+                        X = df[cols].fillna(0)
+                        poly_feats = poly.fit_transform(X) if fit else poly.transform(X)
+                        # Create DF for new features
+                        new_cols = poly.get_feature_names_out(cols)
+                        poly_df = pd.DataFrame(poly_feats, columns=new_cols, index=df.index)
+                    # Replace original with poly features to avoid explosion if they selected specific cols
                     df = df.drop(columns=cols)
                     df = pd.concat([df, poly_df], axis=1)
 
             # --- DISCRETIZATION ---
             elif operation == "kbins_uniform":
-                cols = params.get("columns", df.select_dtypes(include=[np.number]).columns)
-                kb = KBinsDiscretizer(n_bins=5, encode='ordinal', strategy='uniform')
-                if len(cols) > 0: df[cols] = kb.fit_transform(df[cols].fillna(0))
+                cols = FeatureEngine._columns(df, params, state, fit)
+                df = FeatureEngine._estimator_step(df, cols, state, fit, lambda: KBinsDiscretizer(n_bins=5, encode='ordinal', strategy='uniform'))
 
             elif operation == "kbins_quantile":
-                cols = params.get("columns", df.select_dtypes(include=[np.number]).columns)
-                kb = KBinsDiscretizer(n_bins=5, encode='ordinal', strategy='quantile')
-                if len(cols) > 0: df[cols] = kb.fit_transform(df[cols].fillna(0))
+                cols = FeatureEngine._columns(df, params, state, fit)
+                df = FeatureEngine._estimator_step(df, cols, state, fit, lambda: KBinsDiscretizer(n_bins=5, encode='ordinal', strategy='quantile'))
                 
             elif operation == "kbins_kmeans":
-                 cols = params.get("columns", df.select_dtypes(include=[np.number]).columns)
-                 kb = KBinsDiscretizer(n_bins=5, encode='ordinal', strategy='kmeans')
-                 if len(cols) > 0: df[cols] = kb.fit_transform(df[cols].fillna(0))
+                cols = FeatureEngine._columns(df, params, state, fit)
+                df = FeatureEngine._estimator_step(df, cols, state, fit, lambda: KBinsDiscretizer(n_bins=5, encode='ordinal', strategy='kmeans'))
 
             elif operation == "binarizer":
-                cols = params.get("columns", df.select_dtypes(include=[np.number]).columns)
+                cols = FeatureEngine._columns(df, params, state, fit)
                 threshold = params.get("threshold", 0.0)
-                bn = Binarizer(threshold=threshold)
-                if len(cols) > 0: df[cols] = bn.fit_transform(df[cols].fillna(0))
+                df = FeatureEngine._estimator_step(df, cols, state, fit, lambda: Binarizer(threshold=threshold))
 
             # --- MISC ---
             elif operation == "sigmoid_transform":
-                cols = params.get("columns", df.select_dtypes(include=[np.number]).columns)
+                cols = FeatureEngine._columns(df, params, state, fit)
                 # Sigmoid = 1 / (1 + exp(-x))
                 for col in cols:
                     df[col] = 1 / (1 + np.exp(-df[col].fillna(0)))
 
             elif operation == "percentile_rank":
-                cols = params.get("columns", df.select_dtypes(include=[np.number]).columns)
+                cols = FeatureEngine._columns(df, params, state, fit)
+                probs = np.linspace(0.0, 1.0, FeatureEngine.RANK_GRID_POINTS)
+                if fit:
+                    state["quantiles"] = {}
                 for col in cols:
-                    df[col] = df[col].rank(pct=True)
+                    if fit:
+                        values = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+                        finite = values[np.isfinite(values)]
+                        state["quantiles"][col] = np.quantile(finite, probs) if len(finite) else np.zeros(len(probs))
+                        df[col] = df[col].rank(pct=True)
+                    else:
+                        # Rank against the training distribution via its quantile grid
+                        values = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+                        ranks = np.interp(values, state["quantiles"][col], probs)
+                        df[col] = np.where(np.isnan(values), np.nan, ranks)
 
             elif operation == "date_extraction":
-                cols = params.get("columns", [])
+                cols = [c for c in FeatureEngine._columns(df, params, state, fit, numeric_default=False) if c in df.columns]
+                state["columns"] = cols
                 for col in cols:
                     if col in df.columns:
                         series = pd.to_datetime(df[col], errors='coerce')
@@ -213,20 +453,74 @@ class FeatureEngine:
                         df[f"{col}_dow"] = series.dt.dayofweek
                         # Drop original? Keep for now or user can drop.
 
+            # --- TIME SERIES & GROUP FEATURES ---
+            elif operation == "lag_features":
+                # params: { "columns": [...], "entity": "user_id", "time": "ts", "lags": [1, 7], "leads": [1] }
+                cols = FeatureEngine._columns(df, params, state, fit, numeric_default=False)
+                entity, time = params.get("entity"), params.get("time")
+                if fit:
+                    state["columns"] = cols + [c for c in (entity, time) if c]
+                lagged = TimeSeriesEngine.lag_features(
+                    df, cols, entity, time,
+                    lags=[int(k) for k in params.get("lags", [1])],
+                    leads=[int(k) for k in params.get("leads", [])]
+                )
+                df = pd.concat([df, lagged], axis=1)
+
+            elif operation == "rolling_features":
+                # params: { "columns": [...], "entity", "time", "window": 7, "aggs": ["mean", "std"], "expanding": false }
+                cols = FeatureEngine._columns(df, params, state, fit)
+                entity, time = params.get("entity"), params.get("time")
+                cols = [c for c in cols if c not in (entity, time)]
+                if fit:
+                    state["columns"] = cols + [c for c in (entity, time) if c]
+                window = None if params.get("expanding", False) else int(params.get("window", 3))
+                rolled = TimeSeriesEngine.rolling_features(
+                    df, cols, entity, time, window,
+                    aggs=params.get("aggs", ["mean"]),
+                    min_periods=int(params.get("min_periods", 1))
+                )
+                df = pd.concat([df, rolled], axis=1)
+
+            elif operation == "time_since_last":
+                # params: { "time": "ts", "entity": "user_id", "event": "is_purchase" }
+                time, entity, event = params["time"], params.get("entity"), params.get("event")
+                if fit:
+                    state["columns"] = [c for c in (time, entity, event) if c]
+                df = pd.concat([df, TimeSeriesEngine.time_since_last(df, time, entity, event)], axis=1)
+
+            elif operation == "group_aggregate":
+                # params: { "keys": ["store"], "columns": [...], "aggs": ["mean", "count", "nunique"] }
+                keys = params["keys"] if isinstance(params["keys"], list) else [params["keys"]]
+                if fit:
+                    default = [c for c in df.select_dtypes(include=[np.number]).columns if c not in keys]
+                    cols = list(params.get("columns", default))
+                    state["columns"] = keys + cols
+                    # Fitted per-key table is what serving joins onto new rows
+                    state["table"] = TimeSeriesEngine.group_table(df, keys, cols, params.get("aggs", ["mean", "count"]))
+                df = pd.concat([df, TimeSeriesEngine.join_table(df, keys, state["table"])], axis=1)
+
             # --- DIMENSIONALITY REDUCTION ---
             elif operation == "pca":
                 # params: { "n_components": 2, "columns": [...] }
                 n_components = int(params.get("n_components", 2))
-                cols = params.get("columns", df.select_dtypes(include=[np.number]).columns)
+                cols = FeatureEngine._columns(df, params, state, fit)
                 
-                # PCA requires clean numeric data
-                features = df[cols].dropna() 
-                if len(features) < len(df):
-                     # Simple fill for now
-                     features = df[cols].fillna(0)
-
-                pca = PCA(n_components=n_components)
-                principal_components = pca.fit_transform(features)
+                is_sparse = all(isinstance(df[c].dtype, pd.SparseDtype) for c in cols)
+                if is_sparse:
+                    features = FeatureEngine._sparse_input(df, cols)
+                else:
+                    # PCA requires clean numeric data: mean imputation keeps gaps at the center
+                    if fit:
+                        state["fill_values"] = df[cols].mean().fillna(0)
+                    features = df[cols].fillna(state.get("fill_values", 0))
+                if fit:
+                    solver = params.get("solver", "auto")
+                    if solver == "auto":
+                        solver = EmbeddingEngine.choose_pca_solver(len(df), len(cols), n_components, is_sparse)
+                    state["solver"] = solver
+                    state["estimator"] = EmbeddingEngine.make_pca(solver, n_components, features.shape).fit(features)
+                principal_components = state["estimator"].transform(features)
                 
                 # Create new DF with PCs
                 pc_df = pd.DataFrame(data=principal_components, columns=[f'PC{i+1}' for i in range(n_components)])
@@ -235,10 +529,26 @@ class FeatureEngine:
                 df = df.drop(columns=cols)
                 df = pd.concat([df.reset_index(drop=True), pc_df], axis=1)
 
+            elif operation in EmbeddingEngine.METHODS:
+                # params: { "n_components": 2, "n_landmarks": 5000, "columns": [...] }
+                cols = FeatureEngine._columns(df, params, state, fit)
+                if fit:
+                    state["fill_values"] = df[cols].mean().fillna(0)
+                features = df[cols].fillna(state["fill_values"]).to_numpy(dtype=np.float64)
+                if fit:
+                    embedding, state["embedding"] = EmbeddingEngine.fit_transform(features, operation, params)
+                else:
+                    embedding = EmbeddingEngine.transform(features, state["embedding"])
+
+                prefix = {"tsne": "TSNE", "isomap": "ISOMAP", "umap": "UMAP"}[operation]
+                emb_df = pd.DataFrame(data=embedding, columns=[f'{prefix}{i+1}' for i in range(embedding.shape[1])])
+                df = df.drop(columns=cols)
+                df = pd.concat([df.reset_index(drop=True), emb_df], axis=1)
+
             else:
                 raise ValueError(f"Unknown operation: {operation}")
 
             return df
 
         except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Feature Engineering Failed: {str(e)}")
\ No newline at end of file
+            raise HTTPException(status_code=500, detail=f"Feature Engineering Failed: {str(e)}")
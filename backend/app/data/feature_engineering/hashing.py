@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.feature_extraction import FeatureHasher
+from typing import List, Tuple
+
+
+class HashingEncoder:
+    """
+    Hashing-trick encoder built on MurmurHash3 (via scikit-learn's FeatureHasher).
+    Unlike Python's builtin hash(), MurmurHash3 is independent of PYTHONHASHSEED,
+    so a value maps to the same bucket in every worker, restart and at inference.
+    Only the distinct values of a column are hashed; rows pick up their bucket
+    through the factorized codes, so the cost scales with cardinality, not rows.
+    Missing values hash to nothing (all-zero row / bucket -1).
+    """
+
+    @staticmethod
+    def _tokens(col: str, uniques: pd.Index, seed: int) -> List[str]:
+        # Prefixing the column name keeps equal values of different columns apart in a shared space
+        prefix = f"{seed}:{col}=" if seed else f"{col}="
+        return [prefix + str(u) for u in uniques]
+
+    @staticmethod
+    def hash_column(series: pd.Series, n_buckets: int, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns (bucket, sign) per row. Missing values get bucket -1 and sign 0.
+        """
+        codes, uniques = pd.factorize(series, use_na_sentinel=True)
+        if len(uniques) == 0:
+            return np.full(len(series), -1, dtype=np.int64), np.zeros(len(series), dtype=np.int8)
+
+        hasher = FeatureHasher(n_features=n_buckets, input_type="string", alternate_sign=True)
+        hashed = hasher.transform([[t] for t in HashingEncoder._tokens(str(series.name), uniques, seed)])
+        # One token per unique -> exactly one stored entry per row of the hashed matrix
+        unique_bucket = hashed.indices.astype(np.int64)
+        unique_sign = np.sign(hashed.data).astype(np.int8)
+
+        missing = codes < 0
+        bucket = np.where(missing, -1, unique_bucket[codes])
+        sign = np.where(missing, 0, unique_sign[codes]).astype(np.int8)
+        return bucket, sign
+
+    @staticmethod
+    def bucket_ids(series: pd.Series, n_buckets: int, seed: int = 0) -> np.ndarray:
+        bucket, _ = HashingEncoder.hash_column(series, n_buckets, seed)
+        return bucket
+
+    @staticmethod
+    def transform(df: pd.DataFrame, columns: List[str], n_buckets: int, signed: bool = True,
+                  shared: bool = False, seed: int = 0) -> Tuple[sparse.csr_matrix, List[str]]:
+        """
+        Hashes `columns` into a CSR matrix. With shared=True all columns land in one
+        n_buckets-wide space (colliding entries add up); otherwise each column gets its own block.
+        Signed hashing (+1/-1) keeps collisions unbiased in expectation.
+        """
+        n_rows = len(df)
+        if not columns:
+            return sparse.csr_matrix((n_rows, 0), dtype=np.int8), []
+        dtype = np.int8 if len(columns) < 128 else np.int16
+        rows, cols, vals = [], [], []
+
+        for j, col in enumerate(columns):
+            bucket, sign = HashingEncoder.hash_column(df[col], n_buckets, seed)
+            present = np.flatnonzero(bucket >= 0)
+            offset = 0 if shared else j * n_buckets
+            rows.append(present)
+            cols.append(bucket[present] + offset)
+            vals.append(sign[present] if signed else np.ones(len(present), dtype=np.int8))
+
+        width = n_buckets if shared else n_buckets * len(columns)
+        matrix = sparse.csr_matrix(
+            (np.concatenate(vals).astype(dtype), (np.concatenate(rows), np.concatenate(cols))),
+            shape=(n_rows, width)
+        )
+        matrix.sum_duplicates()
+        matrix.eliminate_zeros()
+
+        if shared:
+            names = [f"hash_{i}" for i in range(n_buckets)]
+        else:
+            names = [f"{col}_hash_{i}" for col in columns for i in range(n_buckets)]
+        return matrix, names
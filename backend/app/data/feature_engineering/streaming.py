@@ -0,0 +1,290 @@
+import os
+import math
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from typing import Iterator, List, Optional, Tuple
+from sklearn.preprocessing import (
+    StandardScaler, MinMaxScaler, MaxAbsScaler, RobustScaler,
+    QuantileTransformer, KBinsDiscretizer
+)
+from sklearn.decomposition import IncrementalPCA
+from sklearn.cluster import KMeans
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.data.analysis.sketches import QuantileSketch
+from app.data.feature_engineering.engine import FeatureEngine
+
+
+class StreamingFeatureEngine:
+    """
+    Out-of-core execution of feature engineering for datasets that do not fit in RAM.
+    Pass 1 streams only the target columns to fit: partial_fit for scalers,
+    IncrementalPCA for PCA, and quantile sketches for robust scaling, quantile
+    transforms and bin edges. Pass 2 replays the fitted state (the same state
+    FeatureEngine.transform uses) batch by batch straight into the output parquet.
+    Entity-ordered operations (lags, windows, group aggregates) instead hash-partition
+    rows by entity/key into temporary files and run one in-memory partition at a time;
+    output rows then come grouped by partition rather than in source order.
+    """
+
+    PARTIAL_FIT = {
+        "standard_scaler": StandardScaler,
+        "minmax_scaler": MinMaxScaler,
+        "maxabs_scaler": MaxAbsScaler,
+    }
+    SKETCHED = {"robust_scaler", "quantile_normal", "quantile_uniform", "kbins_uniform", "kbins_quantile", "kbins_kmeans"}
+    # Row-wise / stateless steps: fitting on the first batch yields the full state
+    FIT_ON_FIRST_CHUNK = {
+        "log_transform", "sqrt_transform", "sigmoid_transform", "l2_normalization",
+        "binarizer", "date_extraction", "hash_encoding"
+    }
+    # Need all rows of an entity / key together
+    PARTITIONED = {"lag_features", "rolling_features", "time_since_last", "group_aggregate"}
+    SUPPORTED = set(PARTIAL_FIT) | SKETCHED | FIT_ON_FIRST_CHUNK | PARTITIONED | {"pca"}
+
+    N_BINS = 5             # Matches FeatureEngine's KBinsDiscretizer settings
+    N_QUANTILES = 1000     # Matches QuantileTransformer's default
+
+    @staticmethod
+    def supports(operation: str, params: dict) -> bool:
+        return operation in StreamingFeatureEngine.SUPPORTED and not params.get("sparse", False)
+
+    @staticmethod
+    def iter_chunks(path: str, columns: Optional[List[str]] = None, chunk_rows: Optional[int] = None) -> Iterator[pd.DataFrame]:
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_rows or settings.FE_CHUNK_ROWS, columns=columns):
+            yield batch.to_pandas()
+
+    # ------------------------------------------------------------------
+    #   Pass 1: fit
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _fitted_attributes(estimator, cols: List[str]):
+        estimator.n_features_in_ = len(cols)
+        estimator.feature_names_in_ = np.array(cols, dtype=object)
+        return estimator
+
+    @staticmethod
+    def _bin_edges(operation: str, sketch: QuantileSketch) -> np.ndarray:
+        n_bins = StreamingFeatureEngine.N_BINS
+        if operation == "kbins_uniform":
+            edges = np.linspace(sketch.min, sketch.max, n_bins + 1)
+        elif operation == "kbins_quantile":
+            edges = sketch.quantiles(np.linspace(0.0, 1.0, n_bins + 1))
+        else:
+            # 1-D k-means on the weighted sketch points, seeded like KBinsDiscretizer (uniform centers)
+            values, weights = sketch.weighted_points()
+            uniform = np.linspace(sketch.min, sketch.max, n_bins + 1)
+            init = ((uniform[1:] + uniform[:-1]) * 0.5)[:, None]
+            km = KMeans(n_clusters=n_bins, init=init, n_init=1).fit(values[:, None], sample_weight=weights)
+            centers = np.sort(km.cluster_centers_[:, 0])
+            edges = np.r_[sketch.min, (centers[1:] + centers[:-1]) * 0.5, sketch.max]
+
+        # Drop bins too small to matter, as KBinsDiscretizer does
+        if operation != "kbins_uniform":
+            edges = edges[np.ediff1d(edges, to_begin=np.inf) > 1e-8]
+        return edges
+
+    @staticmethod
+    def _estimator_from_sketches(operation: str, cols: List[str], sketches: dict):
+        if operation == "robust_scaler":
+            scaler = RobustScaler()
+            q = np.array([sketches[c].quantiles([0.25, 0.5, 0.75]) for c in cols])
+            scale = q[:, 2] - q[:, 0]
+            scaler.center_ = q[:, 1]
+            scaler.scale_ = np.where(scale == 0, 1.0, scale)
+            return StreamingFeatureEngine._fitted_attributes(scaler, cols)
+
+        if operation in ("quantile_normal", "quantile_uniform"):
+            n_quantiles = StreamingFeatureEngine.N_QUANTILES
+            references = np.linspace(0.0, 1.0, n_quantiles)
+            qt = QuantileTransformer(output_distribution="normal" if operation == "quantile_normal" else "uniform")
+            qt.quantiles_ = np.column_stack([sketches[c].quantiles(references) for c in cols])
+            qt.references_ = references
+            qt.n_quantiles_ = n_quantiles
+            return StreamingFeatureEngine._fitted_attributes(qt, cols)
+
+        strategy = operation.split("_", 1)[1]
+        kb = KBinsDiscretizer(n_bins=StreamingFeatureEngine.N_BINS, encode="ordinal", strategy=strategy)
+        edges = [StreamingFeatureEngine._bin_edges(operation, sketches[c]) for c in cols]
+        kb.bin_edges_ = np.empty(len(cols), dtype=object)
+        kb.bin_edges_[:] = edges
+        kb.n_bins_ = np.array([len(e) - 1 for e in edges])
+        return StreamingFeatureEngine._fitted_attributes(kb, cols)
+
+    @staticmethod
+    def fit(path: str, operation: str, params: dict) -> dict:
+        """Streams the source once and returns a state replayable by FeatureEngine.transform."""
+        if not StreamingFeatureEngine.supports(operation, params):
+            raise HTTPException(status_code=400, detail=f"'{operation}' is not supported in chunked mode")
+
+        first = next(StreamingFeatureEngine.iter_chunks(path), None)
+        if first is None:
+            raise HTTPException(status_code=400, detail="Dataset is empty")
+
+        if operation in StreamingFeatureEngine.FIT_ON_FIRST_CHUNK:
+            _, state = FeatureEngine.fit_transform(first, operation, params)
+            return state
+
+        state = {"operation": operation, "params": dict(params)}
+        cols = FeatureEngine._columns(first, params, state, fit=True)
+        missing = [c for c in cols if c not in first.columns]
+        if missing:
+            raise HTTPException(status_code=400, detail=f"Columns not found: {missing}")
+        if len(cols) == 0:
+            return state
+        chunks = StreamingFeatureEngine.iter_chunks(path, columns=cols)
+
+        if operation in StreamingFeatureEngine.PARTIAL_FIT:
+            estimator = StreamingFeatureEngine.PARTIAL_FIT[operation]()
+            for chunk in chunks:
+                estimator.partial_fit(chunk.fillna(0))
+
+        elif operation == "pca":
+            n_components = int(params.get("n_components", 2))
+            # Mean imputation as in-memory PCA: a first pass collects the column means
+            sums, counts = pd.Series(0.0, index=cols), pd.Series(0, index=cols)
+            for chunk in chunks:
+                sums += chunk.sum()
+                counts += chunk.count()
+            state["fill_values"] = (sums / counts.where(counts > 0)).fillna(0)
+            estimator = IncrementalPCA(n_components=n_components)
+            # Every partial_fit batch needs at least n_components rows: hold one batch back
+            # so a short trailing batch can be folded into it
+            held = None
+            for chunk in StreamingFeatureEngine.iter_chunks(path, columns=cols):
+                chunk = chunk.fillna(state["fill_values"])
+                if held is not None and len(held) >= n_components and len(chunk) >= n_components:
+                    estimator.partial_fit(held)
+                    held = chunk
+                else:
+                    held = chunk if held is None else pd.concat([held, chunk], ignore_index=True)
+            if held is None or len(held) < n_components:
+                raise HTTPException(status_code=400, detail=f"PCA needs at least {n_components} rows")
+            estimator.partial_fit(held)
+
+        else:
+            sketches = {c: QuantileSketch() for c in cols}
+            for chunk in chunks:
+                chunk = chunk.fillna(0)
+                for c in cols:
+                    sketches[c].update(chunk[c].to_numpy(dtype=np.float64))
+            estimator = StreamingFeatureEngine._estimator_from_sketches(operation, cols, sketches)
+
+        state["estimator"] = estimator
+        return state
+
+    # ------------------------------------------------------------------
+    #   Pass 2: transform into the output parquet
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _open_writer(table: pa.Table, source_schema: pa.Schema, output_path: str) -> pq.ParquetWriter:
+        # An all-null first batch would otherwise pin a column to the null type
+        fields = [
+            source_schema.field(f.name) if pa.types.is_null(f.type) and f.name in source_schema.names else f
+            for f in table.schema
+        ]
+        return pq.ParquetWriter(output_path, pa.schema(fields, metadata=table.schema.metadata))
+
+    @staticmethod
+    def transform_to_parquet(source_path: str, state: dict, output_path: str) -> Tuple[int, int]:
+        """Applies a fitted state batch by batch. Returns (rows, columns) written."""
+        source_schema = pq.ParquetFile(source_path).schema_arrow
+        writer = None
+        rows, n_columns = 0, 0
+        try:
+            for chunk in StreamingFeatureEngine.iter_chunks(source_path):
+                out = FeatureEngine.transform(chunk, state)
+                table = pa.Table.from_pandas(out, preserve_index=False)
+                if writer is None:
+                    writer = StreamingFeatureEngine._open_writer(table, source_schema, output_path)
+                writer.write_table(table.cast(writer.schema))
+                rows += len(out)
+                n_columns = len(out.columns)
+        finally:
+            if writer is not None:
+                writer.close()
+        return rows, n_columns
+
+    # ------------------------------------------------------------------
+    #   Entity-partitioned execution
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def partition_keys(operation: str, params: dict) -> List[str]:
+        if operation == "group_aggregate":
+            keys = params.get("keys") or []
+            return keys if isinstance(keys, list) else [keys]
+        return [params["entity"]] if params.get("entity") else []
+
+    @staticmethod
+    def run_partitioned(source_path: str, operation: str, params: dict, output_path: str) -> Tuple[dict, int, int]:
+        keys = StreamingFeatureEngine.partition_keys(operation, params)
+        if not keys:
+            raise HTTPException(status_code=400, detail=f"Chunked '{operation}' needs an entity/key column to partition by")
+
+        source_schema = pq.ParquetFile(source_path).schema_arrow
+        missing = [k for k in keys if k not in source_schema.names]
+        if missing:
+            raise HTTPException(status_code=400, detail=f"Columns not found: {missing}")
+        n_partitions = max(1, math.ceil(os.path.getsize(source_path) / settings.FE_PARTITION_BYTES))
+        workdir = tempfile.mkdtemp(prefix="fe_partitions_", dir=settings.STORAGE_DIR)
+
+        try:
+            # Pass 1: scatter rows to partitions by key hash (all rows of a key land together)
+            writers = {}
+            try:
+                for chunk in StreamingFeatureEngine.iter_chunks(source_path):
+                    bucket = pd.util.hash_pandas_object(chunk[keys], index=False).to_numpy() % np.uint64(n_partitions)
+                    for p in np.unique(bucket):
+                        part = pa.Table.from_pandas(chunk[bucket == p], schema=source_schema, preserve_index=False)
+                        if p not in writers:
+                            writers[p] = pq.ParquetWriter(os.path.join(workdir, f"{p}.parquet"), source_schema)
+                        writers[p].write_table(part)
+            finally:
+                for w in writers.values():
+                    w.close()
+
+            # Pass 2: each partition fits in memory and is processed independently
+            writer, state, tables = None, None, []
+            rows, n_columns = 0, 0
+            try:
+                for p in sorted(writers):
+                    partition = pd.read_parquet(os.path.join(workdir, f"{p}.parquet"))
+                    out, state = FeatureEngine.fit_transform(partition, operation, params)
+                    if "table" in state:
+                        tables.append(state["table"])
+                    table = pa.Table.from_pandas(out, preserve_index=False)
+                    if writer is None:
+                        writer = StreamingFeatureEngine._open_writer(table, source_schema, output_path)
+                    writer.write_table(table.cast(writer.schema))
+                    rows += len(out)
+                    n_columns = len(out.columns)
+            finally:
+                if writer is not None:
+                    writer.close()
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+        if state is None:
+            raise HTTPException(status_code=400, detail="Dataset is empty")
+        if tables:
+            # Keys never span partitions, so the per-partition tables concatenate exactly
+            state["table"] = pd.concat(tables, ignore_index=True)
+        return state, rows, n_columns
+
+    @staticmethod
+    def run(source_path: str, operation: str, params: dict, output_path: str) -> Tuple[dict, int, int]:
+        """Executes an operation out-of-core. Returns (fitted_state, rows, columns)."""
+        if operation in StreamingFeatureEngine.PARTITIONED:
+            return StreamingFeatureEngine.run_partitioned(source_path, operation, params, output_path)
+        state = StreamingFeatureEngine.fit(source_path, operation, params)
+        rows, n_columns = StreamingFeatureEngine.transform_to_parquet(source_path, state, output_path)
+        return state, rows, n_columns
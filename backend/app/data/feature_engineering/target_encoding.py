@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+from typing import List, Tuple
+
+
+class MeanTargetEncoder:
+    """
+    Smoothed target (mean) encoding with K-fold out-of-fold estimates.
+    Training rows are encoded with statistics from the other folds only, so a
+    row never sees its own target. All folds come from a single bincount over
+    (level, fold) pairs, so cost is linear in rows and independent of how many
+    levels the column has. The full-data table is kept for serving.
+
+        encoding = (sum_y + smoothing * prior) / (count + smoothing)
+    """
+
+    @staticmethod
+    def target_matrix(y: pd.Series) -> Tuple[np.ndarray, list]:
+        """Numeric targets encode as-is; binary as P(second class); multiclass as one column per class."""
+        if pd.api.types.is_numeric_dtype(y) and not pd.api.types.is_bool_dtype(y) and y.nunique() > 2:
+            return y.to_numpy(dtype=np.float64, na_value=np.nan)[:, None], [None]
+
+        classes = sorted(y.dropna().unique().tolist(), key=str)
+        missing = y.isna().to_numpy()
+        labels = classes[1:] if len(classes) == 2 else classes
+        Y = np.column_stack([(y == c).to_numpy(dtype=np.float64) for c in labels]) if labels else np.empty((len(y), 0))
+        Y[missing] = np.nan
+        return Y, labels
+
+    @staticmethod
+    def fit_transform(series: pd.Series, y: pd.Series, n_folds: int = 5, smoothing: float = 10.0,
+                      random_state: int = 42) -> Tuple[np.ndarray, dict]:
+        """Returns (out-of-fold encodings [n_rows x n_outputs], fitted state)."""
+        # Missing values form their own level
+        codes, levels = pd.factorize(series, use_na_sentinel=False)
+        Y, labels = MeanTargetEncoder.target_matrix(y)
+        n_rows, n_levels = len(series), len(levels)
+        n_folds = max(2, min(int(n_folds), n_rows))
+
+        known = ~np.isnan(Y[:, 0]) if Y.shape[1] else np.zeros(n_rows, dtype=bool)
+        fold = np.random.default_rng(random_state).permutation(n_rows) % n_folds
+        key = (codes * n_folds + fold)[known]
+        size = n_levels * n_folds
+
+        counts = np.bincount(key, minlength=size).reshape(n_levels, n_folds).astype(np.float64)
+        count_total = counts.sum(axis=1)
+        fold_rows = counts.sum(axis=0)
+
+        encoded = np.empty((n_rows, len(labels)), dtype=np.float64)
+        table = np.empty((n_levels, len(labels)), dtype=np.float64)
+        prior = np.empty(len(labels), dtype=np.float64)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            for j in range(len(labels)):
+                sums = np.bincount(key, weights=Y[known, j], minlength=size).reshape(n_levels, n_folds)
+                sum_total = sums.sum(axis=1)
+                fold_sums = sums.sum(axis=0)
+                prior[j] = fold_sums.sum() / max(known.sum(), 1)
+
+                # Out-of-fold: everything except the row's own fold (prior included)
+                oof_prior = (fold_sums.sum() - fold_sums) / np.maximum(known.sum() - fold_rows, 1)
+                oof_count = count_total[:, None] - counts
+                oof = (sum_total[:, None] - sums + smoothing * oof_prior) / (oof_count + smoothing)
+                oof = np.where(oof_count + smoothing > 0, oof, oof_prior)
+                encoded[:, j] = oof[codes, fold]
+
+                full = (sum_total + smoothing * prior[j]) / (count_total + smoothing)
+                table[:, j] = np.where(count_total + smoothing > 0, full, prior[j])
+
+        state = {"levels": pd.Index(levels), "table": table, "prior": prior, "labels": labels}
+        return encoded, state
+
+    @staticmethod
+    def transform(series: pd.Series, state: dict) -> np.ndarray:
+        """Looks values up in the full-data table; unseen levels get the prior."""
+        idx = state["levels"].get_indexer(series)
+        encoded = state["table"][np.maximum(idx, 0)]
+        unseen = idx < 0
+        if unseen.any():
+            encoded[unseen] = state["prior"]
+        return encoded
+
+    @staticmethod
+    def output_names(col: str, labels: List) -> List[str]:
+        if len(labels) == 1:
+            return [col]
+        return [f"{col}_te_{label}" for label in labels]
@@ -0,0 +1,215 @@
+import numpy as np
+import pandas as pd
+from typing import List, Optional
+
+
+class TimeSeriesEngine:
+    """
+    Entity/time-ordered and group-level feature kernels.
+    Rows are sorted once by (entity, time); every kernel then works on the sorted
+    arrays with index arithmetic bounded by each row's group start/end, so the
+    cost is one sort plus linear passes, never a Python loop per entity.
+    """
+
+    ROLLING_AGGS = ["mean", "sum", "count", "std", "min", "max"]
+    GROUP_AGGS = ["mean", "sum", "count", "nunique", "std", "min", "max"]
+
+    @staticmethod
+    def _time_values(series: pd.Series) -> np.ndarray:
+        """Sortable float view of a time column (seconds for datetimes)."""
+        if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            return series.to_numpy(dtype=np.float64, na_value=np.nan)
+        if not pd.api.types.is_datetime64_any_dtype(series):
+            series = pd.to_datetime(series, errors="coerce")
+        epoch = pd.Timestamp(0, tz=series.dt.tz)
+        return (series - epoch).dt.total_seconds().to_numpy(dtype=np.float64, na_value=np.nan)
+
+    @staticmethod
+    def _layout(df: pd.DataFrame, entity: Optional[str], time: Optional[str]) -> dict:
+        """Sort order plus, per sorted position, the first and last position of its entity."""
+        n = len(df)
+        codes = pd.factorize(df[entity])[0] if entity else np.zeros(n, dtype=np.int64)
+        if time:
+            # lexsort: last key is primary; missing times sort last within an entity
+            order = np.lexsort((TimeSeriesEngine._time_values(df[time]), codes))
+        else:
+            order = np.argsort(codes, kind="stable")
+
+        sorted_codes = codes[order]
+        positions = np.arange(n)
+        starts = np.r_[True, sorted_codes[1:] != sorted_codes[:-1]] if n else np.empty(0, dtype=bool)
+        ends = np.r_[sorted_codes[1:] != sorted_codes[:-1], True] if n else np.empty(0, dtype=bool)
+        group_start = np.maximum.accumulate(np.where(starts, positions, 0)) if n else positions
+        group_end = np.minimum.accumulate(np.where(ends, positions, n)[::-1])[::-1] if n else positions
+        return {"order": order, "codes": sorted_codes, "start": group_start, "end": group_end}
+
+    @staticmethod
+    def _unsort(values: np.ndarray, order: np.ndarray) -> np.ndarray:
+        out = np.empty_like(values)
+        out[order] = values
+        return out
+
+    # ------------------------------------------------------------------
+    #   Lag / lead
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def lag_features(df: pd.DataFrame, columns: List[str], entity: Optional[str], time: Optional[str],
+                     lags: List[int], leads: List[int]) -> pd.DataFrame:
+        layout = TimeSeriesEngine._layout(df, entity, time)
+        order = layout["order"]
+        positions = np.arange(len(df))
+        out = {}
+
+        for col in columns:
+            values = df[col].to_numpy()[order]
+            numeric = pd.api.types.is_numeric_dtype(df[col]) and not pd.api.types.is_bool_dtype(df[col])
+            if numeric:
+                values = values.astype(np.float64)
+            for k, name in [(k, f"{col}_lag{k}") for k in lags] + [(-k, f"{col}_lead{k}") for k in leads]:
+                source = positions - k
+                valid = source >= layout["start"] if k > 0 else source <= layout["end"]
+                shifted = np.full(len(df), np.nan) if numeric else np.full(len(df), None, dtype=object)
+                shifted[valid] = values[source[valid]]
+                out[name] = TimeSeriesEngine._unsort(shifted, order)
+
+        return pd.DataFrame(out, index=df.index)
+
+    # ------------------------------------------------------------------
+    #   Rolling / expanding windows
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def rolling_features(df: pd.DataFrame, columns: List[str], entity: Optional[str], time: Optional[str],
+                         window: Optional[int], aggs: List[str], min_periods: int = 1) -> pd.DataFrame:
+        """Trailing window of `window` rows per entity (window=None -> expanding)."""
+        layout = TimeSeriesEngine._layout(df, entity, time)
+        order = layout["order"]
+        positions = np.arange(len(df))
+        window_start = layout["start"] if window is None else np.maximum(positions - window + 1, layout["start"])
+        label = "expanding" if window is None else f"roll{window}"
+        out = {}
+
+        for col in columns:
+            x = df[col].to_numpy(dtype=np.float64, na_value=np.nan)[order]
+            valid = ~np.isnan(x)
+            # Centering keeps prefix sums well conditioned
+            center = float(np.nanmean(x)) if valid.any() else 0.0
+            xc = np.where(valid, x - center, 0.0)
+
+            csum = np.r_[0.0, np.cumsum(xc)]
+            ccount = np.r_[0, np.cumsum(valid)]
+            csq = np.r_[0.0, np.cumsum(xc * xc)]
+            s = csum[positions + 1] - csum[window_start]
+            count = (ccount[positions + 1] - ccount[window_start]).astype(np.float64)
+            enough = count >= max(min_periods, 1)
+
+            with np.errstate(invalid="ignore", divide="ignore"):
+                for agg in aggs:
+                    if agg == "count":
+                        result = np.where(enough, count, np.nan)
+                    elif agg == "sum":
+                        result = np.where(enough, s + count * center, np.nan)
+                    elif agg == "mean":
+                        result = np.where(enough, s / count + center, np.nan)
+                    elif agg == "std":
+                        sq = csq[positions + 1] - csq[window_start]
+                        var = np.clip((sq - s * s / count) / (count - 1), 0.0, None)
+                        result = np.where(enough & (count > 1), np.sqrt(var), np.nan)
+                    elif agg in ("min", "max"):
+                        # Monotonic-deque kernels in pandas' Cython rolling; groups are contiguous once sorted
+                        grouped = pd.Series(x).groupby(layout["codes"], sort=False)
+                        roller = grouped.expanding(min_periods=min_periods) if window is None else grouped.rolling(window, min_periods=min_periods)
+                        result = getattr(roller, agg)().to_numpy()
+                    else:
+                        raise ValueError(f"Unknown rolling aggregate: {agg}. Available: {TimeSeriesEngine.ROLLING_AGGS}")
+                    out[f"{col}_{label}_{agg}"] = TimeSeriesEngine._unsort(np.asarray(result, dtype=np.float64), order)
+
+        return pd.DataFrame(out, index=df.index)
+
+    # ------------------------------------------------------------------
+    #   Time since last event
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def time_since_last(df: pd.DataFrame, time: str, entity: Optional[str], event: Optional[str] = None) -> pd.DataFrame:
+        """Time elapsed since the entity's previous event (seconds for datetime columns)."""
+        layout = TimeSeriesEngine._layout(df, entity, time)
+        order = layout["order"]
+        t = TimeSeriesEngine._time_values(df[time])[order]
+        positions = np.arange(len(df))
+
+        is_event = ~np.isnan(t)
+        if event:
+            is_event &= df[event].fillna(False).astype(bool).to_numpy()[order]
+
+        # Position of the latest event at or before each row, then strictly before it
+        last = np.maximum.accumulate(np.where(is_event, positions, -1)) if len(df) else positions
+        previous = np.r_[-1, last[:-1]] if len(df) else positions
+        valid = previous >= layout["start"]
+
+        elapsed = np.full(len(df), np.nan)
+        elapsed[valid] = t[valid] - t[previous[valid]]
+        name = f"{time}_since_last" + (f"_{event}" if event else "")
+        return pd.DataFrame({name: TimeSeriesEngine._unsort(elapsed, order)}, index=df.index)
+
+    # ------------------------------------------------------------------
+    #   Group aggregates
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def group_table(df: pd.DataFrame, keys: List[str], columns: List[str], aggs: List[str]) -> pd.DataFrame:
+        """One row per key combination with the requested aggregates (bincount passes over group codes)."""
+        codes = df.groupby(keys, sort=False, dropna=False).ngroup().to_numpy()
+        table = df[keys].drop_duplicates().reset_index(drop=True)
+        n_groups = len(table)
+        prefix = "_".join(keys)
+
+        table[f"{prefix}_size"] = np.bincount(codes, minlength=n_groups)
+        for col in columns:
+            name = f"{col}_by_{prefix}"
+            if "nunique" in aggs:
+                pairs = pd.DataFrame({"g": codes, "v": df[col].to_numpy()}).dropna().drop_duplicates()
+                table[f"{name}_nunique"] = np.bincount(pairs["g"].to_numpy(), minlength=n_groups)
+
+            numeric_aggs = [a for a in aggs if a != "nunique"]
+            if not (pd.api.types.is_numeric_dtype(df[col]) or pd.api.types.is_bool_dtype(df[col])):
+                # Categorical values only support counting
+                if "count" in numeric_aggs:
+                    table[f"{name}_count"] = np.bincount(codes, weights=df[col].notna().to_numpy(), minlength=n_groups)
+                continue
+            if not numeric_aggs:
+                continue
+            x = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+            valid = ~np.isnan(x)
+            count = np.bincount(codes, weights=valid, minlength=n_groups)
+            total = np.bincount(codes, weights=np.where(valid, x, 0.0), minlength=n_groups)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                mean = total / count
+                for agg in numeric_aggs:
+                    if agg == "count":
+                        result = count
+                    elif agg == "sum":
+                        result = total
+                    elif agg == "mean":
+                        result = mean
+                    elif agg == "std":
+                        dev = np.where(valid, x - mean[codes], 0.0)
+                        result = np.sqrt(np.bincount(codes, weights=dev * dev, minlength=n_groups) / (count - 1))
+                        result[count < 2] = np.nan
+                    elif agg in ("min", "max"):
+                        result = getattr(pd.Series(x).groupby(codes), agg)().reindex(range(n_groups)).to_numpy()
+                    else:
+                        raise ValueError(f"Unknown group aggregate: {agg}. Available: {TimeSeriesEngine.GROUP_AGGS}")
+                    table[f"{name}_{agg}"] = result
+        return table
+
+    @staticmethod
+    def join_table(df: pd.DataFrame, keys: List[str], table: pd.DataFrame) -> pd.DataFrame:
+        """Left hash-join of the aggregate table onto the rows; unseen keys get NaN (size/count 0)."""
+        joined = df[keys].merge(table, on=keys, how="left").drop(columns=keys)
+        joined.index = df.index
+        for col in joined.columns:
+            if col.endswith("_size") or col.endswith("_count") or col.endswith("_nunique"):
+                joined[col] = joined[col].fillna(0)
+        return joined
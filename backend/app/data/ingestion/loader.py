@@ -3,6 +3,7 @@ import io
 from fastapi import UploadFile, HTTPException
 import os
 from app.core.config import settings
+from app.data.analysis.profile import DatasetProfiler
 import uuid
 
 class IngestionEngine:
@@ -37,6 +38,7 @@ class IngestionEngine:
 
         # 4. Save as Parquet (Internal Format)
         df.to_parquet(save_path, index=False)
+        DatasetProfiler.try_save(df, save_path)
 
         # 5. Return Metadata
         return {
@@ -0,0 +1,115 @@
+import json
+import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from scipy import sparse
+from typing import List, Optional
+
+# Parquet schema metadata key listing columns that must be restored as pandas SparseDtype
+SPARSE_METADATA_KEY = b"ds_forge.sparse_columns"
+
+
+class DatasetStore:
+    """
+    Parquet persistence that understands pandas SparseDtype columns.
+    Parquet has no sparse type, so sparse columns are written densified one row
+    chunk at a time (run-length/dictionary encoding keeps mostly-zero columns
+    tiny on disk) and flagged in the schema metadata so they are rebuilt as
+    sparse columns on read without ever materializing the dense frame.
+    """
+
+    # Target size of one densified row chunk while writing
+    WRITE_CHUNK_BYTES = 64 * 1024 * 1024
+
+    @staticmethod
+    def sparse_columns(df: pd.DataFrame) -> List[str]:
+        return [c for c in df.columns if isinstance(df[c].dtype, pd.SparseDtype)]
+
+    @staticmethod
+    def write(df: pd.DataFrame, path: str) -> None:
+        sparse_cols = DatasetStore.sparse_columns(df)
+        if not sparse_cols:
+            df.to_parquet(path, index=False)
+            return
+
+        fill_values = {str(c): df[c].dtype.fill_value for c in sparse_cols}
+        subtypes = [df[c].dtype.subtype for c in sparse_cols]
+        dense_cols = [c for c in df.columns if c not in set(sparse_cols)]
+        sparse_block = df[sparse_cols].sparse.to_coo().tocsr() if all(
+            f == 0 for f in fill_values.values()) else None
+
+        bytes_per_row = max(1, sum(np.dtype(t).itemsize for t in subtypes) + 8 * len(dense_cols))
+        chunk_rows = max(1, DatasetStore.WRITE_CHUNK_BYTES // bytes_per_row)
+
+        writer = None
+        try:
+            for start in range(0, max(len(df), 1), chunk_rows):
+                stop = start + chunk_rows
+                arrays = {}
+                if dense_cols:
+                    dense_table = pa.Table.from_pandas(df.iloc[start:stop][dense_cols], preserve_index=False)
+                    arrays.update(zip(dense_table.column_names, dense_table.columns))
+
+                if sparse_block is not None:
+                    # Zero-filled columns (one-hot, hashing, polynomial): densify the row slice via scipy
+                    block = sparse_block[start:stop].toarray()
+                    for j, c in enumerate(sparse_cols):
+                        arrays[str(c)] = pa.array(block[:, j].astype(subtypes[j], copy=False))
+                else:
+                    for c in sparse_cols:
+                        arrays[str(c)] = pa.array(np.asarray(df[c].iloc[start:stop].sparse.to_dense()))
+
+                names = [str(c) for c in df.columns]
+                table = pa.Table.from_arrays([arrays[c] for c in names], names=names)
+                if writer is None:
+                    metadata = {SPARSE_METADATA_KEY: json.dumps(fill_values, default=float).encode()}
+                    writer = pq.ParquetWriter(path, table.schema.with_metadata(metadata), use_dictionary=True)
+                writer.write_table(table.cast(writer.schema))
+        finally:
+            if writer is not None:
+                writer.close()
+
+    @staticmethod
+    def read(path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        parquet_file = pq.ParquetFile(path)
+        metadata = parquet_file.schema_arrow.metadata or {}
+        if SPARSE_METADATA_KEY not in metadata:
+            return pd.read_parquet(path, columns=columns)
+
+        fill_values = json.loads(metadata[SPARSE_METADATA_KEY])
+        all_cols = parquet_file.schema_arrow.names
+        wanted = columns or all_cols
+        sparse_cols = [c for c in wanted if c in fill_values]
+        dense_cols = [c for c in wanted if c not in fill_values]
+
+        df = pq.read_table(path, columns=dense_cols).to_pandas() if dense_cols else pd.DataFrame(index=pd.RangeIndex(parquet_file.metadata.num_rows))
+
+        if sparse_cols:
+            # Rebuild the sparse block row group by row group, keeping only non-fill entries
+            rows, cols, vals = [], [], []
+            offset = 0
+            subtypes = {}
+            for i in range(parquet_file.num_row_groups):
+                chunk = parquet_file.read_row_group(i, columns=sparse_cols)
+                for j, c in enumerate(sparse_cols):
+                    values = chunk.column(j).to_numpy(zero_copy_only=False)
+                    subtypes.setdefault(c, values.dtype)
+                    fill = fill_values[c]
+                    keep = ~pd.isna(values) if pd.isna(fill) else values != fill
+                    idx = np.flatnonzero(keep)
+                    rows.append(idx + offset)
+                    cols.append(np.full(len(idx), j, dtype=np.int64))
+                    vals.append(values[idx])
+                offset += chunk.num_rows
+
+            matrix = sparse.csc_matrix(
+                (np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))),
+                shape=(offset, len(sparse_cols))
+            )
+            sparse_df = pd.DataFrame.sparse.from_spmatrix(matrix, columns=sparse_cols)
+            sparse_df = sparse_df.astype({c: pd.SparseDtype(subtypes[c], fill_values[c]) for c in sparse_cols})
+            df = pd.concat([df.reset_index(drop=True), sparse_df], axis=1)
+
+        # Restore the original column order
+        return df[[c for c in wanted if c in df.columns]]
@@ -0,0 +1,247 @@
+import os
+import re
+import json
+import hashlib
+import operator
+import pandas as pd
+import numpy as np
+from typing import List, Dict, Optional
+
+from app.core.config import settings
+from app.data.analysis.profile import DatasetProfiler
+
+
+class QualityEngine:
+    """
+    Declarative data-quality rules evaluated in one fused, vectorized scan.
+    Rules referencing the same column share the derived arrays (null mask,
+    numeric view, string view), and only the referenced columns are read.
+    Results are cached per dataset version and reused on derived datasets
+    for every rule whose columns are unchanged (same content fingerprint).
+    """
+
+    RULE_TYPES = ["not_null", "range", "regex", "unique", "allowed_values", "compare"]
+
+    COMPARE_OPERATORS = {
+        "<": operator.lt,
+        "<=": operator.le,
+        ">": operator.gt,
+        ">=": operator.ge,
+        "==": operator.eq,
+        "!=": operator.ne,
+    }
+
+    SAMPLE_ROWS = 5
+
+    @staticmethod
+    def validate_rule(rule_type: str, column: str, params: dict) -> None:
+        if rule_type not in QualityEngine.RULE_TYPES:
+            raise ValueError(f"Unknown rule type: {rule_type}. Available: {QualityEngine.RULE_TYPES}")
+        if not column and not (rule_type == "unique" and params.get("columns")):
+            raise ValueError("Rule requires a column")
+
+        if rule_type == "range" and params.get("min") is None and params.get("max") is None:
+            raise ValueError("Range rule requires 'min' and/or 'max'")
+        if rule_type == "regex":
+            re.compile(params.get("pattern") or "")
+        if rule_type == "allowed_values" and not isinstance(params.get("values"), list):
+            raise ValueError("Allowed-values rule requires a 'values' list")
+        if rule_type == "compare":
+            if params.get("operator") not in QualityEngine.COMPARE_OPERATORS:
+                raise ValueError(f"Compare rule requires 'operator' in {list(QualityEngine.COMPARE_OPERATORS)}")
+            if not params.get("other_column"):
+                raise ValueError("Compare rule requires 'other_column'")
+
+    @staticmethod
+    def rule_columns(rule: dict) -> List[str]:
+        params = rule.get("params") or {}
+        if rule["rule_type"] == "unique" and params.get("columns"):
+            return list(params["columns"])
+        if rule["rule_type"] == "compare":
+            return [rule["column"], params["other_column"]]
+        return [rule["column"]]
+
+    @staticmethod
+    def rule_signature(rule: dict) -> str:
+        spec = {"rule_type": rule["rule_type"], "column": rule.get("column"), "params": rule.get("params") or {}}
+        return hashlib.sha1(json.dumps(spec, sort_keys=True, default=str).encode()).hexdigest()
+
+    # ------------------------------------------------------------------
+    #   Fused evaluation
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def evaluate(df: pd.DataFrame, rules: List[dict]) -> Dict[str, dict]:
+        """Evaluates all rules over the loaded columns. Returns results keyed by rule signature."""
+        n_rows = len(df)
+        derived = {}
+
+        def view(kind: str, col: str):
+            key = (kind, col)
+            if key not in derived:
+                if kind == "notna":
+                    derived[key] = df[col].notna().to_numpy()
+                elif kind == "numeric":
+                    series = df[col]
+                    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+                        derived[key] = series.to_numpy(dtype=np.float64, na_value=np.nan)
+                    else:
+                        derived[key] = pd.to_numeric(series, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+                elif kind == "string":
+                    derived[key] = df[col].astype(str)
+            return derived[key]
+
+        results = {}
+        for rule in rules:
+            params = rule.get("params") or {}
+            rule_type = rule["rule_type"]
+            col = rule.get("column")
+            signature = QualityEngine.rule_signature(rule)
+
+            missing = [c for c in QualityEngine.rule_columns(rule) if c not in df.columns]
+            if missing:
+                results[signature] = {
+                    "violations": n_rows,
+                    "violation_rate": 1.0 if n_rows else 0.0,
+                    "passed": False,
+                    "sample_rows": [],
+                    "error": f"Column(s) not found: {missing}"
+                }
+                continue
+
+            if rule_type == "not_null":
+                ok = view("notna", col)
+
+            elif rule_type == "range":
+                values = view("numeric", col)
+                ok = np.ones(n_rows, dtype=bool)
+                with np.errstate(invalid="ignore"):
+                    if params.get("min") is not None:
+                        ok = ok & (values >= float(params["min"]))
+                    if params.get("max") is not None:
+                        ok = ok & (values <= float(params["max"]))
+                # Nulls are the not_null rule's concern; non-numeric values fail
+                ok = ok | ~view("notna", col)
+
+            elif rule_type == "regex":
+                strings = view("string", col)
+                matcher = strings.str.fullmatch if params.get("full_match", True) else strings.str.contains
+                ok = matcher(params.get("pattern") or "").to_numpy(dtype=bool, na_value=False)
+                ok = ok | ~view("notna", col)
+
+            elif rule_type == "unique":
+                cols = params.get("columns") or [col]
+                ok = ~df.duplicated(subset=cols, keep=False).to_numpy()
+
+            elif rule_type == "allowed_values":
+                ok = df[col].isin(params.get("values") or []).to_numpy()
+                ok = ok | ~view("notna", col)
+
+            elif rule_type == "compare":
+                other = params["other_column"]
+                op = QualityEngine.COMPARE_OPERATORS[params["operator"]]
+                left, right = df[col], df[other]
+                if pd.api.types.is_numeric_dtype(left) or pd.api.types.is_numeric_dtype(right):
+                    # Mixed numeric / text pairs compare as numbers: text that does not parse fails
+                    left, right = view("numeric", col), view("numeric", other)
+                    with np.errstate(invalid="ignore"):
+                        ok = op(left, right)
+                else:
+                    try:
+                        ok = op(left, right).to_numpy(dtype=bool)
+                    except TypeError:
+                        # Incomparable dtypes (e.g. dates vs text, differing categoricals): compare as text
+                        ok = op(view("string", col), view("string", other)).to_numpy(dtype=bool)
+                ok = ok | ~(view("notna", col) & view("notna", other))
+
+            else:
+                raise ValueError(f"Unknown rule type: {rule_type}")
+
+            violations = int(n_rows - np.count_nonzero(ok))
+            results[signature] = {
+                "violations": violations,
+                "violation_rate": violations / n_rows if n_rows else 0.0,
+                "passed": violations == 0,
+                "sample_rows": np.flatnonzero(~ok)[:QualityEngine.SAMPLE_ROWS].tolist(),
+            }
+
+        return results
+
+    # ------------------------------------------------------------------
+    #   Cached / incremental checking
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def cache_path(file_path: str) -> str:
+        version = os.path.splitext(os.path.basename(file_path))[0]
+        return os.path.join(settings.ARTIFACT_DIR, f"quality_{version}.json")
+
+    @staticmethod
+    def _load_cache(file_path: Optional[str]) -> dict:
+        if not file_path:
+            return {}
+        path = QualityEngine.cache_path(file_path)
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    @staticmethod
+    def check(rules: List[dict], file_path: str, parent_file_path: Optional[str] = None) -> List[dict]:
+        """
+        Checks rules against a dataset version. Each rule is answered from, in order:
+        this version's cache, the parent's cache when all its columns are unchanged,
+        or one fused scan over only the columns the remaining rules reference.
+        """
+        cache = QualityEngine._load_cache(file_path)
+        parent_cache = QualityEngine._load_cache(parent_file_path)
+
+        profile = DatasetProfiler.load_or_build(file_path)
+        parent_profile = None
+        if parent_cache and parent_file_path and os.path.exists(parent_file_path):
+            parent_profile = DatasetProfiler.load_or_build(parent_file_path)
+
+        def unchanged(cols: List[str]) -> bool:
+            if parent_profile is None:
+                return False
+            for c in cols:
+                mine = profile["columns"].get(c, {}).get("fingerprint")
+                theirs = parent_profile["columns"].get(c, {}).get("fingerprint")
+                if mine is None or mine != theirs:
+                    return False
+            return True
+
+        resolved, pending = {}, []
+        for rule in rules:
+            signature = QualityEngine.rule_signature(rule)
+            if signature in cache:
+                resolved[signature] = dict(cache[signature], source="cache")
+            elif signature in parent_cache and unchanged(QualityEngine.rule_columns(rule)):
+                resolved[signature] = dict(parent_cache[signature], source="parent")
+            else:
+                pending.append(rule)
+
+        if pending:
+            needed = {c for rule in pending for c in QualityEngine.rule_columns(rule)}
+            present = [c for c in profile["columns"] if c in needed]
+            df = pd.read_parquet(file_path, columns=present) if present else pd.DataFrame(index=range(profile["row_count"]))
+            for signature, result in QualityEngine.evaluate(df, pending).items():
+                resolved[signature] = dict(result, source="scan")
+
+        if any(result["source"] != "cache" for result in resolved.values()):
+            for signature, result in resolved.items():
+                cache[signature] = {k: v for k, v in result.items() if k != "source"}
+            with open(QualityEngine.cache_path(file_path), "w") as f:
+                json.dump(cache, f)
+
+        report = []
+        for rule in rules:
+            result = resolved[QualityEngine.rule_signature(rule)]
+            report.append({
+                "rule_id": rule.get("id"),
+                "rule_type": rule["rule_type"],
+                "column": rule.get("column"),
+                "params": rule.get("params") or {},
+                **result
+            })
+        return report
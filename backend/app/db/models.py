@@ -14,6 +14,7 @@ class Dataset(Base):
     # Lineage
     parent_id = Column(Integer, ForeignKey("datasets.id"), nullable=True)
     cleaning_operation = Column(String, nullable=True)
+    transform_artifact = Column(String, nullable=True) # Fitted FE state that produced this version (joblib)
     
     # Metadata
     size_bytes = Column(Integer)
@@ -26,6 +27,7 @@ class Dataset(Base):
     children = relationship("Dataset", backref="parent", remote_side=[id])
     training_runs = relationship("TrainingRun", back_populates="dataset")
     activities = relationship("SystemActivity", back_populates="dataset")
+    quality_rules = relationship("DataQualityRule", back_populates="dataset", cascade="all, delete-orphan")
 
 class SystemActivity(Base):
     __tablename__ = "system_activities"
@@ -41,6 +43,20 @@ class SystemActivity(Base):
     # Relationships
     dataset = relationship("Dataset", back_populates="activities")
 
+class DataQualityRule(Base):
+    __tablename__ = "data_quality_rules"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # Rules attached to a dataset also apply to every dataset derived from it
+    dataset_id = Column(Integer, ForeignKey("datasets.id"))
+    rule_type = Column(String)   # "not_null", "range", "regex", "unique", "allowed_values", "compare"
+    column = Column(String)
+    params = Column(JSON, default={})
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    # Relationships
+    dataset = relationship("Dataset", back_populates="quality_rules")
+
 class TrainingRun(Base):
     __tablename__ = "training_runs"
 
@@ -51,10 +67,25 @@ class TrainingRun(Base):
     model_name = Column(String)
     target_column = Column(String)
     feature_columns = Column(JSON, nullable=True) # Explicitly selected features
+    feature_selection = Column(JSON, nullable=True) # Automatic selection config (methods, max_features, time_budget)
     parameters = Column(JSON)
+    tuning = Column(JSON, nullable=True) # Hyperparameter search config (strategy, n_trials, time_budget)
+    evaluation = Column(JSON, nullable=True) # Cross-validation config (strategy, n_splits, refit); null = 80/20 holdout
+    budget = Column(JSON, nullable=True) # Time limit + early stopping config (time_limit, early_stopping, patience)
+    streaming = Column(JSON, nullable=True) # Out-of-core config (epochs, batch_rows, shuffle_buffer_rows, external_memory); null = by file size
     
+    # Scheduling
+    priority = Column(Integer, default=0)               # Higher runs first
+    timeout_seconds = Column(Integer, nullable=True)    # None -> settings.TRAINING_DEFAULT_TIMEOUT
+    attempts = Column(Integer, default=0)
+    worker_pid = Column(Integer, nullable=True)
+    cancel_requested_at = Column(DateTime, nullable=True)
+    started_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
     # State
-    status = Column(String, default="pending") 
+    status = Column(String, default="pending") # "pending", "running", "completed", "failed", "cancelled"
     progress = Column(Integer, default=0)         # 0-100
     stage = Column(String, nullable=True)         # "loading", "preprocessing", "fitting", "scoring"
     error_message = Column(String, nullable=True)
@@ -62,10 +93,26 @@ class TrainingRun(Base):
     # Results
     metrics = Column(JSON, nullable=True)    # Simple metrics (Accuracy, F1)
     detailed_report = Column(JSON, nullable=True) # Heavy data (Confusion Matrix, ROC points)
-    logs = Column(JSON, default=[]) # Real-time training terminal messages
+    logs = Column(JSON, default=[]) # Legacy terminal messages (new runs write to training_logs)
     artifact_path = Column(String, nullable=True) 
+    selected_features = Column(JSON, nullable=True) # Model input columns kept by feature selection
     
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
-    dataset = relationship("Dataset", back_populates="training_runs")
\ No newline at end of file
+    dataset = relationship("Dataset", back_populates="training_runs")
+    log_entries = relationship("TrainingLog", back_populates="run", cascade="all, delete-orphan", passive_deletes=True)
+
+class TrainingLog(Base):
+    __tablename__ = "training_logs"
+
+    # Append-only: rows are only ever inserted; the id doubles as the stream cursor
+    id = Column(Integer, primary_key=True, index=True)
+    run_id = Column(Integer, ForeignKey("training_runs.id", ondelete="CASCADE"), index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    stage = Column(String, nullable=True)
+    progress = Column(Integer, nullable=True)
+    message = Column(String)
+
+    # Relationships
+    run = relationship("TrainingRun", back_populates="log_entries")
\ No newline at end of file
@@ -1,8 +1,11 @@
 import joblib
+import numpy as np
 import pandas as pd
 import os
 from fastapi import HTTPException
 from app.db.models import TrainingRun
+from app.training.preprocessing import TabularPreprocessor
+from app.core.resources import ResourceGovernor
 from sqlalchemy.orm import Session
 
 class InferenceService:
@@ -25,8 +28,21 @@ class InferenceService:
              raise HTTPException(status_code=500, detail="Model artifact missing")
              
         model = joblib.load(run.artifact_path)
-        
-        # Check for encoders
+        # Predictions run in the API process: keep them to the serving reserve, whatever the model was trained with
+        ResourceGovernor.limit_estimator(model, len(ResourceGovernor.serving_cores()))
+        preprocessor, _ = TabularPreprocessor.unwrap(model)
+        if preprocessor is not None:
+            # Current artifacts: the saved pipeline runs the training-time preprocessing itself
+            try:
+                with ResourceGovernor.serving_limits():
+                    predictions = model.predict(pd.DataFrame(input_data))
+                if preprocessor.target_classes_ is not None:
+                    predictions = np.asarray(preprocessor.target_classes_)[np.asarray(predictions, dtype=int)]
+                return predictions.tolist()
+            except Exception as e:
+                raise HTTPException(status_code=400, detail=f"Inference failed: {str(e)}")
+
+        # Legacy artifacts: bare estimator plus a separate encoder file
         base_path = run.artifact_path.replace('.joblib', '')
         encoder_path = f"{base_path}_encoders.joblib"
         
@@ -45,7 +61,8 @@ class InferenceService:
                     # Ideally we should handle unknown labels gracefully, but for now we try/catch or map
                     df[col] = df[col].astype(str).map(lambda x: le.transform([x])[0] if x in le.classes_ else -1)
             
-            predictions = model.predict(df)
+            with ResourceGovernor.serving_limits():
+                predictions = model.predict(df)
             
             # Decode predictions if target encoder exists
             if "__target__" in encoders:
@@ -3,6 +3,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
 from app.db.base import Base
 from app.db.session import engine
+from app.training.executor import TrainingExecutor
 
 # Import Routers
 from app.api import datasets, cleaning, models, training, deployment, features, activities
@@ -40,6 +41,17 @@ app.include_router(system.router, prefix=f"{settings.API_V1_STR}/system", tags=[
 # Register Analysis Router
 from app.api import analysis
 app.include_router(analysis.router, prefix=f"{settings.API_V1_STR}/analysis", tags=["analysis"])
+# Register Data Quality Router
+from app.api import quality
+app.include_router(quality.router, prefix=f"{settings.API_V1_STR}/quality", tags=["quality"])
+
+@app.on_event("startup")
+def start_training_executor():
+    TrainingExecutor.start()
+
+@app.on_event("shutdown")
+def stop_training_executor():
+    TrainingExecutor.stop()
 
 @app.get(f"{settings.API_V1_STR}/test")
 def test_api():
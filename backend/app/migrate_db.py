@@ -29,7 +29,21 @@ def migrate():
     new_columns = [
         ("feature_columns", "JSON"),
         ("progress", "INTEGER DEFAULT 0"),
-        ("stage", "TEXT")
+        ("stage", "TEXT"),
+        ("feature_selection", "JSON"),
+        ("selected_features", "JSON"),
+        ("priority", "INTEGER DEFAULT 0"),
+        ("timeout_seconds", "INTEGER"),
+        ("attempts", "INTEGER DEFAULT 0"),
+        ("worker_pid", "INTEGER"),
+        ("cancel_requested_at", "DATETIME"),
+        ("started_at", "DATETIME"),
+        ("heartbeat_at", "DATETIME"),
+        ("finished_at", "DATETIME"),
+        ("tuning", "JSON"),
+        ("evaluation", "JSON"),
+        ("budget", "JSON"),
+        ("streaming", "JSON")
     ]
 
     for col_name, col_type in new_columns:
@@ -43,6 +57,25 @@ def migrate():
         else:
             print(f"Column {col_name} already exists")
 
+    # Dataset lineage columns
+    cursor.execute("PRAGMA table_info(datasets)")
+    dataset_columns = [row[1] for row in cursor.fetchall()]
+
+    new_dataset_columns = [
+        ("transform_artifact", "TEXT")
+    ]
+
+    for col_name, col_type in new_dataset_columns:
+        if col_name not in dataset_columns:
+            print(f"Adding column datasets.{col_name}...")
+            try:
+                cursor.execute(f"ALTER TABLE datasets ADD COLUMN {col_name} {col_type}")
+                print(f"Successfully added {col_name}")
+            except Exception as e:
+                print(f"Error adding {col_name}: {e}")
+        else:
+            print(f"Column datasets.{col_name} already exists")
+
     conn.commit()
     conn.close()
     print("Migration complete.")
@@ -22,6 +22,15 @@ class ModelRegistry:
     """
     Central repository of available algorithms with detailed metadata and optimized default parameters.
     Updated with 20+ advanced models across Regression, Classification, and Clustering.
+    Models with a "native_categorical" entry split on categories themselves: the trainer hands
+    them pandas categoricals (up to "max_categories" levels) and adds "params" to the estimator.
+    Models with an "early_stopping" entry are iterative: the final fit runs under the run's time
+    limit and stops on a held-out slice (see TrainingBudget), "patience" and "iterations" naming
+    the estimator's own parameters.
+    Models with a "streaming" entry can train out-of-core (see StreamingTrainer): "partial_fit"
+    ones batch by batch ("multi_epoch" is False where partial_fit accumulates statistics),
+    "data_iter" ones (XGBoost) from a quantized matrix built through a data iterator, with
+    "params" added to the estimator.
     """
     
     MODELS = {
@@ -76,6 +85,8 @@ class ModelRegistry:
             "type": "regression",
             "class": SGDRegressor,
             "params": {"alpha": 0.0001, "max_iter": 1000, "penalty": "l2"},
+            "early_stopping": {"params": {"early_stopping": True, "random_state": 42}, "patience": "n_iter_no_change", "iterations": "max_iter", "mode": "epochs"},
+            "streaming": {"mode": "partial_fit", "multi_epoch": True},
             "description": "Linear model fitted by minimizing a regularized empirical loss with SGD. Efficient for large datasets.",
             "formula": "w ← w - η(∇Loss)",
             "param_meta": {
@@ -136,6 +147,7 @@ class ModelRegistry:
             "type": "regression",
             "class": GradientBoostingRegressor,
             "params": {"n_estimators": 100, "learning_rate": 0.1, "max_depth": 3, "random_state": 42},
+            "early_stopping": {"params": {}, "patience": "n_iter_no_change", "iterations": "n_estimators", "mode": "stages"},
             "description": "Builds an additive model in a forward stage-wise fashion.",
             "formula": "Sequential Error Correction",
             "param_meta": {
@@ -148,6 +160,8 @@ class ModelRegistry:
             "type": "regression",
             "class": HistGradientBoostingRegressor,
             "params": {"max_iter": 100, "learning_rate": 0.1},
+            "native_categorical": {"params": {"categorical_features": "from_dtype"}, "max_categories": 255},
+            "early_stopping": {"params": {"early_stopping": True}, "patience": "n_iter_no_change", "iterations": "max_iter", "mode": "warm_start"},
             "description": "Much faster than standard GB for large datasets (n > 10,000). Inspired by LightGBM.",
             "formula": "Bin-based Gradient Boosting",
             "param_meta": {
@@ -183,6 +197,7 @@ class ModelRegistry:
             "type": "regression",
             "class": MLPRegressor,
             "params": {"hidden_layer_sizes": (100,), "activation": "relu", "solver": "adam", "max_iter": 500},
+            "early_stopping": {"params": {"early_stopping": True, "random_state": 42}, "patience": "n_iter_no_change", "iterations": "max_iter", "mode": "epochs"},
             "description": "Multi-layer Perceptron regressor.",
             "formula": "Feedforward Neural Network",
             "param_meta": {
@@ -195,6 +210,9 @@ class ModelRegistry:
             "type": "regression",
             "class": xgb.XGBRegressor,
             "params": {"n_estimators": 100, "learning_rate": 0.1, "max_depth": 6, "random_state": 42},
+            "native_categorical": {"params": {"enable_categorical": True, "tree_method": "hist"}, "max_categories": None},
+            "early_stopping": {"params": {}, "patience": "early_stopping_rounds", "iterations": "n_estimators", "mode": "xgboost"},
+            "streaming": {"mode": "data_iter", "params": {"tree_method": "hist"}},
             "description": "Extreme Gradient Boosting. High performance.",
             "formula": "Gradient Boosted Trees",
             "param_meta": {
@@ -233,6 +251,8 @@ class ModelRegistry:
             "type": "classification",
             "class": SGDClassifier,
             "params": {"loss": "hinge", "penalty": "l2", "alpha": 0.0001, "max_iter": 1000},
+            "early_stopping": {"params": {"early_stopping": True, "random_state": 42}, "patience": "n_iter_no_change", "iterations": "max_iter", "mode": "epochs"},
+            "streaming": {"mode": "partial_fit", "multi_epoch": True},
             "description": "Linear classifier (SVM/LogReg) optimized by SGD. Key for massive datasets.",
             "formula": "SGD Optimization",
             "param_meta": {
@@ -268,6 +288,7 @@ class ModelRegistry:
             "type": "classification",
             "class": GradientBoostingClassifier,
             "params": {"n_estimators": 100, "learning_rate": 0.1, "max_depth": 3, "criterion": "friedman_mse", "random_state": 42},
+            "early_stopping": {"params": {}, "patience": "n_iter_no_change", "iterations": "n_estimators", "mode": "stages"},
             "description": "Sequential boosting for classification.",
             "formula": "Weighted Vote of Weak Learners",
             "param_meta": {
@@ -281,6 +302,8 @@ class ModelRegistry:
             "type": "classification",
             "class": HistGradientBoostingClassifier,
             "params": {"max_iter": 100, "learning_rate": 0.1},
+            "native_categorical": {"params": {"categorical_features": "from_dtype"}, "max_categories": 255},
+            "early_stopping": {"params": {"early_stopping": True}, "patience": "n_iter_no_change", "iterations": "max_iter", "mode": "warm_start"},
             "description": "High-performance GB for large datasets. Supports missing values natively.",
             "formula": "Histogram-based Boosting",
             "param_meta": {
@@ -315,6 +338,7 @@ class ModelRegistry:
             "type": "classification",
             "class": GaussianNB,
             "params": {},
+            "streaming": {"mode": "partial_fit", "multi_epoch": False},
             "description": "Probabilistic classifier based on Bayes' theorem. Assumes Gaussian distribution of features.",
             "formula": "P(c|x) ∝ P(x|c)P(c)",
             "param_meta": {}
@@ -324,6 +348,7 @@ class ModelRegistry:
             "type": "classification",
             "class": MultinomialNB,
             "params": {"alpha": 1.0},
+            "streaming": {"mode": "partial_fit", "multi_epoch": False},
             "description": "Naive Bayes for potential count data (e.g. text classification).",
             "formula": "P(c|x) based on multinomial distribution",
             "param_meta": {
@@ -335,6 +360,7 @@ class ModelRegistry:
             "type": "classification",
             "class": BernoulliNB,
             "params": {"alpha": 1.0},
+            "streaming": {"mode": "partial_fit", "multi_epoch": False},
             "description": "Naive Bayes for binary/boolean features.",
             "formula": "Independent Bernoulli trials",
             "param_meta": {
@@ -358,6 +384,7 @@ class ModelRegistry:
             "type": "classification",
             "class": MLPClassifier,
             "params": {"hidden_layer_sizes": (100,), "activation": "relu", "solver": "adam", "max_iter": 500},
+            "early_stopping": {"params": {"early_stopping": True, "random_state": 42}, "patience": "n_iter_no_change", "iterations": "max_iter", "mode": "epochs"},
             "description": "Multi-layer Perceptron classifier.",
             "formula": "Deep Feedforward Network",
             "param_meta": {
@@ -370,6 +397,9 @@ class ModelRegistry:
             "type": "classification",
             "class": xgb.XGBClassifier,
             "params": {"n_estimators": 100, "learning_rate": 0.1, "max_depth": 6, "use_label_encoder": False, "eval_metric": "logloss", "random_state": 42},
+            "native_categorical": {"params": {"enable_categorical": True, "tree_method": "hist"}, "max_categories": None},
+            "early_stopping": {"params": {}, "patience": "early_stopping_rounds", "iterations": "n_estimators", "mode": "xgboost"},
+            "streaming": {"mode": "data_iter", "params": {"tree_method": "hist"}},
             "description": "Optimized Gradient Boosting.",
             "formula": "Gradient Boosted Trees",
             "param_meta": {
@@ -431,7 +461,10 @@ class ModelRegistry:
                 "default_params": v["params"],
                 "description": v.get("description", ""),
                 "formula": v.get("formula", ""),
-                "param_meta": v.get("param_meta", {})
+                "param_meta": v.get("param_meta", {}),
+                "native_categorical": "native_categorical" in v,
+                "early_stopping": "early_stopping" in v,
+                "streaming": "streaming" in v
             }
             for k, v in cls.MODELS.items()
         ]
\ No newline at end of file
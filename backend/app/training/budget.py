@@ -0,0 +1,184 @@
+import math
+import time
+import warnings
+import numpy as np
+import xgboost as xgb
+from typing import Callable, Optional
+from sklearn.exceptions import ConvergenceWarning
+from sklearn.model_selection import train_test_split
+
+from app.core.config import settings
+
+
+class XGBoostClock(xgb.callback.TrainingCallback):
+    """Records when each boosting round finishes and stops training once the deadline has passed."""
+
+    def __init__(self, started: float, deadline: Optional[float], marks: list):
+        super().__init__()
+        self.started = started
+        self.deadline = deadline
+        self.marks = marks
+
+    def after_iteration(self, model, epoch, evals_log) -> bool:
+        now = time.time()
+        self.marks.append((epoch + 1, now - self.started))
+        return self.deadline is not None and now >= self.deadline
+
+
+class TrainingBudget:
+    """
+    Final fit of iterative estimators (registry entries with an "early_stopping" spec)
+    under a wall-clock deadline, with early stopping on a held-out slice of the
+    training rows. How the estimator is driven depends on the spec's "mode":
+      - "stages": GradientBoosting's fit(monitor=...) is called after every stage;
+      - "warm_start": HistGradientBoosting grows in chunks (cumulative max_iter);
+      - "epochs": MLP / SGD run chunks of max_iter epochs on top of the previous weights;
+      - "xgboost": a training callback, with an explicit eval_set for early stopping.
+    Without a deadline the estimator is fitted in one call. Iterations, the best
+    iteration and the time it was reached are reported; for chunked fits the time
+    to best is interpolated within the chunk.
+
+    config: {"time_limit": seconds, "early_stopping": true, "patience": 10, "validation_fraction": 0.1}
+    """
+
+    CHUNKS = 10                # Deadline checks per chunked fit
+    MIN_VALIDATION_ROWS = 20   # Smaller held-out slices make early stopping meaningless
+    MULTICLASS_METRICS = {"logloss": "mlogloss", "error": "merror"}  # XGBoost binary metric -> multiclass one
+
+    @staticmethod
+    def supports(model_info: dict) -> bool:
+        return "early_stopping" in model_info
+
+    @staticmethod
+    def eval_metric(metric, n_classes: int):
+        """XGBoost rejects binary metrics (the registry's "logloss") on a multiclass eval set."""
+        if n_classes > 2 and isinstance(metric, str):
+            return TrainingBudget.MULTICLASS_METRICS.get(metric, metric)
+        return metric
+
+    @staticmethod
+    def time_at(marks: list, iteration: int) -> float:
+        """Elapsed seconds when `iteration` finished, interpolated between (iterations, seconds) marks."""
+        previous = (0, 0.0)
+        for done, seconds in marks:
+            if done >= iteration:
+                if done == previous[0]:
+                    return seconds
+                share = (iteration - previous[0]) / (done - previous[0])
+                return previous[1] + share * (seconds - previous[1])
+            previous = (done, seconds)
+        return previous[1]
+
+    @staticmethod
+    def fit(model_info: dict, params: dict, X, y, config: dict, deadline: Optional[float] = None,
+            is_classification: bool = False, log: Optional[Callable] = None) -> tuple:
+        """Returns (fitted model, stats)."""
+        log = log or (lambda message: None)
+        spec = model_info["early_stopping"]
+        mode = spec["mode"]
+        early_stopping = bool(config.get("early_stopping", settings.TRAINING_EARLY_STOPPING))
+        patience = int(config.get("patience", settings.TRAINING_EARLY_STOPPING_PATIENCE))
+        fraction = float(config.get("validation_fraction", settings.TRAINING_VALIDATION_FRACTION))
+        if early_stopping and X.shape[0] * fraction < TrainingBudget.MIN_VALIDATION_ROWS:
+            log(f"Early stopping skipped: a {fraction:.0%} validation slice of {X.shape[0]} rows is too small.")
+            early_stopping = False
+
+        params = dict(params)
+        if early_stopping:
+            params = {**spec["params"], **params, spec["patience"]: patience}
+            if mode != "xgboost":
+                params["validation_fraction"] = fraction
+        # Estimator default, else the registry's (XGBoost leaves n_estimators unset until fit)
+        total = params.get(spec["iterations"]) or model_info["class"]().get_params()[spec["iterations"]] \
+            or model_info["params"][spec["iterations"]]
+        total = params[spec["iterations"]] = int(total)
+        log(f"Iteration budget: up to {total} {spec['iterations']}"
+            + (f", early stopping after {patience} rounds without improvement on {fraction:.0%} held out" if early_stopping else "")
+            + (f", {max(0.0, deadline - time.time()):.0f}s left on the clock." if deadline is not None else "."))
+
+        started = time.time()
+        marks = [(0, 0.0)]
+        stopped_by = None
+        best = None
+
+        if mode == "stages":
+            def monitor(i, estimator, state):
+                marks.append((i + 1, time.time() - started))
+                return deadline is not None and time.time() >= deadline
+
+            model = model_info["class"](**params)
+            model.fit(X, y, monitor=monitor if deadline is not None else None)
+            done = int(model.n_estimators_)
+            if done < total:
+                stopped_by = "time_limit" if deadline is not None and marks[-1][1] + started >= deadline else "early_stopping"
+
+        elif mode == "xgboost":
+            X_fit, y_fit, fit_kwargs = X, y, {"verbose": False}
+            if early_stopping:
+                try:
+                    X_fit, X_val, y_fit, y_val = train_test_split(
+                        X, y, test_size=fraction, random_state=42, stratify=y if is_classification else None
+                    )
+                except ValueError:
+                    # A class too rare to appear on both sides
+                    X_fit, X_val, y_fit, y_val = train_test_split(X, y, test_size=fraction, random_state=42)
+                fit_kwargs["eval_set"] = [(X_val, y_val)]
+                if is_classification and params.get("eval_metric") is not None:
+                    params["eval_metric"] = TrainingBudget.eval_metric(params["eval_metric"], len(np.unique(y)))
+            model = model_info["class"](**params, callbacks=[XGBoostClock(started, deadline, marks)])
+            model.fit(X_fit, y_fit, **fit_kwargs)
+            model.set_params(callbacks=None)  # Keep the clock out of the saved artifact
+            done = int(model.get_booster().num_boosted_rounds())
+            if early_stopping:
+                best = int(model.best_iteration) + 1
+            if done < total:
+                stopped_by = "time_limit" if deadline is not None and marks[-1][1] + started >= deadline else "early_stopping"
+
+        else:
+            cumulative = mode == "warm_start"
+            chunk = total if deadline is None else max(math.ceil(total / TrainingBudget.CHUNKS), patience + 1 if early_stopping else 1)
+            model = model_info["class"](**params)
+            if chunk < total:
+                model.set_params(warm_start=True)
+            done = 0
+            with warnings.catch_warnings():
+                # Every chunk but the last ends on max_iter by design
+                warnings.simplefilter("ignore", ConvergenceWarning)
+                while done < total:
+                    target = min(done + chunk, total)
+                    model.set_params(max_iter=target if cumulative else target - done)
+                    model.fit(X, y)
+                    reached = int(np.max(model.n_iter_)) if cumulative else done + int(np.max(model.n_iter_))
+                    marks.append((reached, time.time() - started))
+                    done = reached
+                    if done < target:
+                        stopped_by = "early_stopping" if early_stopping else "converged"
+                        break
+                    if deadline is not None and time.time() >= deadline and done < total:
+                        stopped_by = "time_limit"
+                        break
+            model.set_params(warm_start=False, max_iter=total)
+            scores = getattr(model, "validation_score_", None)  # HistGradientBoosting: entry 0 is before any tree
+            if early_stopping and scores is not None and len(scores):
+                best = int(np.argmax(scores))
+            scores = getattr(model, "validation_scores_", None)  # MLP: one entry per epoch, best weights restored
+            if early_stopping and scores is not None and len(scores):
+                best = int(np.argmax(scores)) + 1
+
+        if marks[-1][0] < done:
+            marks.append((done, time.time() - started))  # Single-call fit: interpolate over the whole run
+        if best is None:
+            # Estimators that keep training through the patience window before stopping
+            best = max(1, done - patience) if stopped_by == "early_stopping" else done
+        stats = {
+            "iterations": done,
+            "max_iterations": total,
+            "best_iteration": best,
+            "time_to_best_seconds": round(TrainingBudget.time_at(marks, best), 3),
+            "fit_seconds": round(time.time() - started, 3),
+            "stopped_by": stopped_by or "max_iterations",
+            "early_stopping": early_stopping,
+            "patience": patience if early_stopping else None,
+            "validation_fraction": fraction if early_stopping else None,
+        }
+        return model, stats
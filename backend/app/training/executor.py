@@ -0,0 +1,246 @@
+import multiprocessing
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, or_
+
+from app.core.config import settings
+from app.core.resources import ResourceGovernor
+from app.db.models import TrainingRun, TrainingLog
+from app.db.session import SessionLocal
+
+
+def _heartbeat(run_id: int, stop: threading.Event):
+    db = SessionLocal()
+    try:
+        while not stop.wait(settings.TRAINING_HEARTBEAT_SECONDS):
+            db.query(TrainingRun).filter(TrainingRun.id == run_id).update({"heartbeat_at": datetime.utcnow()})
+            db.commit()
+    finally:
+        db.close()
+
+
+def _worker_main(run_id: int, allocation: dict):
+    """Entry point of a worker process: one job, one session, isolated from the API process."""
+    # Before the numeric libraries load, so their thread pools start at the job's share
+    ResourceGovernor.apply(allocation["threads"], allocation["cores"] if allocation["pinned"] else None)
+    from app.training.trainer import TrainingEngine
+
+    stop = threading.Event()
+    beat = threading.Thread(target=_heartbeat, args=(run_id, stop), daemon=True)
+    beat.start()
+    db = SessionLocal()
+    try:
+        TrainingEngine.run_training_job(run_id, db)
+    finally:
+        stop.set()
+        db.close()
+
+
+class TrainingExecutor:
+    """
+    DB-backed training queue.
+    Runs wait as `pending` in training_runs. A dispatcher thread in the API
+    process claims them (highest priority first, then oldest) while fewer than
+    TRAINING_MAX_CONCURRENCY runs are `running`, and starts one spawned worker
+    process per run. Cancellation is cooperative (the trainer checks
+    `cancel_requested_at` between stages) with a hard kill after a grace
+    period; the same kill enforces per-run timeouts. `running` rows whose worker
+    is gone (process crash, API restart) are re-queued up to
+    TRAINING_MAX_ATTEMPTS times. Each worker runs within the CPU share the
+    ResourceGovernor assigns it at dispatch.
+    Several API processes (e.g. uvicorn --workers N) may each run a dispatcher:
+    a claim is one conditional UPDATE that also re-checks the global `running`
+    count, so a run starts once and the concurrency cap holds across them. CPU
+    shares are accounted per API process, though. On shutdown the workers are
+    terminated and their runs re-queued without using up an attempt.
+    """
+
+    _lock = threading.Lock()
+    _wake = threading.Event()
+    _stop = threading.Event()
+    _thread = None
+    _workers = {}  # run_id -> multiprocessing.Process
+
+    @staticmethod
+    def start():
+        with TrainingExecutor._lock:
+            if TrainingExecutor._thread is not None and TrainingExecutor._thread.is_alive():
+                return
+            TrainingExecutor._stop.clear()
+            TrainingExecutor._thread = threading.Thread(target=TrainingExecutor._loop, name="training-dispatcher", daemon=True)
+            TrainingExecutor._thread.start()
+        print(f"Training executor started (max concurrency {settings.TRAINING_MAX_CONCURRENCY})")
+
+    @staticmethod
+    def stop():
+        TrainingExecutor._stop.set()
+        TrainingExecutor._wake.set()
+        if TrainingExecutor._thread is not None:
+            TrainingExecutor._thread.join(timeout=10)
+        TrainingExecutor._interrupt_workers()
+
+    @staticmethod
+    def _interrupt_workers():
+        """
+        Terminates this process's workers (multiprocessing would otherwise block interpreter exit
+        joining them) and puts their runs back in the queue, without counting the attempt.
+        """
+        workers, TrainingExecutor._workers = TrainingExecutor._workers, {}
+        for process in workers.values():
+            process.terminate()
+        db = SessionLocal()
+        try:
+            for run_id, process in workers.items():
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.kill()
+                    process.join()
+                ResourceGovernor.release(run_id)
+                run = db.query(TrainingRun).filter(TrainingRun.id == run_id).first()
+                if run is None or run.status != "running":
+                    continue
+                run.status = "pending"
+                run.stage = "queued"
+                run.progress = 0
+                run.worker_pid = None
+                run.attempts = max(0, (run.attempts or 1) - 1)
+                TrainingExecutor._append_log(db, run, "Interrupted by API shutdown. Re-queued.")
+            db.commit()
+        finally:
+            db.close()
+
+    @staticmethod
+    def notify():
+        """Wakes the dispatcher right away (new job queued or cancel requested)."""
+        TrainingExecutor._wake.set()
+
+    @staticmethod
+    def _loop():
+        while not TrainingExecutor._stop.is_set():
+            db = SessionLocal()
+            try:
+                TrainingExecutor._reap(db)
+                TrainingExecutor._recover_orphans(db)
+                TrainingExecutor._dispatch(db)
+            except Exception as e:
+                db.rollback()
+                print(f"Training dispatcher error: {e}")
+            finally:
+                db.close()
+            TrainingExecutor._wake.wait(settings.TRAINING_POLL_SECONDS)
+            TrainingExecutor._wake.clear()
+
+    @staticmethod
+    def _append_log(db, run: TrainingRun, message: str):
+        timestamp = datetime.now().strftime("%H:%M:%S")
+        db.add(TrainingLog(run_id=run.id, stage=run.stage, progress=run.progress, message=f"[{timestamp}] {message}"))
+
+    @staticmethod
+    def _finish(db, run: TrainingRun, status: str, message: str):
+        run.status = status
+        run.stage = "cancelled" if status == "cancelled" else "error"
+        run.error_message = message
+        run.finished_at = datetime.utcnow()
+        TrainingExecutor._append_log(db, run, message)
+        db.commit()
+
+    @staticmethod
+    def _reap(db):
+        """Handles finished, timed-out and cancelled workers of this dispatcher."""
+        now = datetime.utcnow()
+        for run_id, process in list(TrainingExecutor._workers.items()):
+            run = db.query(TrainingRun).filter(TrainingRun.id == run_id).first()
+            if run is None:
+                process.kill()
+                TrainingExecutor._workers.pop(run_id)
+                ResourceGovernor.release(run_id)
+                continue
+
+            if process.is_alive():
+                timeout = run.timeout_seconds if run.timeout_seconds is not None else settings.TRAINING_DEFAULT_TIMEOUT
+                grace = timedelta(seconds=settings.TRAINING_CANCEL_GRACE_SECONDS)
+                if timeout and run.started_at and now - run.started_at > timedelta(seconds=timeout):
+                    process.kill()
+                    process.join()
+                    TrainingExecutor._finish(db, run, "failed", f"Timed out after {timeout}s; worker terminated.")
+                elif run.cancel_requested_at and now - run.cancel_requested_at > grace:
+                    process.kill()
+                    process.join()
+                    TrainingExecutor._finish(db, run, "cancelled", "Cancelled; worker terminated after grace period.")
+                else:
+                    continue
+            elif run.status == "running":
+                # Worker exited without recording an outcome: crashed (OOM, segfault, kill)
+                TrainingExecutor._requeue_or_fail(db, run, f"Worker exited unexpectedly (code {process.exitcode}).")
+            TrainingExecutor._workers.pop(run_id)
+            ResourceGovernor.release(run_id)
+
+    @staticmethod
+    def _requeue_or_fail(db, run: TrainingRun, reason: str):
+        if run.cancel_requested_at:
+            TrainingExecutor._finish(db, run, "cancelled", f"{reason} Cancelled.")
+        elif (run.attempts or 0) >= settings.TRAINING_MAX_ATTEMPTS:
+            TrainingExecutor._finish(db, run, "failed", f"{reason} Giving up after {run.attempts} attempts.")
+        else:
+            run.status = "pending"
+            run.stage = "queued"
+            run.progress = 0
+            run.worker_pid = None
+            TrainingExecutor._append_log(db, run, f"{reason} Re-queued.")
+            db.commit()
+
+    @staticmethod
+    def _recover_orphans(db):
+        """`running` rows no live dispatcher owns: their heartbeat has gone stale."""
+        stale = datetime.utcnow() - timedelta(seconds=3 * settings.TRAINING_HEARTBEAT_SECONDS)
+        orphans = db.query(TrainingRun).filter(
+            TrainingRun.status == "running",
+            or_(TrainingRun.heartbeat_at == None, TrainingRun.heartbeat_at < stale),  # noqa: E711
+        ).all()
+        for run in orphans:
+            if run.id in TrainingExecutor._workers:
+                continue
+            if run.heartbeat_at is None and run.started_at and run.started_at > stale:
+                continue  # Just claimed elsewhere; first heartbeat not written yet
+            TrainingExecutor._requeue_or_fail(db, run, "Worker lost (no heartbeat).")
+
+    @staticmethod
+    def _dispatch(db):
+        running = db.query(TrainingRun).filter(TrainingRun.status == "running").count()
+        free = settings.TRAINING_MAX_CONCURRENCY - running
+        if free <= 0:
+            return
+
+        queued = db.query(TrainingRun.id).filter(TrainingRun.status == "pending").order_by(
+            TrainingRun.priority.desc(), TrainingRun.created_at.asc(), TrainingRun.id.asc()
+        ).limit(free).all()
+        context = multiprocessing.get_context("spawn")
+        for (run_id,) in queued:
+            now = datetime.utcnow()
+            # Atomic claim: one statement moves the row out of `pending` only while the global
+            # `running` count is under the cap, so concurrent dispatchers can neither double-start a run
+            # nor overshoot TRAINING_MAX_CONCURRENCY between them
+            running_count = db.query(func.count(TrainingRun.id)).filter(TrainingRun.status == "running").scalar_subquery()
+            claimed = db.query(TrainingRun).filter(
+                TrainingRun.id == run_id, TrainingRun.status == "pending",
+                running_count < settings.TRAINING_MAX_CONCURRENCY,
+            ).update({
+                "status": "running",
+                "stage": "starting",
+                "started_at": now,
+                "heartbeat_at": None,
+                "attempts": func.coalesce(TrainingRun.attempts, 0) + 1,
+            }, synchronize_session=False)
+            db.commit()
+            if not claimed:
+                continue
+            allocation = ResourceGovernor.allocate(run_id)
+            process = context.Process(target=_worker_main, args=(run_id, allocation), name=f"training-run-{run_id}")
+            process.start()
+            db.query(TrainingRun).filter(TrainingRun.id == run_id).update({"worker_pid": process.pid})
+            db.commit()
+            TrainingExecutor._workers[run_id] = process
+            allocation["pid"] = process.pid
+            print(f"Training run {run_id} started in worker process {process.pid} "
+                  f"({allocation['threads']} thread(s), cores {allocation['cores']}{' pinned' if allocation['pinned'] else ''})")
@@ -0,0 +1,49 @@
+import time
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models import TrainingLog
+
+
+class TrainingLogBuffer:
+    """
+    Buffered writer for a run's append-only log.
+    Lines are kept in memory and written as one multi-row INSERT when the buffer
+    reaches TRAINING_LOG_FLUSH_LINES, when the oldest buffered line is older than
+    TRAINING_LOG_FLUSH_SECONDS, or when the caller flushes (stage boundaries).
+    Each line records the run's stage and progress so streams can push both.
+    """
+
+    def __init__(self, run_id: int, db: Session, max_lines: Optional[int] = None, max_seconds: Optional[float] = None):
+        self.run_id = run_id
+        self.db = db
+        self.max_lines = max_lines or settings.TRAINING_LOG_FLUSH_LINES
+        self.max_seconds = max_seconds if max_seconds is not None else settings.TRAINING_LOG_FLUSH_SECONDS
+        self._rows = []
+        self._oldest = None
+
+    def log(self, message: str, stage: Optional[str] = None, progress: Optional[int] = None):
+        timestamp = datetime.now().strftime("%H:%M:%S")
+        self._rows.append({
+            "run_id": self.run_id,
+            "created_at": datetime.utcnow(),
+            "stage": stage,
+            "progress": progress,
+            "message": f"[{timestamp}] {message}",
+        })
+        if self._oldest is None:
+            self._oldest = time.monotonic()
+        if len(self._rows) >= self.max_lines or time.monotonic() - self._oldest >= self.max_seconds:
+            self.flush()
+
+    def flush(self):
+        """Writes buffered lines and commits (together with any pending changes on the session)."""
+        if self._rows:
+            self.db.execute(insert(TrainingLog), self._rows)
+            self._rows = []
+            self._oldest = None
+        self.db.commit()
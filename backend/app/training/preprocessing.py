@@ -0,0 +1,208 @@
+import numpy as np
+import pandas as pd
+from typing import Callable, List, Optional
+from scipy import sparse
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.pipeline import Pipeline
+
+from app.data.ingestion.storage import DatasetStore
+
+
+class TabularPreprocessor(TransformerMixin, BaseEstimator):
+    """
+    The fitted preprocessing stage of a training run, persisted inside the model
+    artifact (as the first step of a Pipeline) so serving runs exactly the code
+    and state that training ran.
+
+    Per source column, in output order:
+      - numeric (and bool): missing values -> training median, one block for all columns;
+      - categorical: missing -> "Unknown", then vectorized ordinal codes over the sorted
+        training levels; unseen levels share one bucket (code = number of levels);
+        with `native_categorical` (estimators that split on categories themselves) they stay
+        pandas categoricals over the training levels instead, unseen levels becoming missing,
+        for columns with at most `max_categories` levels and only when output is dense;
+      - text (> text_min_unique levels, mean length > text_min_length): TF-IDF;
+      - zero-filled sparse columns: passed through in compressed form.
+    Output is a DataFrame named by `feature_names_`, or a CSR matrix when the input
+    had sparse columns (TF-IDF then stays sparse too) unless `densify_` is set
+    because the estimator needed dense input. Input columns missing at inference
+    time are treated as entirely missing. The trainer also stores the decoded
+    target labels as `target_classes_` (None for regression).
+    """
+
+    UNKNOWN = "Unknown"
+
+    def __init__(self, text_max_features: int = 50, text_min_unique: int = 20, text_min_length: float = 15,
+                 native_categorical: bool = False, max_categories: Optional[int] = None):
+        self.text_max_features = text_max_features
+        self.text_min_unique = text_min_unique
+        self.text_min_length = text_min_length
+        self.native_categorical = native_categorical
+        self.max_categories = max_categories
+
+    @staticmethod
+    def _column(df: pd.DataFrame, col) -> pd.Series:
+        return df[col] if col in df.columns else pd.Series(np.nan, index=df.index, dtype=object)
+
+    def _categorical_values(self, df: pd.DataFrame, col) -> pd.Series:
+        values = self._column(df, col)
+        return values.astype(object).where(values.notna(), self.UNKNOWN).astype(str)
+
+    def _is_text(self, values: pd.Series) -> bool:
+        try:
+            return values.nunique() > self.text_min_unique and values.str.len().mean() > self.text_min_length
+        except Exception:
+            return False
+
+    def fit(self, X: pd.DataFrame, y=None, log: Optional[Callable] = None):
+        self.fit_transform(X, y, log=log)
+        return self
+
+    def fit_transform(self, X: pd.DataFrame, y=None, log: Optional[Callable] = None):
+        log = log or (lambda message: None)
+        self.sparse_columns_ = [c for c in DatasetStore.sparse_columns(X) if X[c].dtype.fill_value == 0]
+        dense = X.drop(columns=self.sparse_columns_)
+        self.numeric_columns_ = [
+            c for c in dense.columns
+            if pd.api.types.is_bool_dtype(dense[c]) or (pd.api.types.is_numeric_dtype(dense[c]) and not pd.api.types.is_complex_dtype(dense[c]))
+        ]
+        numeric = dense[self.numeric_columns_].to_numpy(dtype=np.float64, na_value=np.nan) if self.numeric_columns_ else np.empty((len(X), 0))
+        medians = np.nanmedian(numeric, axis=0) if numeric.shape[1] else np.empty(0)
+        self.medians_ = np.where(np.isnan(medians), 0.0, medians) if numeric.shape[1] else medians
+
+        self.categorical_ = []  # [(column, "ordinal" | "category", levels) | (column, "text", vectorizer)]
+        for col in dense.columns:
+            if col in self.numeric_columns_ or not (
+                pd.api.types.is_object_dtype(dense[col]) or pd.api.types.is_string_dtype(dense[col])
+                or isinstance(dense[col].dtype, pd.CategoricalDtype)
+            ):
+                continue
+            values = self._categorical_values(dense, col)
+            if self._is_text(values):
+                log(f"Detected text column '{col}' - Applying TF-IDF Vectorization...")
+                vectorizer = TfidfVectorizer(max_features=self.text_max_features, stop_words="english").fit(values)
+                self.categorical_.append((col, "text", vectorizer))
+            else:
+                levels = pd.Index(np.sort(values.unique()))
+                native = self.native_categorical and not self.sparse_columns_ and (
+                    self.max_categories is None or len(levels) <= self.max_categories
+                )
+                self.categorical_.append((col, "category" if native else "ordinal", levels))
+
+        self.sources_ = {str(c): c for c in self.numeric_columns_}
+        names = [str(c) for c in self.numeric_columns_]
+        for col, kind, state in self.categorical_:
+            outputs = [str(col)] if kind != "text" else [f"{col}_tfidf_{i}" for i in range(len(state.vocabulary_))]
+            self.sources_.update({name: col for name in outputs})
+            names += outputs
+        self.sources_.update({str(c): c for c in self.sparse_columns_})
+        names += [str(c) for c in self.sparse_columns_]
+        self.output_names_ = names
+        self.output_index_ = None
+        self.feature_names_ = names
+        return self._transform(X, numeric)
+
+    def _transform(self, X: pd.DataFrame, numeric: Optional[np.ndarray] = None):
+        n = len(X)
+        if numeric is None:
+            numeric = X.reindex(columns=self.numeric_columns_).to_numpy(dtype=np.float64, na_value=np.nan)
+        numeric = np.where(np.isnan(numeric), self.medians_, numeric)
+
+        dense_parts, sparse_parts = [numeric], []
+        for col, kind, state in self.categorical_:
+            values = self._categorical_values(X, col)
+            if kind == "category":
+                dense_parts.append(pd.Categorical(values, categories=state))  # Unseen levels -> missing
+            elif kind == "ordinal":
+                codes = pd.Categorical(values, categories=state).codes.astype(np.float64)
+                codes[codes < 0] = len(state)  # Unseen-category bucket
+                dense_parts.append(codes[:, None])
+            else:
+                matrix = state.transform(values)
+                if self.sparse_columns_:
+                    # Keep output order: flush the dense columns gathered so far, then this block
+                    sparse_parts.append(sparse.csr_matrix(np.column_stack(dense_parts)))
+                    sparse_parts.append(matrix.tocsr())
+                    dense_parts = [np.empty((n, 0))]
+                else:
+                    dense_parts.append(matrix.toarray())
+
+        if self.sparse_columns_:
+            sparse_parts.append(sparse.csr_matrix(np.column_stack(dense_parts)))
+            passthrough = X.reindex(columns=self.sparse_columns_)
+            if all(isinstance(passthrough[c].dtype, pd.SparseDtype) for c in passthrough.columns):
+                sparse_parts.append(passthrough.sparse.to_coo().tocsr())
+            else:
+                sparse_parts.append(sparse.csr_matrix(passthrough.astype(float).fillna(0.0).to_numpy()))
+            out = sparse.hstack(sparse_parts, format="csr")
+            if self.output_index_ is not None:
+                out = out[:, self.output_index_]
+            return out.toarray() if getattr(self, "densify_", False) else out
+
+        if any(isinstance(part, pd.Categorical) for part in dense_parts):
+            # Mixed dtypes: assemble column-wise so categoricals keep their dtype
+            columns = []
+            for part in dense_parts:
+                columns += [part] if isinstance(part, pd.Categorical) else list(part.T)
+            out = pd.DataFrame(dict(enumerate(columns)))
+            if self.output_index_ is not None:
+                out = out.iloc[:, self.output_index_]
+            out.columns = self.feature_names_
+            return out
+
+        out = np.column_stack(dense_parts)
+        if self.output_index_ is not None:
+            out = out[:, self.output_index_]
+        return pd.DataFrame(out, columns=self.feature_names_)
+
+    def transform(self, X: pd.DataFrame):
+        return self._transform(X)
+
+    def restrict(self, selected: List[int]):
+        """
+        Keeps only the given output columns (positions in the current output), in that order.
+        Source columns that no longer feed any output are dropped, so serving skips their work.
+        """
+        keep = [self.feature_names_[i] for i in selected]
+        needed = {self.sources_[name] for name in keep}
+        self.numeric_columns_, self.medians_ = (
+            [c for c in self.numeric_columns_ if c in needed],
+            self.medians_[[i for i, c in enumerate(self.numeric_columns_) if c in needed]],
+        )
+        self.categorical_ = [step for step in self.categorical_ if step[0] in needed]
+        self.sparse_columns_ = [c for c in self.sparse_columns_ if c in needed]
+
+        names = [str(c) for c in self.numeric_columns_]
+        for col, kind, state in self.categorical_:
+            names += [str(col)] if kind != "text" else [f"{col}_tfidf_{i}" for i in range(len(state.vocabulary_))]
+        names += [str(c) for c in self.sparse_columns_]
+        self.output_names_ = names
+        position = {name: i for i, name in enumerate(names)}
+        self.output_index_ = [position[name] for name in keep]
+        self.feature_names_ = keep
+        return sorted(str(c) for c in needed)
+
+    @property
+    def native_columns_(self) -> List[str]:
+        return [str(col) for col, kind, _ in self.categorical_ if kind == "category"]
+
+    @staticmethod
+    def numeric_view(X):
+        """X with categorical columns replaced by their codes (missing -> NaN), for numeric-only consumers."""
+        if not isinstance(X, pd.DataFrame):
+            return X
+        categorical = [c for c in X.columns if isinstance(X[c].dtype, pd.CategoricalDtype)]
+        if not categorical:
+            return X
+        X = X.copy()
+        for c in categorical:
+            X[c] = X[c].cat.codes.astype(np.float64).replace(-1.0, np.nan)
+        return X
+
+    @staticmethod
+    def unwrap(artifact):
+        """(preprocessor or None, estimator) of a saved artifact."""
+        if isinstance(artifact, Pipeline) and isinstance(artifact.steps[0][1], TabularPreprocessor):
+            return artifact.steps[0][1], artifact.steps[-1][1]
+        return None, artifact
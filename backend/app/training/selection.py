@@ -0,0 +1,180 @@
+import time
+import numpy as np
+from joblib import Parallel, delayed
+from scipy import sparse
+from sklearn.ensemble import ExtraTreesClassifier, ExtraTreesRegressor
+from sklearn.feature_selection import mutual_info_classif, mutual_info_regression
+
+from app.core.config import settings
+from app.core.resources import ResourceGovernor
+
+
+class FeatureSelector:
+    """
+    Pre-training feature selection on the encoded training matrix.
+    Stages run cheapest first (variance -> correlation -> ranking) and each one
+    only sees the survivors of the previous stage. Scoring stages work on a row
+    sample and score column blocks in parallel. With a time budget, stages that
+    would start after the budget is spent are skipped (the cut to
+    `max_features` always happens, falling back to variance ranking).
+
+    config: {
+        "methods": ["variance", "correlation", "mutual_info" | "model"],
+        "max_features": 50 (or a fraction in (0, 1)),
+        "variance_threshold": 0.0, "correlation_threshold": 0.95,
+        "time_budget": seconds, "sample_rows": 20000
+    }
+    """
+
+    METHODS = ["variance", "correlation", "mutual_info", "model"]
+    BLOCK_COLUMNS = 64
+    CORRELATION_BYTES = 256 * 1024 * 1024  # Dense working set of the correlation stage
+
+    @staticmethod
+    def _methods(config: dict) -> list:
+        methods = config.get("methods")
+        if isinstance(methods, str):
+            methods = [methods]
+        if not methods or methods == ["auto"]:
+            methods = ["variance", "correlation"] + (["mutual_info"] if config.get("max_features") else [])
+        unknown = [m for m in methods if m not in FeatureSelector.METHODS]
+        if unknown:
+            raise ValueError(f"Unknown feature selection method(s): {unknown}. Available: {FeatureSelector.METHODS}")
+        return methods
+
+    @staticmethod
+    def _target_count(max_features, n_features: int) -> int:
+        if not max_features:
+            return n_features
+        if isinstance(max_features, float) and 0 < max_features < 1:
+            return max(1, int(round(max_features * n_features)))
+        return max(1, min(int(max_features), n_features))
+
+    @staticmethod
+    def _variances(X) -> np.ndarray:
+        if sparse.issparse(X):
+            X = X.tocsc()
+            mean = np.asarray(X.mean(axis=0)).ravel()
+            return np.asarray(X.multiply(X).mean(axis=0)).ravel() - mean ** 2
+        return np.nanvar(X, axis=0)
+
+    @staticmethod
+    def _correlated(X, order: np.ndarray, threshold: float) -> np.ndarray:
+        """Greedy pruning in priority order: drop a column if |r| > threshold with an already kept one."""
+        # Correlations need a dense standardized copy: cap its size by using fewer rows
+        max_rows = max(1000, FeatureSelector.CORRELATION_BYTES // (8 * max(X.shape[1], 1)))
+        X = X[:max_rows]
+        Z = X.toarray() if sparse.issparse(X) else np.array(X, dtype=np.float64)
+        Z = Z - Z.mean(axis=0)
+        norms = np.linalg.norm(Z, axis=0)
+        norms[norms == 0] = 1.0
+        Z /= norms
+
+        keep = []
+        kept = np.zeros(Z.shape[1], dtype=bool)
+        block = FeatureSelector.BLOCK_COLUMNS
+        for start in range(0, len(order), block):
+            cols = order[start:start + block]
+            # One matrix product against everything kept so far, then resolve within the block
+            against_kept = np.abs(Z[:, cols].T @ Z[:, kept]).max(axis=1) if kept.any() else np.zeros(len(cols))
+            within = np.abs(Z[:, cols].T @ Z[:, cols])
+            chosen = []
+            for i, col in enumerate(cols):
+                if against_kept[i] > threshold or any(within[i, j] > threshold for j in chosen):
+                    continue
+                chosen.append(i)
+                keep.append(col)
+            kept[cols[chosen]] = True
+        return np.array(keep, dtype=np.int64)
+
+    @staticmethod
+    def _mutual_info_block(X, y: np.ndarray, is_classification: bool, random_state: int) -> np.ndarray:
+        score = mutual_info_classif if is_classification else mutual_info_regression
+        return score(X, y, random_state=random_state)
+
+    @staticmethod
+    def _rank(method: str, X, y: np.ndarray, is_classification: bool, n_jobs: int, random_state: int) -> np.ndarray:
+        if method == "model":
+            # Importances are only comparable within one model: parallelize over trees instead
+            model_class = ExtraTreesClassifier if is_classification else ExtraTreesRegressor
+            model = model_class(n_estimators=100, max_features="sqrt", n_jobs=min(n_jobs, ResourceGovernor.threads()),
+                                random_state=random_state).fit(X, y)
+            return model.feature_importances_
+
+        if sparse.issparse(X):
+            X = X.tocsc()  # Cheap column-block slicing
+        block = FeatureSelector.BLOCK_COLUMNS
+        starts = range(0, X.shape[1], block)
+        n_workers = max(1, min(n_jobs, len(starts), ResourceGovernor.threads()))
+        scored = Parallel(n_jobs=n_workers)(
+            delayed(FeatureSelector._mutual_info_block)(X[:, s:s + block], y, is_classification, random_state)
+            for s in starts
+        )
+        return np.concatenate(scored)
+
+    @staticmethod
+    def select(X, y: np.ndarray, is_classification: bool, config: dict, log=None):
+        """Returns (selected column indices into X, summary report)."""
+        started = time.monotonic()
+        log = log or (lambda message: None)
+        methods = FeatureSelector._methods(config)
+        budget = config.get("time_budget")
+        n_jobs = int(config.get("n_jobs", settings.TRAINING_N_JOBS))
+        random_state = int(config.get("random_state", 42))
+        n_features = X.shape[1]
+        k = FeatureSelector._target_count(config.get("max_features"), n_features)
+
+        # Scoring stages look at a row sample only
+        sample_rows = int(config.get("sample_rows", settings.TRAINING_SELECTION_SAMPLE_ROWS))
+        rows = np.arange(X.shape[0])
+        if X.shape[0] > sample_rows:
+            rows = np.sort(np.random.default_rng(random_state).choice(X.shape[0], sample_rows, replace=False))
+        Xs = X.tocsr()[rows] if sparse.issparse(X) else np.asarray(X, dtype=np.float64)[rows]
+        ys = np.asarray(y)[rows]
+
+        selected = np.arange(n_features)
+        variances = FeatureSelector._variances(Xs)
+        dropped = {}
+        skipped = []
+
+        def over_budget():
+            return budget is not None and time.monotonic() - started > float(budget)
+
+        for method in methods:
+            if over_budget():
+                skipped.append(method)
+                continue
+            before = len(selected)
+            if method == "variance":
+                selected = selected[variances[selected] > float(config.get("variance_threshold", 0.0))]
+            elif method == "correlation":
+                # Higher-variance columns win ties between correlated pairs
+                order = np.argsort(-variances[selected], kind="stable")
+                kept = FeatureSelector._correlated(Xs[:, selected], order, float(config.get("correlation_threshold", 0.95)))
+                selected = np.sort(selected[kept])
+            elif len(selected) > k:
+                scores = FeatureSelector._rank(method, Xs[:, selected], ys, is_classification, n_jobs, random_state)
+                selected = np.sort(selected[np.argsort(-scores, kind="stable")[:k]])
+            dropped[method] = before - len(selected)
+            log(f"Feature selection [{method}]: {before} -> {len(selected)} columns.")
+
+        if len(selected) > k:
+            # No ranking stage ran (not requested or out of budget): keep the most variable columns
+            before = len(selected)
+            selected = np.sort(selected[np.argsort(-variances[selected], kind="stable")[:k]])
+            dropped["variance_rank"] = before - len(selected)
+            log(f"Feature selection [variance_rank]: {before} -> {len(selected)} columns.")
+
+        if len(selected) == 0:
+            raise ValueError("Feature selection removed every column; lower the variance/correlation thresholds")
+
+        report = {
+            "methods": [m for m in methods if m not in skipped],
+            "skipped": skipped,
+            "n_input": int(n_features),
+            "n_selected": int(len(selected)),
+            "dropped": dropped,
+            "sample_rows": int(len(rows)),
+            "seconds": round(time.monotonic() - started, 3),
+        }
+        return selected, report
@@ -0,0 +1,428 @@
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import xgboost as xgb
+from typing import Callable, Iterator, List, Optional
+from scipy import sparse
+
+from app.core.config import settings
+from app.core.resources import ResourceGovernor
+from app.training.budget import TrainingBudget, XGBoostClock
+from app.training.preprocessing import TabularPreprocessor
+
+
+class _ParquetBatches(xgb.DataIter):
+    """
+    XGBoost data iterator over preprocessed parquet batches. XGBoost calls reset()
+    and walks the iterator once per pass it needs (sketching, then quantizing), so
+    `batches` is a factory that replays the same (X, y) sequence every time.
+    """
+
+    def __init__(self, batches: Callable[[], Iterator[tuple]], cache_prefix: Optional[str] = None):
+        self._batches = batches
+        self._it = None
+        super().__init__(cache_prefix=cache_prefix, release_data=True)
+
+    def next(self, input_data: Callable) -> bool:
+        if self._it is None:
+            self._it = self._batches()
+        for X, y in self._it:
+            input_data(data=X, label=y)
+            return True
+        return False
+
+    def reset(self):
+        self._it = None
+
+
+class _RoundMonitor(xgb.callback.TrainingCallback):
+    """Reports boosting progress and lets a cancellation interrupt training between rounds."""
+
+    def __init__(self, rounds: int, progress: Callable, should_stop: Callable):
+        super().__init__()
+        self.rounds = rounds
+        self.progress = progress
+        self.should_stop = should_stop
+
+    def after_iteration(self, model, epoch, evals_log) -> bool:
+        self.progress(min(1.0, (epoch + 1) / self.rounds))
+        self.should_stop()
+        return False
+
+
+class StreamingTrainer:
+    """
+    Out-of-core training for registry entries with a "streaming" spec, for datasets
+    too large to load as one DataFrame.
+    Pass 1 streams the file once to collect the target classes and a uniform row
+    sample the TabularPreprocessor is fitted on. A fixed set of rows (drawn per row
+    from a seed, identical in every pass) is held out of training and scored in a
+    final pass. What happens in between depends on the spec's "mode":
+      - "partial_fit": each epoch visits the parquet row groups in a new random order,
+        transforms every batch with the fitted preprocessor, mixes rows in a shuffle
+        buffer and feeds partial_fit one batch at a time, so memory stays bounded by
+        the buffer and one row group. Estimators whose partial_fit accumulates
+        statistics (naive Bayes) see each row once whatever `epochs` says;
+      - "data_iter" (XGBoost): a data iterator feeds the transformed batches, as float32,
+        into a QuantileDMatrix that XGBoost sketches and quantizes batch by batch, so
+        only the compressed histogram index is kept. With `external_memory` (default:
+        files above TRAINING_EXTERNAL_MEMORY_BYTES) it is an ExtMemQuantileDMatrix
+        paged to CACHE_DIR instead, for data larger than RAM. The hist booster then runs
+        with the run's budget: early stopping on a seeded validation slice of the
+        training rows and the time limit.
+
+    config: {
+        "epochs": 5, "batch_rows": 10000, "shuffle_buffer_rows": 100000,
+        "holdout_fraction": 0.2, "fit_sample_rows": 100000, "random_state": 42,
+        "external_memory": null
+    }
+    """
+
+    @staticmethod
+    def enabled(config: Optional[dict], dataset_path: str, model_info: dict, in_memory_only: bool) -> bool:
+        """
+        Explicit `config` turns streaming on ({"enabled": false} turns it off); otherwise it is chosen
+        for files above TRAINING_STREAMING_MIN_BYTES when the estimator supports it and no in-memory-only
+        stage (feature selection, tuning, cross-validation) is requested.
+        """
+        if config is not None:
+            if not config.get("enabled", True):
+                return False
+            if "streaming" not in model_info:
+                raise ValueError(f"Streaming training is not available for {model_info['name']}")
+            if in_memory_only:
+                raise ValueError("Streaming training does not support feature selection, tuning or cross-validation")
+            return True
+        return (
+            "streaming" in model_info and not in_memory_only
+            and os.path.getsize(dataset_path) >= settings.TRAINING_STREAMING_MIN_BYTES
+        )
+
+    @staticmethod
+    def _batches(parquet_file: pq.ParquetFile, columns: List[str], batch_rows: int,
+                 row_groups) -> Iterator[tuple]:
+        """(row group, offset within it, frame) for every batch of the given row groups, in that order."""
+        for group in row_groups:
+            offset = 0
+            for batch in parquet_file.iter_batches(batch_size=batch_rows, row_groups=[int(group)], columns=columns):
+                frame = batch.to_pandas()
+                yield int(group), offset, frame
+                offset += len(frame)
+
+    @staticmethod
+    def _draws(seed: int, group: int, offset: int, n: int) -> np.ndarray:
+        # Seeded by position, so a row lands on the same side of the holdout in every pass
+        return np.random.default_rng([seed, group, offset]).random((3, n))
+
+    @staticmethod
+    def _stack(parts: list):
+        if sparse.issparse(parts[0]):
+            return sparse.vstack(parts, format="csr")
+        return pd.concat(parts, ignore_index=True)
+
+    @staticmethod
+    def _take(X, rows: np.ndarray):
+        return X.iloc[rows] if hasattr(X, "iloc") else X[rows]
+
+    @staticmethod
+    def _float32(X):
+        """Model input as float32 (categorical columns kept), XGBoost's native precision."""
+        if sparse.issparse(X):
+            return X.astype(np.float32)
+        return X.astype({c: np.float32 for c in X.columns if not isinstance(X[c].dtype, pd.CategoricalDtype)})
+
+    @staticmethod
+    def train(dataset_path: str, target: str, feature_columns: Optional[List[str]], model_info: dict, params: dict,
+              config: dict, deadline: Optional[float] = None, log: Optional[Callable] = None,
+              progress: Optional[Callable] = None, should_stop: Optional[Callable] = None,
+              budget: Optional[dict] = None) -> dict:
+        """
+        Returns {"model", "preprocessor", "y_test", "preds", "probs", "report", "budget"}; `y_test` holds the
+        encoded targets of the held-out rows and "budget" the iteration stats of a "data_iter" fit (else None).
+        `progress(fraction)` is called after every partial_fit batch or boosting round.
+        """
+        log = log or (lambda message: None)
+        progress = progress or (lambda fraction: None)
+        should_stop = should_stop or (lambda: None)
+        budget = budget or {}
+        started = time.time()
+        is_classification = model_info["type"] == "classification"
+        spec = model_info["streaming"]
+        boosting = spec["mode"] == "data_iter"
+        epochs = int(config.get("epochs", settings.TRAINING_STREAMING_EPOCHS))
+        if not boosting and not spec["multi_epoch"] and epochs > 1:
+            log(f"{model_info['name']} accumulates statistics in partial_fit: training on one epoch instead of {epochs}.")
+            epochs = 1
+        batch_rows = int(config.get("batch_rows", settings.TRAINING_STREAMING_BATCH_ROWS))
+        buffer_rows = max(batch_rows, int(config.get("shuffle_buffer_rows", settings.TRAINING_STREAMING_BUFFER_ROWS)))
+        seed = int(config.get("random_state", 42))
+
+        parquet_file = pq.ParquetFile(dataset_path)
+        names = parquet_file.schema_arrow.names
+        if target not in names:
+            raise ValueError(f"Target column '{target}' not found")
+        if feature_columns:
+            features = [c for c in feature_columns if c in names and c != target]
+        else:
+            features = [c for c in names if c != target]
+        columns = features + [target]
+        n_rows = parquet_file.metadata.num_rows
+        sample_share = min(1.0, int(config.get("fit_sample_rows", settings.TRAINING_STREAMING_SAMPLE_ROWS)) / max(n_rows, 1))
+        holdout_share = min(float(config.get("holdout_fraction", 0.2)), settings.TRAINING_STREAMING_MAX_HOLDOUT_ROWS / max(n_rows, 1))
+        # Boosting: early stopping watches a slice of the training rows (same cap as the holdout)
+        early_stopping = boosting and bool(budget.get("early_stopping", settings.TRAINING_EARLY_STOPPING))
+        patience = int(budget.get("patience", settings.TRAINING_EARLY_STOPPING_PATIENCE))
+        fraction = float(budget.get("validation_fraction", settings.TRAINING_VALIDATION_FRACTION))
+        validation_share = min(fraction, settings.TRAINING_STREAMING_MAX_HOLDOUT_ROWS / max(n_rows, 1)) if early_stopping else 0.0
+        if boosting:
+            log(f"Streaming {n_rows} rows in {parquet_file.num_row_groups} row group(s) into a quantized matrix: "
+                f"batches of {batch_rows}, {holdout_share:.1%} held out.")
+        else:
+            log(f"Streaming {n_rows} rows in {parquet_file.num_row_groups} row group(s): {epochs} epoch(s), "
+                f"batches of {batch_rows}, shuffle buffer {buffer_rows} rows, {holdout_share:.1%} held out.")
+
+        # Pass 1: target classes, row counts and the preprocessing sample
+        samples, classes, n_train, n_validation = [], set(), 0, 0
+        for group, offset, frame in StreamingTrainer._batches(parquet_file, columns, batch_rows, range(parquet_file.num_row_groups)):
+            holdout_draw, sample_draw, validation_draw = StreamingTrainer._draws(seed, group, offset, len(frame))
+            labelled = frame[target].notna().to_numpy()
+            if is_classification:
+                classes.update(frame.loc[labelled, target].astype(str).unique())
+            train_rows = labelled & (holdout_draw >= holdout_share)
+            n_train += int(train_rows.sum())
+            n_validation += int((train_rows & (validation_draw < validation_share)).sum())
+            samples.append(frame.loc[sample_draw < sample_share, features])
+        should_stop()
+        classes = sorted(classes)
+        sample = pd.concat(samples, ignore_index=True)
+        del samples
+        native = model_info.get("native_categorical") if boosting else None
+        preprocessor = TabularPreprocessor(native_categorical=native is not None, max_categories=(native or {}).get("max_categories"))
+        preprocessor.fit(sample, log=log)
+        preprocessor.target_classes_ = classes if is_classification else None
+        log(f"Preprocessing fitted on a {len(sample)}-row sample: {len(preprocessor.feature_names_)} model features.")
+        del sample
+
+        def encode(y: pd.Series) -> np.ndarray:
+            if is_classification:
+                return pd.Categorical(y.astype(str), categories=classes).codes.astype(np.int64)
+            return y.to_numpy(dtype=np.float64)
+
+        if boosting:
+            if early_stopping and n_validation < TrainingBudget.MIN_VALIDATION_ROWS:
+                log(f"Early stopping skipped: the validation slice holds only {n_validation} rows.")
+                early_stopping, validation_share, n_validation = False, 0.0, 0
+            n_train -= n_validation
+            if n_train == 0:
+                raise ValueError("No labelled training rows left after the hold-out split")
+            if preprocessor.native_columns_:
+                params = {**params, **native["params"]}
+            model, budget_stats, fit_report = StreamingTrainer._boost(
+                parquet_file, columns, features, target, batch_rows, seed, holdout_share, validation_share,
+                preprocessor, encode, model_info, params, config, classes, early_stopping, patience,
+                os.path.getsize(dataset_path), deadline, log, progress, should_stop
+            )
+            budget_stats["validation_fraction"] = fraction if early_stopping else None
+            state = {"batches": fit_report.pop("batches"), "rows": n_train, "stopped_by": budget_stats["stopped_by"]}
+            epochs_done = 1
+        else:
+            budget_stats, fit_report = None, {"shuffle_buffer_rows": buffer_rows}
+            model = model_info["class"](**{**params, **ResourceGovernor.thread_params(model_info["class"], ResourceGovernor.threads())})
+            fit_kwargs = {"classes": np.arange(len(classes))} if is_classification else {}
+            total_batches = max(1, epochs * -(-n_train // batch_rows))
+            state = {"batches": 0, "rows": 0, "stopped_by": None}
+            rng = np.random.default_rng(seed)
+
+            def flush(buffer: list) -> bool:
+                """Shuffles the buffered rows and feeds them to partial_fit; False once training must stop."""
+                X = StreamingTrainer._stack([part[0] for part in buffer])
+                y = np.concatenate([part[1] for part in buffer])
+                order = rng.permutation(len(y))
+                for start in range(0, len(y), batch_rows):
+                    rows = order[start:start + batch_rows]
+                    model.partial_fit(StreamingTrainer._take(X, rows), y[rows], **fit_kwargs)
+                    state["batches"] += 1
+                    state["rows"] += len(rows)
+                    progress(min(1.0, state["batches"] / total_batches))
+                    if deadline is not None and time.time() >= deadline:
+                        state["stopped_by"] = "time_limit"
+                        return False
+                should_stop()
+                return True
+
+            # Epochs: row groups in a fresh order, rows mixed in the shuffle buffer
+            epochs_done = 0
+            for epoch in range(epochs):
+                buffer, buffered = [], 0
+                for group, offset, frame in StreamingTrainer._batches(parquet_file, columns, batch_rows, rng.permutation(parquet_file.num_row_groups)):
+                    holdout_draw, _, _ = StreamingTrainer._draws(seed, group, offset, len(frame))
+                    train_rows = frame[target].notna().to_numpy() & (holdout_draw >= holdout_share)
+                    if not train_rows.any():
+                        continue
+                    part = frame.loc[train_rows]
+                    buffer.append((preprocessor.transform(part[features]), encode(part[target])))
+                    buffered += len(part)
+                    if buffered >= buffer_rows:
+                        if not flush(buffer):
+                            break
+                        buffer, buffered = [], 0
+                if buffer and not state["stopped_by"]:
+                    flush(buffer)
+                if state["stopped_by"]:
+                    break
+                epochs_done += 1
+                log(f"Epoch {epoch + 1}/{epochs} done: {state['rows']} rows fed in {state['batches']} batches, "
+                    f"{time.time() - started:.1f}s elapsed.")
+            if state["batches"] == 0:
+                raise ValueError("No labelled training rows left after the hold-out split")
+
+        # Final pass: score the held-out rows
+        log("Scoring the held-out rows...")
+        y_parts, pred_parts, proba_parts = [], [], []
+        has_proba = hasattr(model, "predict_proba")
+        for group, offset, frame in StreamingTrainer._batches(parquet_file, columns, batch_rows, range(parquet_file.num_row_groups)):
+            holdout_draw, _, _ = StreamingTrainer._draws(seed, group, offset, len(frame))
+            rows = frame[target].notna().to_numpy() & (holdout_draw < holdout_share)
+            if not rows.any():
+                continue
+            part = frame.loc[rows]
+            X = preprocessor.transform(part[features])
+            y_parts.append(encode(part[target]))
+            pred_parts.append(np.asarray(model.predict(X)))
+            if is_classification and has_proba:
+                proba_parts.append(model.predict_proba(X))
+        if not y_parts:
+            raise ValueError("The hold-out set is empty: raise holdout_fraction or use in-memory training")
+
+        report = {
+            "mode": spec["mode"],
+            "rows": n_rows,
+            "train_rows": n_train,
+            "validation_rows": n_validation,
+            "holdout_rows": int(sum(len(part) for part in y_parts)),
+            "epochs": epochs_done,
+            "batches": state["batches"],
+            "rows_fed": state["rows"],
+            "batch_rows": batch_rows,
+            **fit_report,
+            "stopped_by": state["stopped_by"] or "epochs",
+            "seconds": round(time.time() - started, 3),
+        }
+        return {
+            "model": model,
+            "preprocessor": preprocessor,
+            "y_test": np.concatenate(y_parts),
+            "preds": np.concatenate(pred_parts),
+            "probs": np.vstack(proba_parts) if proba_parts else None,
+            "report": report,
+            "budget": budget_stats,
+        }
+
+    @staticmethod
+    def _boost(parquet_file: pq.ParquetFile, columns: List[str], features: List[str], target: str, batch_rows: int,
+               seed: int, holdout_share: float, validation_share: float, preprocessor: TabularPreprocessor,
+               encode: Callable, model_info: dict, params: dict, config: dict, classes: list, early_stopping: bool,
+               patience: int, file_bytes: int, deadline: Optional[float], log: Callable, progress: Callable,
+               should_stop: Callable) -> tuple:
+        """
+        Builds the quantized training (and validation) matrices from data iterators and boosts on them.
+        Returns (sklearn-wrapped model, budget stats, report fields).
+        """
+        model = model_info["class"](**{
+            **params, **model_info["streaming"]["params"],
+            **ResourceGovernor.thread_params(model_info["class"], ResourceGovernor.threads()),
+        })
+        booster_params = {k: v for k, v in model.get_xgb_params().items() if v is not None and k != "use_label_encoder"}
+        if len(classes) > 2:
+            booster_params.update(objective="multi:softprob", num_class=len(classes))
+            if "eval_metric" in booster_params:
+                booster_params["eval_metric"] = TrainingBudget.eval_metric(booster_params["eval_metric"], len(classes))
+                model.set_params(eval_metric=booster_params["eval_metric"])
+        rounds = int(model.get_num_boosting_rounds())
+        external = config.get("external_memory")
+        external = file_bytes >= settings.TRAINING_EXTERNAL_MEMORY_BYTES if external is None else bool(external)
+        matrix_class = xgb.ExtMemQuantileDMatrix if external else xgb.QuantileDMatrix
+        matrix_kwargs = {"enable_categorical": bool(preprocessor.native_columns_)}
+        if booster_params.get("max_bin"):
+            matrix_kwargs["max_bin"] = booster_params["max_bin"]
+        counts = {"batches": 0}
+
+        def batches(validation: bool):
+            def replay():
+                # Same row groups, batches and draws on every pass XGBoost makes over the iterator
+                if not validation:
+                    counts["batches"] = 0
+                for group, offset, frame in StreamingTrainer._batches(parquet_file, columns, batch_rows, range(parquet_file.num_row_groups)):
+                    holdout_draw, _, validation_draw = StreamingTrainer._draws(seed, group, offset, len(frame))
+                    in_validation = validation_draw < validation_share
+                    rows = frame[target].notna().to_numpy() & (holdout_draw >= holdout_share) & (in_validation if validation else ~in_validation)
+                    if not rows.any():
+                        continue
+                    part = frame.loc[rows]
+                    if not validation:
+                        counts["batches"] += 1
+                    yield StreamingTrainer._float32(preprocessor.transform(part[features])), encode(part[target])
+                should_stop()
+            return replay
+
+        cache_dir = tempfile.mkdtemp(prefix="xgb-", dir=settings.CACHE_DIR) if external else None
+        try:
+            log(f"Building {matrix_class.__name__} ({'paged to disk' if external else 'in memory'}) from the training batches...")
+            built = time.time()
+            train_matrix = matrix_class(
+                _ParquetBatches(batches(False), os.path.join(cache_dir, "train") if external else None), **matrix_kwargs
+            )
+            evals = []
+            if early_stopping:
+                evals = [(matrix_class(
+                    _ParquetBatches(batches(True), os.path.join(cache_dir, "validation") if external else None),
+                    ref=train_matrix, **matrix_kwargs
+                ), "validation")]
+            build_seconds = time.time() - built
+            log(f"Quantized {train_matrix.num_row()} rows x {train_matrix.num_col()} features in {build_seconds:.1f}s. "
+                f"Boosting up to {rounds} rounds" + (f", early stopping after {patience} rounds without improvement." if early_stopping else "."))
+
+            started = time.time()
+            marks = [(0, 0.0)]
+            booster = xgb.train(
+                booster_params, train_matrix, rounds, evals=evals, verbose_eval=False,
+                early_stopping_rounds=patience if early_stopping else None,
+                callbacks=[XGBoostClock(started, deadline, marks), _RoundMonitor(rounds, progress, should_stop)],
+            )
+            del train_matrix, evals
+        finally:
+            if cache_dir:
+                shutil.rmtree(cache_dir, ignore_errors=True)
+
+        # The sklearn wrapper around the trained booster keeps the artifact's predict / predict_proba API
+        model._Booster = booster
+        model.objective = booster_params["objective"]  # As fit() does: later set_params() re-send it to the booster
+        if model_info["type"] == "classification":
+            model.n_classes_ = len(classes)
+        done = int(booster.num_boosted_rounds())
+        best = int(booster.best_iteration) + 1 if early_stopping else done
+        stopped_by = None
+        if done < rounds:
+            stopped_by = "time_limit" if deadline is not None and marks[-1][1] + started >= deadline else "early_stopping"
+        stats = {
+            "iterations": done,
+            "max_iterations": rounds,
+            "best_iteration": best,
+            "time_to_best_seconds": round(TrainingBudget.time_at(marks, best), 3),
+            "fit_seconds": round(time.time() - started, 3),
+            "stopped_by": stopped_by or "max_iterations",
+            "early_stopping": early_stopping,
+            "patience": patience if early_stopping else None,
+        }
+        log(f"Boosted {done}/{rounds} rounds in {stats['fit_seconds']}s (stopped by {stats['stopped_by'].replace('_', ' ')}); "
+            f"best at round {best} after {stats['time_to_best_seconds']}s.")
+        return model, stats, {
+            "batches": counts["batches"],
+            "matrix": matrix_class.__name__,
+            "external_memory": external,
+            "matrix_seconds": round(build_seconds, 3),
+        }
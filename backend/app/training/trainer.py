@@ -2,6 +2,7 @@ import pandas as pd
 import numpy as np
 import joblib
 import os
+import time
 import uuid
 from datetime import datetime
 from sqlalchemy.orm import Session
@@ -13,10 +14,24 @@ from sklearn.metrics import (
     explained_variance_score, max_error, median_absolute_error, mean_absolute_percentage_error
 )
 from sklearn.preprocessing import LabelEncoder
+from sklearn.pipeline import Pipeline
+from scipy import sparse
 
 from app.db.models import TrainingRun, Dataset
+from app.data.ingestion.storage import DatasetStore
+from app.training.selection import FeatureSelector
+from app.training.tuning import HyperparameterSearch
+from app.training.validation import CrossValidator, FoldPreparation
+from app.training.budget import TrainingBudget
+from app.training.streaming import StreamingTrainer
+from app.training.preprocessing import TabularPreprocessor
+from app.training.logbook import TrainingLogBuffer
 from app.model_zoo.registry import ModelRegistry
 from app.core.config import settings
+from app.core.resources import ResourceGovernor
+
+class TrainingCancelled(Exception):
+    pass
 
 class TrainingEngine:
     @staticmethod
@@ -24,170 +39,90 @@ class TrainingEngine:
         run = db.query(TrainingRun).filter(TrainingRun.id == run_id).first()
         if not run:
             return
+        job_started = time.time()
+
+        def check_cancelled():
+            # Cooperative cancellation point between stages (the executor hard-kills after a grace period)
+            requested = db.query(TrainingRun.cancel_requested_at).filter(TrainingRun.id == run_id).scalar()
+            if requested is not None:
+                raise TrainingCancelled()
+
+        # Append-only log: lines are buffered and written in batches; stage boundaries flush
+        logs = TrainingLogBuffer(run_id, db)
 
         def log_event(message):
-            timestamp = datetime.now().strftime("%H:%M:%S")
-            full_msg = f"[{timestamp}] {message}"
-            # Ensure list exists
-            current_logs = list(run.logs or [])
-            current_logs.append(full_msg)
-            run.logs = current_logs
-            db.commit()
+            logs.log(message, stage=run.stage, progress=run.progress)
 
         try:
             log_event(f"Initializing Compute Engine for {run.model_name}...")
+            log_event(f"CPU budget: {ResourceGovernor.threads()} thread(s).")
             # 1. Update Status: Loading
             run.status = "running"
             run.stage = "loading"
             run.progress = 10
             log_event("Fetching source artifact from registry...")
-            db.commit()
+            logs.flush()
+
+            check_cancelled()
 
             # 2. Load Dataset
             dataset = db.query(Dataset).filter(Dataset.id == run.dataset_id).first()
-            df = pd.read_parquet(dataset.file_path)
-            log_event(f"Loaded {len(df)} records into memory.")
-
-            # 3. Prepare X (Features) and y (Target)
-            target = run.target_column
-            log_event(f"Isolating target vector: '{target}'")
-            if target not in df.columns:
-                raise ValueError(f"Target column '{target}' not found")
-
-            # Selection Logic
-            if run.feature_columns:
-                existing_features = [c for c in run.feature_columns if c in df.columns]
-                log_event(f"Filtering feature matrix: {len(existing_features)} columns explicitly selected.")
-                X = df[existing_features]
-            else:
-                log_event("No selection filter applied. Using all columns except target.")
-                X = df.drop(columns=[target])
-            
-            y = df[target]
-
-            # 4. Preprocessing
-            run.stage = "preprocessing"
-            run.progress = 30
-            log_event("Applying Advanced Preprocessing (Imputation + Encoding)...")
-            db.commit()
-
-            from sklearn.feature_extraction.text import TfidfVectorizer
-            from sklearn.impute import SimpleImputer
-
-            # 4a. Handle Missing Values
-            # Numeric Imputation
-            num_cols = X.select_dtypes(include=['int64', 'float64']).columns
-            if len(num_cols) > 0:
-                imp = SimpleImputer(strategy='median')
-                X[num_cols] = imp.fit_transform(X[num_cols])
-
-            # Categorical Imputation
-            cat_cols = X.select_dtypes(include=['object', 'category']).columns
-            if len(cat_cols) > 0:
-                imp_cat = SimpleImputer(strategy='constant', fill_value='Unknown')
-                X[cat_cols] = imp_cat.fit_transform(X[cat_cols])
-
-            # 4b. Feature Encoding
-            encoders = {}
-            new_X_parts = []
-            
-            # Keep Numeric Columns as is
-            if len(num_cols) > 0:
-                new_X_parts.append(X[num_cols].reset_index(drop=True))
-
-            # Process Categorical / Text
-            for col in cat_cols:
-                # Heuristic: If unique values > 20 and average length > 10, treat as Text (TF-IDF)
-                # Otherwise treat as Categorical (Label/OneHot)
-                is_text = False
-                try:
-                    if X[col].nunique() > 20:
-                        # Check avg string length
-                        avg_len = X[col].astype(str).str.len().mean()
-                        if avg_len > 15:
-                            is_text = True
-                except:
-                    pass
-
-                if is_text:
-                    log_event(f"Detected text column '{col}' - Applying TF-IDF Vectorization...")
-                    tfidf = TfidfVectorizer(max_features=50, stop_words='english')
-                    text_matrix = tfidf.fit_transform(X[col].astype(str)).toarray()
-                    # Create DF for these features
-                    tfidf_cols = [f"{col}_tfidf_{i}" for i in range(text_matrix.shape[1])]
-                    new_X_parts.append(pd.DataFrame(text_matrix, columns=tfidf_cols))
-                    encoders[col] = tfidf
-                else:
-                    # Standard Label Encoding
-                    le = LabelEncoder()
-                    # Fit transform returns numpy array, wrap in Series/DF? 
-                    # Actually standardizing on concatenation of DataFrames
-                    encoded_col = le.fit_transform(X[col].astype(str))
-                    new_X_parts.append(pd.DataFrame(encoded_col, columns=[col]))
-                    encoders[col] = le
-            
-            # Reconstruct X
-            if new_X_parts:
-                X = pd.concat(new_X_parts, axis=1)
-            
-            # Ensure Feature Names are clean strings via columns
-            # (Pandas concat handles this, but index reset is crucial above)
-
-            y_is_categorical = False
             model_info = ModelRegistry.get_model(run.model_name)
-            if y.dtype == 'object' or model_info["type"] == "classification":
-                y_is_categorical = True
-                log_event(f"Target is categorical. Mapping classes: {y.unique()[:3]}...")
-                le_target = LabelEncoder()
-                y = le_target.fit_transform(y.astype(str))
-                target_classes = [str(c) for c in le_target.classes_]
-                encoders["__target__"] = le_target
-            else:
-                target_classes = []
+            # Wall-clock limit for the whole run: the search gets at most half of what is left, the final fit the rest
+            budget = run.budget or {}
+            time_limit = float(budget.get("time_limit") or 0)
+            deadline = job_started + time_limit if time_limit > 0 else None
+            selection_report = tuning_report = cv_report = budget_stats = streaming_report = None
 
-            # Split Data
-            log_event("Performing 80/20 train-test split. 80% of data is used to teach the model, 20% is hidden to test its knowledge later.")
-            X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+            if StreamingTrainer.enabled(run.streaming, dataset.file_path, model_info,
+                                        bool(run.feature_selection or run.tuning or run.evaluation)):
+                # Out-of-core: the table is streamed in row-group batches (partial_fit or an XGBoost data iterator), never loaded whole
+                run.stage = "fitting"
+                run.progress = 30
+                log_event(f"Streaming training for {model_info['name']}: the dataset is read in batches, not loaded into memory.")
+                logs.flush()
 
-            # 5. Training
-            run.stage = "fitting"
-            run.progress = 50
-            log_event(f"Fitting model architecture: {model_info['name']}")
-            log_event(f"Algorithm Type: {model_info['type'].upper()} - optimizing for {'accuracy/F1' if model_info['type'] == 'classification' else 'error minimization (RMSE)'}.")
-            log_event("Hyperparameters: " + str(run.parameters or "Optimized Defaults"))
-            log_event("Explanation: The model is now iteratively learning the patterns mapping your features (X) to the target (Y).")
-            db.commit()
-
-            params = run.parameters or {}
-            
-            # --- PARAMETER SANITIZATION ---
-            # Only allow parameters that are explicitly defined in the Model Registry for this algorithm.
-            # This prevents frontend 'ghost' parameters (e.g. n_estimators from a previous RF run) 
-            # from crashing models that don't support them (e.g. Ridge).
-            default_params = model_info.get("params", {})
-            valid_keys = set(default_params.keys())
-            
-            # Always allow random_state if the model supports it (most do, but checking defaults is safest)
-            # If 'random_state' is in defaults, it's already covered.
-            
-            clean_params = {k: v for k, v in params.items() if k in valid_keys}
-            
-            # Log specific dropped keys for debugging
-            dropped_keys = set(params.keys()) - set(clean_params.keys())
-            if dropped_keys:
-                log_event(f"Sanitized parameters. Dropped invalid keys: {dropped_keys}")
-
-            clf = model_info["class"](**clean_params)
-            clf.fit(X_train, y_train)
-            log_event("Core weights calculation complete. The mathematical function has been defined.")
-
-            # 6. Evaluation
-            run.stage = "scoring"
-            run.progress = 80
-            log_event("Scoring model against held-out validation set...")
-            db.commit()
+                progress_flushed = {"at": time.monotonic()}
+
+                def stream_progress(fraction):
+                    # Called on every batch / boosting round: commit (with any buffered log lines) at most every few seconds
+                    run.progress = 30 + int(50 * fraction)
+                    if time.monotonic() - progress_flushed["at"] >= settings.TRAINING_LOG_FLUSH_SECONDS:
+                        progress_flushed["at"] = time.monotonic()
+                        logs.flush()
+
+                params = run.parameters or {}
+                clean_params = {k: v for k, v in params.items() if k in model_info.get("params", {})}
+                streamed = StreamingTrainer.train(
+                    dataset.file_path, run.target_column, run.feature_columns, model_info, clean_params,
+                    run.streaming or {}, deadline=deadline, log=log_event, progress=stream_progress, should_stop=check_cancelled,
+                    budget=budget
+                )
+                clf, preprocessor = streamed["model"], streamed["preprocessor"]
+                streaming_report, budget_stats = streamed["report"], streamed["budget"]
+                feature_names = list(preprocessor.feature_names_)
+                target_classes = preprocessor.target_classes_ or []
+                X_test, y_test, preds, probs = None, streamed["y_test"], streamed["preds"], streamed["probs"]
+                if streaming_report["mode"] == "data_iter":
+                    log_event(f"Boosted on {streaming_report['rows_fed']} rows via a {streaming_report['matrix']} "
+                              f"in {streaming_report['seconds']}s ({streaming_report['stopped_by'].replace('_', ' ')}).")
+                else:
+                    log_event(f"Streamed {streaming_report['rows_fed']} rows over {streaming_report['epochs']} epoch(s) "
+                              f"in {streaming_report['seconds']}s ({streaming_report['stopped_by'].replace('_', ' ')}).")
+
+                check_cancelled()
+                run.stage = "scoring"
+                run.progress = 80
+                log_event(f"Scored {streaming_report['holdout_rows']} held-out rows.")
+                logs.flush()
+            else:
+                trained = TrainingEngine._train_in_memory(run, dataset, model_info, budget, deadline, log_event, logs, check_cancelled)
+                clf, preprocessor = trained["model"], trained["preprocessor"]
+                feature_names, target_classes = trained["feature_names"], trained["target_classes"]
+                X_test, y_test, preds, probs = trained["X_test"], trained["y_test"], trained["preds"], trained["probs"]
+                selection_report, tuning_report = trained["selection"], trained["tuning"]
+                cv_report, budget_stats = trained["cv"], trained["budget"]
 
-            preds = clf.predict(X_test)
             metrics = {}
             report = {}
 
@@ -203,9 +138,10 @@ class TrainingEngine:
                 metrics["cohen_kappa"] = float(cohen_kappa_score(y_test, preds))
                 
                 # Log Loss (needs probabilities)
-                if hasattr(clf, "predict_proba"):
+                if probs is not None or (X_test is not None and hasattr(clf, "predict_proba")):
                     try:
-                        probs = clf.predict_proba(X_test)
+                        if probs is None:
+                            probs = clf.predict_proba(X_test)
                         metrics["log_loss"] = float(log_loss(y_test, probs))
                         
                         # ROC AUC (Handle Binary vs Multi-class)
@@ -234,7 +170,7 @@ class TrainingEngine:
                     importances = np.abs(clf.coef_[0])
                 
                 if importances is not None:
-                    report["feature_importance"] = dict(zip(X.columns, importances.tolist()))
+                    report["feature_importance"] = dict(zip(feature_names, importances.tolist()))
 
             else:
                 # --- REGRESSION METRICS (7+) ---
@@ -274,34 +210,305 @@ class TrainingEngine:
                     importances = np.abs(clf.coef_)
                 
                 if importances is not None:
-                    report["feature_importance"] = dict(zip(X.columns, importances.tolist()))
+                    report["feature_importance"] = dict(zip(feature_names, importances.tolist()))
+
+            if selection_report is not None:
+                report["feature_selection"] = selection_report
+            if tuning_report is not None:
+                report["tuning"] = tuning_report
+            if cv_report is not None:
+                report["cross_validation"] = cv_report
+            if streaming_report is not None:
+                report["streaming"] = streaming_report
+            if budget_stats is not None:
+                report["training_budget"] = {**budget_stats, "time_limit": time_limit or None}
+                for key in ("iterations", "best_iteration", "time_to_best_seconds", "fit_seconds"):
+                    metrics[key] = float(budget_stats[key])
 
             # 9. Save Artifact
             model_filename = f"{uuid.uuid4()}.joblib"
             save_path = os.path.join(settings.MODEL_DIR, model_filename)
-            joblib.dump(clf, save_path)
-            
-            # Save Encoders
-            if encoders:
-                encoder_filename = model_filename.replace('.joblib', '_encoders.joblib')
-                encoder_path = os.path.join(settings.MODEL_DIR, encoder_filename)
-                joblib.dump(encoders, encoder_path)
+            # The preprocessing pipeline travels inside the artifact: raw records in, predictions out
+            joblib.dump(Pipeline([("preprocess", preprocessor), ("model", clf)]), save_path)
 
             # 10. Complete Run
+            check_cancelled()
             run.status = "completed"
             run.stage = "finalized"
             run.progress = 100
+            run.finished_at = datetime.utcnow()
             run.metrics = metrics
             run.detailed_report = report
             run.artifact_path = save_path
             log_event(f"Training Complete. Artifact captured: {model_filename}")
-            db.commit()
+            logs.flush()
+
+        except TrainingCancelled:
+            db.rollback()
+            run.status = "cancelled"
+            run.stage = "cancelled"
+            run.finished_at = datetime.utcnow()
+            log_event("Run cancelled by user. Stopped at the next stage boundary.")
+            logs.flush()
 
         except Exception as e:
             db.rollback()
             run.status = "failed"
+            run.finished_at = datetime.utcnow()
             run.stage = "error"
             run.error_message = str(e)
             log_event(f"CRITICAL ERROR: {str(e)}")
-            db.commit()
+            logs.flush()
             print(f"Training Failed: {e}")
+
+    @staticmethod
+    def _train_in_memory(run: TrainingRun, dataset: Dataset, model_info: dict, budget: dict, deadline,
+                         log_event, logs: TrainingLogBuffer, check_cancelled) -> dict:
+        """
+        Loads the whole table, then preprocesses, selects, tunes, fits and scores it (held-out split or cross-validation).
+        Returns the fitted model and preprocessor, the scored predictions and the stage reports.
+        """
+        df = DatasetStore.read(dataset.file_path)
+        log_event(f"Loaded {len(df)} records into memory.")
+
+        # 3. Prepare X (Features) and y (Target)
+        target = run.target_column
+        log_event(f"Isolating target vector: '{target}'")
+        if target not in df.columns:
+            raise ValueError(f"Target column '{target}' not found")
+
+        # Cross-validation bookkeeping columns: groups for grouped folds, ordering for time-series folds
+        evaluation = run.evaluation or {}
+        cv_columns = [c for c in (evaluation.get("group_column"), evaluation.get("time_column")) if c]
+        missing_cv = [c for c in cv_columns if c not in df.columns]
+        if missing_cv:
+            raise ValueError(f"Evaluation column(s) not found: {missing_cv}")
+        if evaluation.get("time_column"):
+            df = df.sort_values(evaluation["time_column"], kind="stable").reset_index(drop=True)
+        groups = df[evaluation["group_column"]].to_numpy() if evaluation.get("group_column") else None
+
+        # Selection Logic
+        if run.feature_columns:
+            existing_features = [c for c in run.feature_columns if c in df.columns]
+            log_event(f"Filtering feature matrix: {len(existing_features)} columns explicitly selected.")
+            X = df[existing_features]
+        else:
+            log_event("No selection filter applied. Using all columns except target.")
+            X = df.drop(columns=[target] + [c for c in cv_columns if c != target])
+    
+        y = df[target]
+
+        # 4. Preprocessing
+        check_cancelled()
+        run.stage = "preprocessing"
+        run.progress = 30
+        log_event("Applying Advanced Preprocessing (Imputation + Encoding)...")
+        logs.flush()
+
+        y_is_categorical = False
+        if y.dtype == 'object' or model_info["type"] == "classification":
+            y_is_categorical = True
+            log_event(f"Target is categorical. Mapping classes: {y.unique()[:3]}...")
+            le_target = LabelEncoder()
+            y = le_target.fit_transform(y.astype(str))
+            target_classes = [str(c) for c in le_target.classes_]
+        else:
+            target_classes = []
+
+        # One fitted pipeline (impute -> encode -> vectorize -> order) is learned from the
+        # training rows only and saved with the model, so serving repeats it exactly
+        native = model_info.get("native_categorical")
+        preprocessor = TabularPreprocessor(native_categorical=native is not None, max_categories=(native or {}).get("max_categories"))
+        preprocessor.target_classes_ = target_classes if y_is_categorical else None
+
+        params = run.parameters or {}
+
+        # --- PARAMETER SANITIZATION ---
+        # Only allow parameters that are explicitly defined in the Model Registry for this algorithm.
+        # This prevents frontend 'ghost' parameters (e.g. n_estimators from a previous RF run) 
+        # from crashing models that don't support them (e.g. Ridge).
+        default_params = model_info.get("params", {})
+        valid_keys = set(default_params.keys())
+    
+        # Always allow random_state if the model supports it (most do, but checking defaults is safest)
+        # If 'random_state' is in defaults, it's already covered.
+    
+        clean_params = {k: v for k, v in params.items() if k in valid_keys}
+    
+        # Log specific dropped keys for debugging
+        dropped_keys = set(params.keys()) - set(clean_params.keys())
+        if dropped_keys:
+            log_event(f"Sanitized parameters. Dropped invalid keys: {dropped_keys}")
+
+        def tuning_config(parts: int = 1) -> dict:
+            # The search gets at most half of the time left on the clock; searches inside folds split that
+            config = dict(run.tuning)
+            time_budget = float(config.get("time_budget", settings.TRAINING_TUNING_TIME_BUDGET))
+            if deadline is not None:
+                time_budget = min(time_budget, max(1.0, (deadline - time.time()) / 2))
+            config["time_budget"] = time_budget / parts
+            return config
+
+        # Split Data
+        cv_report = oof = None
+        if run.evaluation:
+            # Cross-validation: every row is scored out-of-fold, so there is no separate test split. Each fold
+            # fits preprocessing, selection and tuning on its own training rows, never on the rows it scores
+            steps = ["preprocessing"] + (["feature selection"] if run.feature_selection else []) + (["hyperparameter search"] if run.tuning else [])
+            log_event(f"Evaluation mode: cross-validation {run.evaluation}. Each fold runs its own {' + '.join(steps)} on its training rows only.")
+            logs.flush()
+            prepare = FoldPreparation(
+                preprocessor, run.model_name, model_info["type"] == "classification", native_params=(native or {}).get("params"),
+                selection=run.feature_selection, tuning=tuning_config(int(run.evaluation.get("n_splits", 5))) if run.tuning else None
+            )
+            cv_report, oof = CrossValidator.evaluate(
+                model_info["class"], clean_params, X, y, model_info["type"] == "classification",
+                run.evaluation, groups=groups, log=log_event, prepare=prepare
+            )
+            log_event("Cross-validation mean: " + ", ".join(f"{k}={v:.4f} (±{cv_report['std'][k]:.4f})" for k, v in cv_report["mean"].items()))
+            check_cancelled()
+
+            if not cv_report["refit"]:
+                # No refit: the artifact is the best-scoring fold's model with the preprocessing fitted in that fold
+                primary = list(cv_report["mean"])[0]
+                fold_scores = [f["metrics"][primary] for f in cv_report["folds"]]
+                best_fold = int(np.argmin(fold_scores) if primary in ("rmse", "mae") else np.argmax(fold_scores))
+                preprocessor, fold_reports = oof["preprocessors"][best_fold], oof["reports"][best_fold]
+                if "feature_selection" in fold_reports:
+                    run.selected_features = list(preprocessor.feature_names_)
+                if "tuning" in fold_reports:
+                    run.parameters = {**clean_params, **fold_reports["tuning"]["best_params"]}
+                cv_report["artifact_fold"] = best_fold + 1
+                log_event(f"Keeping the model of fold {best_fold + 1} ({primary}={fold_scores[best_fold]:.4f}) as the artifact.")
+
+                run.stage = "scoring"
+                run.progress = 80
+                log_event("Scoring pooled out-of-fold predictions...")
+                logs.flush()
+                return {
+                    "model": oof["models"][best_fold], "preprocessor": preprocessor, "feature_names": list(preprocessor.feature_names_),
+                    "target_classes": target_classes, "X_test": None, "y_test": np.asarray(y)[oof["index"]],
+                    "preds": oof["pred"], "probs": oof["proba"], "selection": fold_reports.get("feature_selection"),
+                    "tuning": fold_reports.get("tuning"), "cv": cv_report, "budget": None,
+                }
+
+            log_event("Fitting the final artifact on all rows.")
+            X_train, X_test, y_train, y_test = preprocessor.fit_transform(X, log=log_event), None, y, None
+        else:
+            log_event("Performing 80/20 train-test split. 80% of data is used to teach the model, 20% is hidden to test its knowledge later.")
+            X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+            X_train = preprocessor.fit_transform(X_train, log=log_event)
+            X_test = preprocessor.transform(X_test)
+        feature_names = list(preprocessor.feature_names_)
+        if preprocessor.native_columns_:
+            log_event(f"{model_info['name']} handles categories natively: {len(preprocessor.native_columns_)} column(s) passed through as categoricals, no integer encoding.")
+
+        if preprocessor.sparse_columns_:
+            # Zero-filled sparse columns (one-hot / hashing / polynomial outputs) are fed to the model as CSR, never densified
+            log_event(f"Detected {len(preprocessor.sparse_columns_)} sparse feature columns. Keeping them in compressed (CSR) form.")
+            log_event(f"Feature matrix: {X_train.shape[0]} x {X_train.shape[1]} sparse, {X_train.nnz} stored values.")
+
+        # 4c. Feature Selection (fit on the training split only)
+        selection_report = None
+        if run.feature_selection:
+            run.stage = "selecting"
+            run.progress = 40
+            log_event(f"Running feature selection on {X_train.shape[1]} columns: {run.feature_selection}")
+            logs.flush()
+            selected, selection_report = FeatureSelector.select(
+                TabularPreprocessor.numeric_view(X_train), y_train, model_info["type"] == "classification", run.feature_selection, log=log_event
+            )
+            if sparse.issparse(X_train):
+                X_train = X_train[:, selected]
+                X_test = X_test[:, selected] if X_test is not None else None
+            else:
+                X_train = X_train.iloc[:, selected]
+                X_test = X_test.iloc[:, selected] if X_test is not None else None
+            feature_names = [feature_names[i] for i in selected]
+            # Serving then skips the source columns that no longer feed the model
+            selection_report["source_columns"] = preprocessor.restrict(selected)
+            run.selected_features = feature_names
+            log_event(f"Feature selection kept {len(feature_names)} columns in {selection_report['seconds']}s.")
+
+        if preprocessor.native_columns_:
+            clean_params.update(native["params"])
+
+        # 4d. Hyperparameter Search (on a validation split of the training data)
+        tuning_report = None
+        if run.tuning:
+            check_cancelled()
+            run.stage = "tuning"
+            run.progress = 45
+            search_config = tuning_config()
+            log_event(f"Starting hyperparameter search: {search_config}")
+            logs.flush()
+            clean_params, tuning_report = HyperparameterSearch.search(
+                run.model_name, X_train, y_train, model_info["type"] == "classification", clean_params, search_config,
+                log=log_event, should_stop=check_cancelled
+            )
+            run.parameters = clean_params
+            log_event(f"Search finished in {tuning_report['seconds']}s: best {tuning_report['metric']} "
+                      f"{tuning_report['best_score']} with {tuning_report['best_params']}. Refitting on the full training split.")
+
+        # 5. Training
+        check_cancelled()
+        run.stage = "fitting"
+        run.progress = 50
+        log_event(f"Fitting model architecture: {model_info['name']}")
+        log_event(f"Algorithm Type: {model_info['type'].upper()} - optimizing for {'accuracy/F1' if model_info['type'] == 'classification' else 'error minimization (RMSE)'}.")
+        log_event("Hyperparameters: " + str(run.parameters or "Optimized Defaults"))
+        log_event("Explanation: The model is now iteratively learning the patterns mapping your features (X) to the target (Y).")
+        logs.flush()
+
+        # The final fit uses the run's whole CPU share (searches and folds split it between their workers)
+        fit_params = {**clean_params, **ResourceGovernor.thread_params(model_info["class"], ResourceGovernor.threads())}
+
+        def fit_final(X_fit):
+            # Iterative estimators stop early / at the deadline; the rest are fitted in one call
+            if TrainingBudget.supports(model_info):
+                return TrainingBudget.fit(
+                    model_info, fit_params, X_fit, y_train, budget, deadline,
+                    is_classification=model_info["type"] == "classification", log=log_event
+                )
+            return model_info["class"](**fit_params).fit(X_fit, y_train), None
+
+        if deadline is not None and not TrainingBudget.supports(model_info):
+            log_event(f"{model_info['name']} is not iterative: the time limit bounds the search only, the final fit runs to completion.")
+
+        try:
+            clf, budget_stats = fit_final(X_train)
+        except (TypeError, ValueError) as e:
+            if not sparse.issparse(X_train):
+                raise
+            # Estimator has no sparse support: densify as a last resort
+            log_event(f"WARNING: {model_info['name']} rejected sparse input ({e}). Falling back to a dense matrix.")
+            preprocessor.densify_ = True
+            X_train = X_train.toarray()
+            X_test = X_test.toarray() if X_test is not None else None
+            clf, budget_stats = fit_final(X_train)
+        if budget_stats is not None:
+            log_event(f"Fitted {budget_stats['iterations']}/{budget_stats['max_iterations']} iterations in {budget_stats['fit_seconds']}s "
+                      f"(stopped by {budget_stats['stopped_by'].replace('_', ' ')}); best at iteration {budget_stats['best_iteration']} "
+                      f"after {budget_stats['time_to_best_seconds']}s.")
+        log_event("Core weights calculation complete. The mathematical function has been defined.")
+
+        # 6. Evaluation
+        check_cancelled()
+        run.stage = "scoring"
+        run.progress = 80
+        probs = None
+        if cv_report is not None:
+            log_event("Scoring pooled out-of-fold predictions...")
+            y_test = np.asarray(y_train)[oof["index"]]
+            preds = oof["pred"]
+            probs = oof["proba"]
+        else:
+            log_event("Scoring model against held-out validation set...")
+            preds = clf.predict(X_test)
+        logs.flush()
+
+        return {
+            "model": clf, "preprocessor": preprocessor, "feature_names": feature_names, "target_classes": target_classes,
+            "X_test": X_test, "y_test": y_test, "preds": preds, "probs": probs,
+            "selection": selection_report, "tuning": tuning_report, "cv": cv_report, "budget": budget_stats,
+        }
@@ -0,0 +1,358 @@
+import itertools
+import math
+import multiprocessing
+import time
+import numpy as np
+from typing import Callable, Optional
+from scipy import sparse
+from sklearn.model_selection import train_test_split
+
+from app.core.config import settings
+from app.core.resources import ResourceGovernor
+from app.model_zoo.registry import ModelRegistry
+
+
+_TRIAL_DATA = {}  # Set once per pool worker by _init_worker (or in-process when running serially)
+
+
+def _init_worker(model_key: str, X_fit, y_fit, X_val, y_val, order: np.ndarray, threads: int):
+    ResourceGovernor.apply(threads)  # Each worker gets its part of the run's CPU share
+    thread_params = ResourceGovernor.thread_params(ModelRegistry.get_model(model_key)["class"], threads)
+    _TRIAL_DATA.update(model_key=model_key, X_fit=X_fit, y_fit=y_fit, X_val=X_val, y_val=y_val, order=order,
+                       thread_params=thread_params)
+
+
+def _take(X, rows: np.ndarray):
+    return X.iloc[rows] if hasattr(X, "iloc") else X[rows]
+
+
+def _run_trial(trial_id: int, params: dict, rungs: list, thresholds: list) -> dict:
+    """
+    Fits one configuration on growing row prefixes (`rungs`) of the shuffled fit split and scores it
+    on the validation split. Stops early (pruned) when a rung scores below that rung's threshold.
+    """
+    data = _TRIAL_DATA
+    model_class = ModelRegistry.get_model(data["model_key"])["class"]
+    started = time.time()
+    rung_scores = []
+    for rows, threshold in zip(rungs, thresholds):
+        X_part, y_part = _take(data["X_fit"], data["order"][:rows]), _take(data["y_fit"], data["order"][:rows])
+        X_val = data["X_val"]
+        model = model_class(**{**params, **data["thread_params"]})
+        try:
+            model.fit(X_part, y_part)
+        except (TypeError, ValueError):
+            if not sparse.issparse(X_part):
+                raise
+            # Same fallback as the final fit: estimators without sparse support get dense input
+            X_part, X_val = X_part.toarray(), X_val.toarray()
+            model = model_class(**{**params, **data["thread_params"]}).fit(X_part, y_part)
+        score = float(model.score(X_val, data["y_val"]))
+        rung_scores.append(score)
+        if threshold is not None and score < threshold and rows != rungs[-1]:
+            return {"trial": trial_id, "params": params, "status": "pruned", "score": score, "rows": rows,
+                    "rung_scores": rung_scores, "seconds": round(time.time() - started, 3)}
+    return {"trial": trial_id, "params": params, "status": "completed", "score": score, "rows": rungs[-1],
+            "rung_scores": rung_scores, "seconds": round(time.time() - started, 3)}
+
+
+def _run_trial_safe(trial_id: int, params: dict, rungs: list, thresholds: list) -> dict:
+    try:
+        return _run_trial(trial_id, params, rungs, thresholds)
+    except Exception as e:
+        return {"trial": trial_id, "params": params, "status": "failed", "score": None, "rows": 0,
+                "rung_scores": [], "error": str(e)[:300], "seconds": 0.0}
+
+
+class HyperparameterSearch:
+    """
+    Hyperparameter search over the ranges a model declares in its registry `param_meta`.
+    Trials are scored with the estimator's own `score` (accuracy / R²) on a
+    validation split carved out of the training split, so the test split stays
+    untouched. Trials run in a spawned process pool that receives the data once
+    per worker, within a trial budget (`n_trials`) and a wall-clock budget
+    (`time_budget`); outstanding trials are terminated when the clock runs out, so a
+    budgeted search runs in the pool even with a single worker (only unbudgeted searches
+    with one worker run in-process).
+
+    Strategies:
+      - grid: cartesian product of each range (at most GRID_POINTS values per number range),
+        sampled down to n_trials when larger.
+      - random: n_trials draws (log-uniform for ranges spanning two or more decades).
+      - halving: successive halving; all candidates start on a small row budget and only the
+        best 1/eta of each rung advance to eta times more rows. A configuration's results on
+        lower rungs are reported as promoted or pruned, so each one is completed at most once.
+    Grid and random trials are pruned early: each is first fit on 1/eta of the rows and stopped
+    there if it scores below the median of the trials that already reached that point.
+
+    config: {
+        "strategy": "random" | "grid" | "halving", "n_trials": 20, "time_budget": seconds,
+        "space": {"param": [values] | {"min", "max", "step"}}, "validation_size": 0.2,
+        "eta": 3, "n_jobs": 4, "random_state": 42
+    }
+    """
+
+    STRATEGIES = ["grid", "random", "halving"]
+    GRID_POINTS = 5
+    MIN_RUNG_ROWS = 100
+    LEADERBOARD_SIZE = 10
+
+    @staticmethod
+    def _is_int(meta: dict, default) -> bool:
+        if isinstance(default, bool):
+            return False
+        if isinstance(default, int):
+            return True
+        # No default to go by: integral bounds mean an integer parameter
+        return default is None and all(isinstance(meta.get(k, 1), int) for k in ("min", "max", "step"))
+
+    @staticmethod
+    def space(model_info: dict, overrides: Optional[dict] = None) -> dict:
+        """
+        Normalized search space {param: {"values": [...]} | {"low", "high", "step", "int", "log", "nullable"}}.
+        Only parameters the registry lists as defaults for the model can be tuned.
+        """
+        defaults = model_info.get("params", {})
+        meta = model_info.get("param_meta", {})
+        if overrides:
+            unknown = [p for p in overrides if p not in defaults]
+            if unknown:
+                raise ValueError(f"Cannot tune {unknown} for {model_info['name']}. Tunable: {sorted(defaults)}")
+        space = {}
+        for name in (overrides or meta):
+            spec = (overrides or {}).get(name, meta.get(name, {}))
+            if isinstance(spec, (list, tuple)):
+                space[name] = {"values": list(spec)}
+                continue
+            spec = {**meta.get(name, {}), **spec}
+            if spec.get("options"):
+                space[name] = {"values": list(spec["options"])}
+                continue
+            if spec.get("min") is None or spec.get("max") is None:
+                continue
+            low, high = float(spec["min"]), float(spec["max"])
+            space[name] = {
+                "low": low, "high": high, "step": spec.get("step"),
+                "int": HyperparameterSearch._is_int(spec, defaults.get(name)),
+                "log": low > 0 and high / low >= 100,
+                "nullable": bool(spec.get("nullable")),
+            }
+        if not space:
+            raise ValueError(f"{model_info['name']} declares no tunable parameter ranges")
+        return space
+
+    @staticmethod
+    def _cast(dim: dict, value: float):
+        if dim["int"]:
+            return int(round(value))
+        if dim["step"] and not dim["log"]:
+            # Snap to the declared step without accumulating float noise
+            step = float(dim["step"])
+            decimals = max(0, -int(math.floor(math.log10(step)))) if step < 1 else 0
+            return round(dim["low"] + round((value - dim["low"]) / step) * step, decimals + 2)
+        return float(value)
+
+    @staticmethod
+    def _grid_values(dim: dict) -> list:
+        if "values" in dim:
+            return dim["values"]
+        if dim["log"]:
+            points = np.geomspace(dim["low"], dim["high"], HyperparameterSearch.GRID_POINTS)
+        else:
+            points = np.linspace(dim["low"], dim["high"], HyperparameterSearch.GRID_POINTS)
+        values = list(dict.fromkeys(HyperparameterSearch._cast(dim, p) for p in points))
+        return values + ([None] if dim["nullable"] else [])
+
+    @staticmethod
+    def _sample_value(dim: dict, rng: np.random.Generator):
+        if "values" in dim:
+            return dim["values"][rng.integers(len(dim["values"]))]
+        if dim["nullable"] and rng.random() < 0.1:
+            return None
+        if dim["log"]:
+            value = math.exp(rng.uniform(math.log(dim["low"]), math.log(dim["high"])))
+        else:
+            value = rng.uniform(dim["low"], dim["high"])
+        return HyperparameterSearch._cast(dim, value)
+
+    @staticmethod
+    def candidates(space: dict, strategy: str, n_trials: int, rng: np.random.Generator) -> list:
+        if strategy == "grid":
+            names = list(space)
+            grid = [dict(zip(names, combo)) for combo in itertools.product(*(HyperparameterSearch._grid_values(space[n]) for n in names))]
+            if len(grid) > n_trials:
+                grid = [grid[i] for i in np.sort(rng.choice(len(grid), n_trials, replace=False))]
+            return grid
+        seen, out = set(), []
+        for _ in range(n_trials * 10):
+            params = {name: HyperparameterSearch._sample_value(dim, rng) for name, dim in space.items()}
+            key = repr(sorted(params.items()))
+            if key not in seen:
+                seen.add(key)
+                out.append(params)
+            if len(out) == n_trials:
+                break
+        return out
+
+    @staticmethod
+    def _rank_key(result: dict):
+        # Trials that saw more rows rank first (halving), then by score
+        return (result["rows"], result["score"])
+
+    @staticmethod
+    def search(model_key: str, X, y, is_classification: bool, base_params: dict, config: dict,
+               log: Optional[Callable] = None, should_stop: Optional[Callable] = None) -> tuple:
+        """Returns (best params merged over base_params, report)."""
+        log = log or (lambda message: None)
+        model_info = ModelRegistry.get_model(model_key)
+        if model_info["type"] not in ("classification", "regression"):
+            raise ValueError("Hyperparameter search is only available for classification and regression models")
+        strategy = config.get("strategy", "random")
+        if strategy not in HyperparameterSearch.STRATEGIES:
+            raise ValueError(f"Unknown search strategy: {strategy}. Available: {HyperparameterSearch.STRATEGIES}")
+        n_trials = int(config.get("n_trials", settings.TRAINING_TUNING_TRIALS))
+        time_budget = float(config.get("time_budget", settings.TRAINING_TUNING_TIME_BUDGET))
+        eta = max(2, int(config.get("eta", 3)))
+        random_state = int(config.get("random_state", 42))
+        rng = np.random.default_rng(random_state)
+        started = time.time()
+        deadline = started + time_budget if time_budget > 0 else float("inf")
+
+        space = HyperparameterSearch.space(model_info, config.get("space"))
+        candidates = HyperparameterSearch.candidates(space, strategy, n_trials, rng)
+        stratify = y if is_classification and np.min(np.unique(y, return_counts=True)[1]) >= 2 else None
+        X_fit, X_val, y_fit, y_val = train_test_split(
+            X, y, test_size=float(config.get("validation_size", 0.2)), random_state=random_state, stratify=stratify
+        )
+        n_rows = X_fit.shape[0]
+        order = rng.permutation(n_rows)
+        budget = ResourceGovernor.threads()
+        n_workers = max(1, min(int(config.get("n_jobs", settings.TRAINING_N_JOBS)), len(candidates), budget))
+        log(f"Hyperparameter search: {strategy}, {len(candidates)} candidates over {sorted(space)}, "
+            f"{n_workers} worker(s), budget {time_budget:.0f}s.")
+
+        results = []
+        best = None
+        state = {"started": 0, "stopped": None, "checked": 0.0}
+        init_args = (model_key, X_fit, y_fit, X_val, y_val, order, max(1, budget // n_workers))
+
+        def record(result: dict):
+            nonlocal best
+            result = {**result, "params": {**result["params"]}}
+            results.append(result)
+            if result["status"] == "failed":
+                log(f"Trial {result['trial']} failed: {result['error']}")
+            elif result["status"] == "pruned":
+                log(f"Trial {result['trial']} pruned at {result['rows']} rows (score {result['score']:.4f}).")
+            elif best is None or HyperparameterSearch._rank_key(result) > HyperparameterSearch._rank_key(best):
+                best = result
+                log(f"New best (trial {result['trial']}, {result['rows']} rows): score {result['score']:.4f} with {result['params']}")
+
+        def check_stop():
+            if should_stop is not None and time.time() - state["checked"] >= 1.0:
+                state["checked"] = time.time()
+                should_stop()
+
+        def run_batch(jobs: list):
+            """jobs: [(trial_id, params, rungs, thresholds or a callable giving them at submit time)]"""
+            if n_workers == 1 and deadline == float("inf"):
+                # Nothing to enforce: no pool start-up or data transfer
+                _init_worker(*init_args)
+                for job in jobs:
+                    check_stop()
+                    if time.time() >= deadline:
+                        state["stopped"] = "time budget"
+                        return
+                    trial_id, params, rungs, thresholds = job
+                    state["started"] += 1
+                    record(_run_trial_safe(trial_id, {**base_params, **params}, rungs, thresholds() if callable(thresholds) else thresholds))
+                return
+
+            pool = multiprocessing.get_context("spawn").Pool(n_workers, initializer=_init_worker, initargs=init_args)
+            try:
+                pending, queue = [], list(jobs)
+                while queue or pending:
+                    check_stop()
+                    if time.time() >= deadline:
+                        state["stopped"] = "time budget"
+                        return
+                    # Keep one queued trial per worker so thresholds are as fresh as possible at submit time
+                    while queue and len(pending) < 2 * n_workers:
+                        trial_id, params, rungs, thresholds = queue.pop(0)
+                        state["started"] += 1
+                        pending.append(pool.apply_async(_run_trial_safe, (
+                            trial_id, {**base_params, **params}, rungs, thresholds() if callable(thresholds) else thresholds
+                        )))
+                    done = [p for p in pending if p.ready()]
+                    for p in done:
+                        pending.remove(p)
+                        record(p.get())
+                    if not done:
+                        time.sleep(0.05)
+            finally:
+                pool.terminate()
+                pool.join()
+
+        if strategy == "halving":
+            n_rungs = max(1, min(int(math.log(len(candidates), eta)) + 1,
+                                 int(math.log(max(n_rows / HyperparameterSearch.MIN_RUNG_ROWS, 1), eta)) + 1))
+            survivors = list(enumerate(candidates))
+            for rung in range(n_rungs):
+                rows = n_rows if rung == n_rungs - 1 else max(1, int(n_rows / eta ** (n_rungs - 1 - rung)))
+                log(f"Rung {rung + 1}/{n_rungs}: {len(survivors)} candidates on {rows} rows.")
+                before = len(results)
+                run_batch([(i, params, [rows], [None]) for i, params in survivors])
+                scored = [r for r in results[before:] if r["status"] == "completed"]
+                if state["stopped"] or rung == n_rungs - 1:
+                    break
+                scored.sort(key=lambda r: r["score"], reverse=True)
+                keep = {r["trial"] for r in scored[:max(1, math.ceil(len(survivors) / eta))]}
+                for r in scored:
+                    # Each configuration counts once: its result at this rung is superseded either way
+                    r["status"] = "promoted" if r["trial"] in keep else "pruned"
+                survivors = [(i, params) for i, params in survivors if i in keep]
+        else:
+            early_rows = n_rows // eta
+            rungs = [early_rows, n_rows] if early_rows >= HyperparameterSearch.MIN_RUNG_ROWS else [n_rows]
+
+            def thresholds():
+                # Median of first-rung scores seen so far; needs a few trials before it prunes anything
+                seen = [r["rung_scores"][0] for r in results if r["rung_scores"]]
+                return [float(np.median(seen)) if len(rungs) > 1 and len(seen) >= 3 else None, None]
+
+            run_batch([(i, params, rungs, thresholds) for i, params in enumerate(candidates)])
+
+        if best is None and not state["stopped"]:
+            errors = {r.get("error") for r in results if r["status"] == "failed"}
+            raise ValueError(f"Hyperparameter search produced no completed trial. Errors: {sorted(e for e in errors if e)[:3]}")
+        if best is None:
+            log("Time budget ran out before any trial completed. Keeping the configured parameters.")
+            best = {"score": None, "params": dict(base_params)}
+
+        # A trial that advanced through several halving rungs is listed once, at its largest rung
+        finished, listed = [], set()
+        for r in sorted((r for r in results if r["status"] in ("completed", "promoted")), key=HyperparameterSearch._rank_key, reverse=True):
+            if r["trial"] not in listed:
+                listed.add(r["trial"])
+                finished.append(r)
+        report = {
+            "strategy": strategy,
+            "metric": "accuracy" if is_classification else "r2",
+            "space": {name: dim.get("values", [dim.get("low"), dim.get("high")]) for name, dim in space.items()},
+            "candidates": len(candidates),
+            "trials_started": state["started"],
+            "completed": sum(r["status"] == "completed" for r in results),
+            "promoted": sum(r["status"] == "promoted" for r in results),
+            "pruned": sum(r["status"] == "pruned" for r in results),
+            "failed": sum(r["status"] == "failed" for r in results),
+            "stopped_by": state["stopped"],
+            "validation_rows": int(X_val.shape[0]),
+            "best_score": best["score"],
+            "best_params": best["params"],
+            "leaderboard": [
+                {"trial": r["trial"], "score": r["score"], "rows": r["rows"], "seconds": r["seconds"], "params": r["params"]}
+                for r in finished[:HyperparameterSearch.LEADERBOARD_SIZE]
+            ],
+            "seconds": round(time.time() - started, 3),
+        }
+        return {**base_params, **best["params"]}, report
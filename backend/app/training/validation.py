@@ -0,0 +1,221 @@
+import copy
+import time
+import numpy as np
+from typing import Callable, Optional
+from joblib import Parallel, delayed, parallel_config
+from scipy import sparse
+from sklearn.metrics import (
+    accuracy_score, f1_score, balanced_accuracy_score,
+    mean_squared_error, mean_absolute_error, r2_score
+)
+from sklearn.model_selection import KFold, StratifiedKFold, GroupKFold, TimeSeriesSplit
+
+from app.core.config import settings
+from app.core.resources import ResourceGovernor
+from app.training.selection import FeatureSelector
+from app.training.tuning import HyperparameterSearch
+
+
+def _take(X, rows: np.ndarray):
+    return X.iloc[rows] if hasattr(X, "iloc") else X[rows]
+
+
+class FoldPreparation:
+    """
+    The steps a run applies before fitting (preprocessing, then optional feature selection
+    and hyperparameter search), replayed inside a fold on that fold's training rows only,
+    so no statistic of the scored rows reaches the model that scores them.
+    `preprocessor` is an unfitted template, copied for every fold.
+    """
+
+    def __init__(self, preprocessor, model_key: str, is_classification: bool, native_params: Optional[dict] = None,
+                 selection: Optional[dict] = None, tuning: Optional[dict] = None):
+        self.preprocessor = preprocessor
+        self.model_key = model_key
+        self.is_classification = is_classification
+        self.native_params = native_params or {}
+        self.selection = selection
+        self.tuning = tuning
+
+    def __call__(self, X_fit, y_fit, X_eval, params: dict, threads: int) -> tuple:
+        """Returns (X_fit, X_eval, params, fitted preprocessor, reports)."""
+        preprocessor = copy.deepcopy(self.preprocessor)
+        X_fit = preprocessor.fit_transform(X_fit)
+        X_eval = preprocessor.transform(X_eval)
+        if preprocessor.native_columns_:
+            params = {**params, **self.native_params}
+        reports = {}
+        if self.selection:
+            selected, reports["feature_selection"] = FeatureSelector.select(
+                preprocessor.numeric_view(X_fit), y_fit, self.is_classification, {**self.selection, "n_jobs": threads}
+            )
+            X_fit, X_eval = (X_fit[:, selected], X_eval[:, selected]) if sparse.issparse(X_fit) else \
+                (X_fit.iloc[:, selected], X_eval.iloc[:, selected])
+            reports["feature_selection"]["source_columns"] = preprocessor.restrict(selected)
+        if self.tuning:
+            params, reports["tuning"] = HyperparameterSearch.search(
+                self.model_key, X_fit, y_fit, self.is_classification, params, {**self.tuning, "n_jobs": threads}
+            )
+        return X_fit, X_eval, params, preprocessor, reports
+
+
+def _fit_fold(model_class, params: dict, X, y, train_idx: np.ndarray, test_idx: np.ndarray, n_classes: int,
+              keep_model: bool, prepare: Optional[FoldPreparation] = None, threads: int = 1) -> dict:
+    """Fits one fold. X and y arrive memory-mapped when the folds run in worker processes."""
+    started = time.time()
+    X_fit, X_eval = _take(X, train_idx), _take(X, test_idx)
+    y_fit = _take(y, train_idx)
+    preprocessor, reports = None, {}
+    if prepare is not None:
+        X_fit, X_eval, params, preprocessor, reports = prepare(X_fit, y_fit, X_eval, params, threads)
+    params = {**params, **ResourceGovernor.thread_params(model_class, threads)}
+    model = model_class(**params)
+    try:
+        model.fit(X_fit, y_fit)
+    except (TypeError, ValueError):
+        if not sparse.issparse(X_fit):
+            raise
+        X_fit, X_eval = X_fit.toarray(), X_eval.toarray()
+        model = model_class(**params).fit(X_fit, y_fit)
+        if preprocessor is not None:
+            preprocessor.densify_ = True
+
+    proba = None
+    if n_classes and hasattr(model, "predict_proba"):
+        try:
+            # A fold may not see every class: place its columns at the global class positions
+            proba = np.zeros((len(test_idx), n_classes))
+            proba[:, np.asarray(model.classes_, dtype=int)] = model.predict_proba(X_eval)
+        except Exception:
+            proba = None
+    return {
+        "pred": np.asarray(model.predict(X_eval)),
+        "proba": proba,
+        "model": model if keep_model else None,
+        "preprocessor": preprocessor if keep_model else None,
+        "n_features": int(X_fit.shape[1]),
+        "reports": reports,
+        "seconds": round(time.time() - started, 3),
+    }
+
+
+class CrossValidator:
+    """
+    Cross-validated evaluation of one configuration, on the preprocessed matrix or, with
+    `prepare`, on the raw table with preprocessing/selection/tuning fitted inside each fold.
+    Folds are fitted in parallel with joblib's process backend, which memory-maps
+    the shared matrix (dense arrays and the buffers of sparse ones) instead of
+    copying it into every worker. Returns per-fold metrics with their mean/std and
+    the out-of-fold predictions, which the trainer scores like a held-out set.
+
+    config: {
+        "strategy": "kfold" | "stratified" | "group" | "timeseries", "n_splits": 5,
+        "shuffle": true, "group_column": "...", "time_column": "...", "refit": true, "n_jobs": 4
+    }
+    """
+
+    STRATEGIES = ["kfold", "stratified", "group", "timeseries"]
+
+    @staticmethod
+    def splitter(config: dict, is_classification: bool, log: Callable):
+        strategy = config.get("strategy", "kfold")
+        if strategy not in CrossValidator.STRATEGIES:
+            raise ValueError(f"Unknown evaluation strategy: {strategy}. Available: {CrossValidator.STRATEGIES}")
+        n_splits = int(config.get("n_splits", 5))
+        shuffle = bool(config.get("shuffle", True))
+        random_state = int(config.get("random_state", 42)) if shuffle else None
+        if strategy == "stratified" and not is_classification:
+            log("Stratified folds need a categorical target. Using plain K-fold.")
+            strategy = "kfold"
+        if strategy == "stratified":
+            return StratifiedKFold(n_splits=n_splits, shuffle=shuffle, random_state=random_state)
+        if strategy == "group":
+            if not config.get("group_column"):
+                raise ValueError("Grouped cross-validation needs a 'group_column'")
+            return GroupKFold(n_splits=n_splits)
+        if strategy == "timeseries":
+            return TimeSeriesSplit(n_splits=n_splits)
+        return KFold(n_splits=n_splits, shuffle=shuffle, random_state=random_state)
+
+    @staticmethod
+    def fold_metrics(y_true, pred, is_classification: bool) -> dict:
+        if is_classification:
+            return {
+                "accuracy": float(accuracy_score(y_true, pred)),
+                "f1_weighted": float(f1_score(y_true, pred, average="weighted")),
+                "balanced_accuracy": float(balanced_accuracy_score(y_true, pred)),
+            }
+        return {
+            "rmse": float(np.sqrt(mean_squared_error(y_true, pred))),
+            "mae": float(mean_absolute_error(y_true, pred)),
+            "r2": float(r2_score(y_true, pred)),
+        }
+
+    @staticmethod
+    def evaluate(model_class, params: dict, X, y, is_classification: bool, config: dict,
+                 groups: Optional[np.ndarray] = None, log: Optional[Callable] = None,
+                 prepare: Optional[FoldPreparation] = None) -> tuple:
+        """
+        Returns (report, oof) where oof = {"index", "pred", "proba", "models", "preprocessors", "reports"}.
+        `index` lists the rows that received an out-of-fold prediction (all rows except
+        the first block under time-series splits), in fold order. Without refit the fold
+        models are kept, with their fitted preprocessors and selection/tuning reports.
+        """
+        log = log or (lambda message: None)
+        y = np.asarray(y)
+        started = time.time()
+        cv = CrossValidator.splitter(config, is_classification, log)
+        folds = list(cv.split(np.zeros((X.shape[0], 1)), y if is_classification else None, groups))
+        n_classes = int(y.max()) + 1 if is_classification else 0
+        keep_models = not config.get("refit", True)
+        budget = ResourceGovernor.threads()
+        n_jobs = max(1, min(int(config.get("n_jobs", settings.TRAINING_N_JOBS)), len(folds), budget))
+        if prepare is not None and prepare.tuning:
+            # A search's process pool cannot start inside a loky worker: folds then run one after
+            # another in this process, each search taking the whole CPU share for its trials
+            n_jobs = 1
+        # Folds split the run's CPU share: estimator n_jobs and native pools in each worker get their part
+        threads = max(1, budget // n_jobs)
+        log(f"Cross-validating with {type(cv).__name__} ({len(folds)} folds, {n_jobs} parallel worker(s), {threads} thread(s) each).")
+
+        with parallel_config(backend="loky", inner_max_num_threads=threads):
+            results = Parallel(n_jobs=n_jobs, max_nbytes="1M", mmap_mode="r")(
+                delayed(_fit_fold)(model_class, params, X, y, train_idx, test_idx, n_classes, keep_models, prepare, threads)
+                for train_idx, test_idx in folds
+            )
+
+        fold_reports = []
+        for i, ((train_idx, test_idx), result) in enumerate(zip(folds, results)):
+            metrics = CrossValidator.fold_metrics(y[test_idx], result["pred"], is_classification)
+            fold_reports.append({
+                "fold": i + 1, "train_rows": int(len(train_idx)), "test_rows": int(len(test_idx)),
+                "n_features": result["n_features"], "metrics": metrics, "seconds": result["seconds"],
+            })
+            if "tuning" in result["reports"]:
+                fold_reports[-1]["best_params"] = result["reports"]["tuning"]["best_params"]
+            log(f"Fold {i + 1}/{len(folds)}: " + ", ".join(f"{k}={v:.4f}" for k, v in metrics.items())
+                + (f" ({result['n_features']} features)" if prepare is not None else ""))
+
+        names = list(fold_reports[0]["metrics"])
+        table = np.array([[f["metrics"][n] for n in names] for f in fold_reports])
+        report = {
+            "strategy": config.get("strategy", "kfold"),
+            "splitter": type(cv).__name__,
+            "n_splits": len(folds),
+            "folds": fold_reports,
+            "mean": dict(zip(names, table.mean(axis=0).round(6).tolist())),
+            "std": dict(zip(names, table.std(axis=0).round(6).tolist())),
+            "refit": not keep_models,
+            "preprocessed_in_folds": prepare is not None,
+            "seconds": round(time.time() - started, 3),
+        }
+        has_proba = all(r["proba"] is not None for r in results)
+        oof = {
+            "index": np.concatenate([test_idx for _, test_idx in folds]),
+            "pred": np.concatenate([r["pred"] for r in results]),
+            "proba": np.vstack([r["proba"] for r in results]) if has_proba and n_classes else None,
+            "models": [r["model"] for r in results] if keep_models else None,
+            "preprocessors": [r["preprocessor"] for r in results] if keep_models else None,
+            "reports": [r["reports"] for r in results] if keep_models else None,
+        }
+        return report, oof
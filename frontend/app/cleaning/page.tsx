@@ -31,12 +31,16 @@ const CLEANING_OPS = [
     { value: "drop_missing_cols", label: "Drop Missing Columns", description: "Remove columns containing any missing values.", category: "Missing Data" },
     { value: "fill_missing_mean", label: "Fill Missing (Mean)", description: "Replace missing numeric values with the column mean.", category: "Missing Data" },
     { value: "fill_missing_median", label: "Fill Missing (Median)", description: "Replace missing numeric values with the column median.", category: "Missing Data" },
+    { value: "fill_missing_knn", label: "Fill Missing (KNN)", description: "Impute numeric gaps from the nearest complete rows, found through an approximate neighbor index.", category: "Missing Data" },
+    { value: "fill_missing_iterative", label: "Fill Missing (Iterative)", description: "Model each numeric column from the others (fit on a row sample) and predict the gaps.", category: "Missing Data" },
     { value: "fill_missing_mode", label: "Fill Missing (Mode)", description: "Replace missing values with the most frequent value.", category: "Missing Data" },
     { value: "fill_missing_constant", label: "Fill Missing (Constant)", description: "Replace missing values with a specific constant.", category: "Missing Data" },
     { value: "fill_missing_ffill", label: "Forward Fill", description: "Propagate the last valid observation forward.", category: "Missing Data" },
     { value: "fill_missing_bfill", label: "Backward Fill", description: "Use the next valid observation to fill gaps.", category: "Missing Data" },
 
     { value: "drop_duplicates", label: "Remove Duplicates", description: "Remove duplicate rows from the dataset.", category: "Quality Control" },
+    { value: "find_near_duplicates", label: "Find Near Duplicates", description: "Tag fuzzy duplicates (typos, spacing, reordered words) in text columns with a cluster id using MinHash LSH.", category: "Quality Control" },
+    { value: "drop_near_duplicates", label: "Remove Near Duplicates", description: "Keep one record per cluster of fuzzy text duplicates found with MinHash LSH.", category: "Quality Control" },
     { value: "drop_columns", label: "Drop Columns", description: "Remove specific columns from the dataset.", category: "Column Ops" },
     { value: "rename_columns", label: "Rename Columns", description: "Rename specific columns.", category: "Column Ops" },
 
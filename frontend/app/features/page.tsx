@@ -31,6 +31,7 @@ const FEATURE_OPS = [
     { value: "one_hot_encoding", label: "One-Hot Encoding", description: "Encode categorical features as a one-hot numeric array.", category: "Encoding (Categorical)" },
     { value: "frequency_encoding", label: "Frequency Encoding", description: "Replace categories with their frequency counts.", category: "Encoding (Categorical)" },
     { value: "hash_encoding", label: "Hash Encoding", description: "Map categories to indices using a hash function. Good for high cardinality.", category: "Encoding (Categorical)" },
+    { value: "target_encoding", label: "Target Encoding", description: "Replace categories with their smoothed target mean, computed out-of-fold to avoid leakage. One compact column even for very high cardinality.", category: "Encoding (Categorical)" },
 
     { value: "binarizer", label: "Binarizer (Threshold)", description: "Threshold numerical features to binary (0/1).", category: "Discretization" },
     { value: "kbins_uniform", label: "Binning (Uniform)", description: "Discretize into k bins of equal width.", category: "Discretization" },
@@ -42,6 +43,9 @@ const FEATURE_OPS = [
     { value: "date_extraction", label: "Date Parts Extraction", description: "Extract Year, Month, Day, Hour from datetime columns.", category: "Generation & Interaction" },
 
     { value: "pca", label: "PCA (Dim Reduction)", description: "Principal Component Analysis for dimensionality reduction.", category: "Dimensionality" },
+    { value: "tsne", label: "t-SNE Embedding", description: "Non-linear 2D/3D embedding for visualizing clusters. Fit on landmark rows, projected to the rest.", category: "Dimensionality" },
+    { value: "isomap", label: "Isomap Embedding", description: "Geodesic (manifold) embedding. Fit on landmark rows, projected to the rest.", category: "Dimensionality" },
+    { value: "umap", label: "UMAP Embedding", description: "Fast manifold embedding preserving local and global structure. Fit on landmark rows, projected to the rest.", category: "Dimensionality" },
 ];
 
 export default function FeatureEngineeringPage() {
@@ -60,6 +64,7 @@ export default function FeatureEngineeringPage() {
     const [selectedCols, setSelectedCols] = useState<string[]>([]);
     const [pcaComponents, setPcaComponents] = useState(2);
     const [binarizerThreshold, setBinarizerThreshold] = useState(0.0);
+    const [targetColumn, setTargetColumn] = useState("");
     const [loading, setLoading] = useState(false);
     const { openHelp } = useExplainabilityStore();
 
@@ -124,12 +129,19 @@ export default function FeatureEngineeringPage() {
         setLoading(true);
         try {
             const finalParams: any = { columns: selectedCols };
-            if (operation === 'pca') {
+            if (['pca', 'tsne', 'isomap', 'umap'].includes(operation)) {
                 finalParams.n_components = pcaComponents;
             }
             if (operation === 'binarizer') {
                 finalParams.threshold = binarizerThreshold;
             }
+            if (operation === 'target_encoding') {
+                if (!targetColumn) {
+                    addToast("Select a target column for target encoding", "error");
+                    return;
+                }
+                finalParams.target = targetColumn;
+            }
 
             await api.post("/features/apply", {
                 dataset_id: selectedId,
@@ -338,10 +350,10 @@ export default function FeatureEngineeringPage() {
                         </div>
 
                         {/* Extra Params */}
-                        {operation === 'pca' && (
+                        {['pca', 'tsne', 'isomap', 'umap'].includes(operation) && (
                             <div className="space-y-4 animate-in slide-in-from-top-2 duration-300">
                                 <label className="text-[10px] font-black text-gray-500 uppercase tracking-[0.2em] px-1 flex items-center gap-2">
-                                    <Info size={10} className="text-purple-500" /> PCA Components
+                                    <Info size={10} className="text-purple-500" /> {operation === 'pca' ? 'PCA' : 'Embedding'} Components
                                 </label>
                                 <input
                                     type="number"
@@ -353,6 +365,21 @@ export default function FeatureEngineeringPage() {
                                 />
                             </div>
                         )}
+                        {operation === 'target_encoding' && (
+                            <div className="space-y-4 animate-in slide-in-from-top-2 duration-300">
+                                <label className="text-[10px] font-black text-gray-500 uppercase tracking-[0.2em] px-1 flex items-center gap-2">
+                                    <Info size={10} className="text-purple-500" /> Target Column
+                                </label>
+                                <select
+                                    value={targetColumn}
+                                    onChange={(e) => setTargetColumn(e.target.value)}
+                                    className="w-full bg-black/40 border border-white/10 rounded-xl p-4 text-white text-xs font-mono font-bold focus:ring-2 focus:ring-purple-500/30 outline-none"
+                                >
+                                    <option value="">Select target...</option>
+                                    {columns.map(col => <option key={col} value={col}>{col}</option>)}
+                                </select>
+                            </div>
+                        )}
                         {operation === 'binarizer' && (
                             <div className="space-y-4 animate-in slide-in-from-top-2 duration-300">
                                 <label className="text-[10px] font-black text-gray-500 uppercase tracking-[0.2em] px-1 flex items-center gap-2">
@@ -1,11 +1,11 @@
 "use client";
-import { useEffect, useState } from "react";
-import { api } from "@/lib/api";
+import { useEffect, useRef, useState } from "react";
+import { api, API_URL } from "@/lib/api";
 import { Dataset, ModelOption, TrainingRun } from "@/lib/types";
 import {
     BrainCircuit, Play, Activity, AlertCircle,
     CheckCircle, Loader2, Clock, Trash2,
-    Download, ChevronDown, ChevronUp, ListFilter, Target, Box, Settings, Terminal, HelpCircle, Sparkles
+    Download, XCircle, ChevronDown, ChevronUp, ListFilter, Target, Box, Settings, Terminal, HelpCircle, Sparkles
 } from "lucide-react";
 import { useNotificationStore } from "@/store/notificationStore";
 import { useExplainabilityStore } from "@/store/explainabilityStore";
@@ -19,6 +19,9 @@ export default function TrainingPage() {
     const [datasets, setDatasets] = useState<Dataset[]>([]);
     const [models, setModels] = useState<ModelOption[]>([]);
     const [runs, setRuns] = useState<TrainingRun[]>([]);
+    const [runLogs, setRunLogs] = useState<Record<number, string[]>>({});
+    const [liveState, setLiveState] = useState<Record<number, Partial<TrainingRun>>>({});
+    const streams = useRef<Record<number, EventSource>>({});
     const [columns, setColumns] = useState<string[]>([]);
 
     // Form Selection
@@ -50,11 +53,47 @@ export default function TrainingPage() {
         api.get("/models/").then(res => setModels(res.data)).catch(err => console.error("Models fetch failed", err));
         fetchRuns();
 
-        // High-frequency polling for telemetry (every 2s for "live" feel)
-        const interval = setInterval(fetchRuns, 2000);
-        return () => clearInterval(interval);
+        // Live progress and logs arrive over per-run event streams; the list only needs a slow refresh
+        const interval = setInterval(fetchRuns, 5000);
+        return () => {
+            clearInterval(interval);
+            Object.values(streams.current).forEach(es => es.close());
+            streams.current = {};
+        };
     }, []);
 
+    // Open a stream per active run; load the stored log of finished runs once
+    useEffect(() => {
+        runs.forEach(run => {
+            const active = run.status === 'pending' || run.status === 'running';
+            if (active && !streams.current[run.id]) {
+                const es = new EventSource(`${API_URL}/training/runs/${run.id}/stream`);
+                streams.current[run.id] = es;
+                setRunLogs(prev => ({ ...prev, [run.id]: [] }));
+                es.addEventListener('log', (e) => {
+                    const { message } = JSON.parse((e as MessageEvent).data);
+                    setRunLogs(prev => ({ ...prev, [run.id]: [...(prev[run.id] || []), message] }));
+                });
+                es.addEventListener('status', (e) => {
+                    const state = JSON.parse((e as MessageEvent).data);
+                    setLiveState(prev => ({ ...prev, [run.id]: state }));
+                });
+                es.addEventListener('end', () => {
+                    es.close();
+                    delete streams.current[run.id];
+                    fetchRuns();
+                });
+            } else if (!active && !streams.current[run.id] && runLogs[run.id] === undefined) {
+                setRunLogs(prev => ({ ...prev, [run.id]: run.logs || [] }));
+                api.get(`/training/runs/${run.id}`)
+                    .then(res => setRunLogs(prev => ({ ...prev, [run.id]: res.data.logs })))
+                    .catch(() => { });
+            }
+        });
+    }, [runs]);
+
+    const displayRuns = runs.map(run => ({ ...run, ...liveState[run.id], logs: runLogs[run.id] ?? run.logs }));
+
     const fetchRuns = () => {
         // Silently catch polling errors to avoid spamming the user
         api.get("/training/runs")
@@ -203,6 +242,16 @@ export default function TrainingPage() {
         });
     };
 
+    const cancelRun = async (id: number) => {
+        try {
+            await api.post(`/training/runs/${id}/cancel`);
+            addToast("Cancellation requested", "info");
+            fetchRuns();
+        } catch (error: any) {
+            addToast(error.response?.data?.detail || "Cancellation failed", "error");
+        }
+    };
+
     const downloadModel = (id: number) => {
         const baseUrl = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000/api/v1';
         window.open(`${baseUrl}/training/runs/${id}/download`, '_blank');
@@ -556,7 +605,7 @@ export default function TrainingPage() {
                                 <p className="text-xs font-black uppercase tracking-[0.4em]">No active runs detected</p>
                             </div>
                         ) : (
-                            runs.map(run => (
+                            displayRuns.map(run => (
                                 <div key={run.id} className="relative bg-black/20 p-6 rounded-[1.5rem] border border-white/5 flex flex-col gap-6 group transition-all hover:border-purple-500/20 hover:bg-black/30">
                                     <div className="flex flex-col md:flex-row justify-between items-start md:items-center gap-4">
                                         <div className="flex flex-col gap-1">
@@ -582,6 +631,15 @@ export default function TrainingPage() {
                                                     <Download size={14} />
                                                 </button>
                                             )}
+                                            {(run.status === 'pending' || run.status === 'running') && (
+                                                <button
+                                                    onClick={() => cancelRun(run.id)}
+                                                    className="p-2 rounded-lg bg-white/5 border border-white/5 text-gray-400 hover:text-white hover:bg-white/10 transition-all"
+                                                    title="Cancel Run"
+                                                >
+                                                    <XCircle size={14} />
+                                                </button>
+                                            )}
                                             <button
                                                 onClick={() => deleteRun(run.id)}
                                                 className="p-2 rounded-lg bg-rose-500/5 border border-rose-500/10 text-rose-500/60 hover:text-rose-500 hover:bg-rose-500/10 transition-all"
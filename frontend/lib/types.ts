@@ -22,7 +22,11 @@ export interface TrainingRun {
     model_name: string;
     target_column?: string;
     feature_columns?: string[];
-    status: "pending" | "running" | "completed" | "failed";
+    status: "pending" | "running" | "completed" | "failed" | "cancelled";
+    priority?: number;
+    attempts?: number;
+    started_at?: string | null;
+    finished_at?: string | null;
     progress?: number;
     stage?: string;
     metrics: Record<string, number> | null;